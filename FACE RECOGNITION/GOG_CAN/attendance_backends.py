@@ -0,0 +1,260 @@
+"""
+Storage backends for attendance records.
+
+Every backend stores rows of (person_id, person_name, attendance_date, attendance_time,
+latitude, longitude) with at most one row per (person_id, attendance_date); marking the same
+person twice on one day only refreshes the stored name, like the original MySQL table.
+
+    MySQLBackend   -- the existing server database (connection-pooled)
+    SQLiteBackend  -- a local file in WAL mode for standalone kiosks and testing
+"""
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+
+class AttendanceBackend(ABC):
+    """Interface shared by all attendance stores."""
+    @abstractmethod
+    def setup(self):
+        """Creates the table and indexes if they do not exist."""
+
+    @abstractmethod
+    def mark(self, record):
+        """Stores one record. Returns True if it was new, False if already marked that day."""
+
+    @abstractmethod
+    def insert_many(self, records):
+        """Stores a batch of records in one transaction."""
+
+    @abstractmethod
+    def query_range(self, start_date, end_date):
+        """Records with start_date <= attendance_date <= end_date, ordered by date and time."""
+
+    def classify_error(self, error):
+        """
+        What a failed write means for the attendance queue:
+            'connection'  the store is unreachable; retry the same batch later
+            'data'        a record was rejected; retrying it will not help
+            'other'       unknown; retry a few times before treating it as 'data'
+        """
+        if isinstance(error, (OSError, ImportError)):
+            return "connection"
+        return "other"
+
+    def close(self):
+        pass
+
+
+# --- MYSQL ---
+class MySQLBackend(AttendanceBackend):
+    CREATE_SQL = """
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            person_id INT NOT NULL,
+            person_name VARCHAR(255) NOT NULL,
+            attendance_date DATE NOT NULL,
+            attendance_time TIME NOT NULL,
+            latitude DECIMAL(10, 8) NOT NULL,
+            longitude DECIMAL(11, 8) NOT NULL,
+            UNIQUE KEY unique_attendance (person_id, attendance_date)
+        )
+    """
+    # MySQL has no CREATE INDEX IF NOT EXISTS; setup() checks information_schema first, so
+    # tables created before the index existed get it too.
+    HAS_INDEX_SQL = """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'attendance' AND index_name = 'idx_attendance_date'
+    """
+    INDEX_SQL = "CREATE INDEX idx_attendance_date ON attendance (attendance_date, attendance_time)"
+    INSERT_SQL = """
+        INSERT INTO attendance (person_id, person_name, attendance_date, attendance_time, latitude, longitude)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE person_name = VALUES(person_name)
+    """
+
+    def __init__(self, db_config, pool_size=2):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self._pool = None
+
+    def _connect(self):
+        # Imported here so kiosks running the SQLite backend never need mysql-connector.
+        if self._pool is None:
+            from mysql.connector import pooling
+            self._pool = pooling.MySQLConnectionPool(pool_name="attendance", pool_size=self.pool_size,
+                                                     **self.db_config)
+        return self._pool.get_connection()
+
+    def _execute(self, sql, rows=None, many=False, fetch=False):
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                if many:
+                    cursor.executemany(sql, rows)
+                else:
+                    cursor.execute(sql, rows)
+                result = cursor.fetchall() if fetch else cursor.rowcount
+                conn.commit()
+                return result
+            finally:
+                cursor.close()
+        finally:
+            conn.close()  # Returns the connection to the pool
+
+    def setup(self):
+        self._execute(self.CREATE_SQL)
+        if not self._execute(self.HAS_INDEX_SQL, fetch=True)[0][0]:
+            self._execute(self.INDEX_SQL)
+
+    def mark(self, record):
+        # rowcount is 1 for a new row and 0 or 2 when the day's row already existed.
+        return self._execute(self.INSERT_SQL, tuple(record)) == 1
+
+    def insert_many(self, records):
+        self._execute(self.INSERT_SQL, [tuple(r) for r in records], many=True)
+
+    def query_range(self, start_date, end_date):
+        return self._execute(
+            "SELECT person_id, person_name, attendance_date, attendance_time, latitude, longitude "
+            "FROM attendance WHERE attendance_date BETWEEN %s AND %s "
+            "ORDER BY attendance_date, attendance_time", (start_date, end_date), fetch=True)
+
+    # Server and client error numbers. Access, schema and connection problems hold up every
+    # mark alike, so they are retried; only errors about a row's values isolate that row.
+    RETRY_ERRNOS = {
+        1040,  # Too many connections
+        1044, 1045,  # Access denied (database / user)
+        1049,  # Unknown database
+        1053,  # Server shutdown in progress
+        1129, 1130,  # Host blocked / not allowed
+        1146,  # Table doesn't exist (setup() runs again after a restart)
+        1205, 1213,  # Lock wait timeout / deadlock
+        2002, 2003, 2005, 2006, 2013, 2055,  # Can't connect, unknown host, server gone, lost connection
+    }
+    DATA_ERRNOS = {
+        1048,  # Column cannot be null
+        1054,  # Unknown column: a NaN/inf coordinate is sent as the bare word nan/inf
+        1062,  # Duplicate entry
+        1264,  # Out of range value
+        1265,  # Data truncated
+        1292,  # Incorrect date/time value
+        1366,  # Incorrect integer/decimal value
+        1406,  # Data too long
+        1452,  # Foreign key constraint fails
+    }
+
+    def classify_error(self, error):
+        errno = getattr(error, "errno", None)
+        if errno in self.RETRY_ERRNOS:
+            return "connection"
+        if errno in self.DATA_ERRNOS:
+            return "data"
+        try:
+            from mysql.connector import errors
+        except ImportError:
+            return super().classify_error(error)
+        if isinstance(error, (errors.InterfaceError, errors.OperationalError, errors.PoolError)):
+            return "connection"
+        return super().classify_error(error)
+
+
+# --- SQLITE ---
+class SQLiteBackend(AttendanceBackend):
+    CREATE_SQL = """
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            person_id INTEGER NOT NULL,
+            person_name TEXT NOT NULL,
+            attendance_date TEXT NOT NULL,
+            attendance_time TEXT NOT NULL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            UNIQUE (person_id, attendance_date)
+        )
+    """
+    INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (attendance_date, attendance_time)"
+    INSERT_SQL = """
+        INSERT INTO attendance (person_id, person_name, attendance_date, attendance_time, latitude, longitude)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (person_id, attendance_date) DO UPDATE SET person_name = excluded.person_name
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        # One connection shared by the UI and the queue worker, serialised by this lock.
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL lets report queries read while marks are being written; NORMAL sync is
+            # durable across application crashes and only risks the last commit on power loss.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    def setup(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(self.CREATE_SQL)
+                conn.execute(self.INDEX_SQL)
+
+    def mark(self, record):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO attendance (person_id, person_name, attendance_date, attendance_time, "
+                    "latitude, longitude) VALUES (?, ?, ?, ?, ?, ?)", tuple(record))
+                if cursor.rowcount == 1:
+                    return True
+                conn.execute("UPDATE attendance SET person_name = ? WHERE person_id = ? AND attendance_date = ?",
+                             (record[1], record[0], record[2]))
+                return False
+
+    def insert_many(self, records):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(self.INSERT_SQL, [tuple(r) for r in records])
+
+    def query_range(self, start_date, end_date):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT person_id, person_name, attendance_date, attendance_time, latitude, longitude "
+                "FROM attendance WHERE attendance_date BETWEEN ? AND ? "
+                "ORDER BY attendance_date, attendance_time", (str(start_date), str(end_date))).fetchall()
+
+    def classify_error(self, error):
+        # OperationalError covers a locked database, disk I/O errors and unopenable files;
+        # InterfaceError is a value sqlite3 cannot bind.
+        if isinstance(error, sqlite3.OperationalError):
+            return "connection"
+        if isinstance(error, (sqlite3.DataError, sqlite3.IntegrityError, sqlite3.InterfaceError)):
+            return "data"
+        return super().classify_error(error)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_backend(storage_config, db_config=None):
+    """Builds the backend named by storage_config['backend'] ('mysql' or 'sqlite')."""
+    kind = storage_config.get('backend', 'mysql')
+    if kind == 'sqlite':
+        return SQLiteBackend(storage_config['sqlite_path'])
+    if kind == 'mysql':
+        return MySQLBackend(db_config, pool_size=storage_config.get('pool_size', 2))
+    raise ValueError(f"Unknown attendance backend: {kind}")
@@ -0,0 +1,189 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+
+class AttendanceStatus:
+    """A status event from the queue worker, meant to be shown in the UI."""
+    def __init__(self, kind, message, pending=0, mark=None):
+        self.kind = kind          # 'queued', 'saved', 'retrying', 'failed'
+        self.message = message
+        self.pending = pending    # Marks still waiting to be written
+        self.mark = mark          # The dead-lettered mark, for 'failed'
+
+    def __repr__(self):
+        return f"AttendanceStatus({self.kind!r}, {self.message!r}, pending={self.pending})"
+
+
+class AttendanceQueue:
+    """
+    Write-behind queue for attendance marks.
+
+    enqueue() only appends the mark to memory and to a local spool file, so it is safe to
+    call from the Tk thread. A worker thread drains the queue in batches through the storage
+    backend's insert_many() (see attendance_backends.py). Anything not yet written survives a
+    restart (or the database being down) in the spool file.
+
+    How a failed batch is handled depends on backend.classify_error():
+        connection  retried with exponential backoff for as long as it takes
+        data        split in halves until the rejected mark is isolated; that mark is moved
+                    to the dead-letter file and reported with a 'failed' status
+        other       retried up to `max_retries` times, then handled like a data error
+
+    Status events are queued for the UI; call poll() from an after() callback to read them
+    without touching Tk from the worker thread.
+    """
+    def __init__(self, backend, spool_path, batch_size=50, max_backoff=60.0, max_retries=5,
+                 dead_letter_path=None, status_callback=None):
+        self.backend = backend
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path or os.path.splitext(spool_path)[0] + "_failed.jsonl"
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.status_callback = status_callback
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._status = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._backend_ready = False
+        self._load_spool()
+
+    # --- SPOOL FILE ---
+    def _load_spool(self):
+        """Picks up marks left over from a previous run."""
+        if not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        self._pending.append(tuple(json.loads(line)))
+                    except ValueError:
+                        continue  # A torn last line from a crash mid-write
+
+    def _rewrite_spool(self):
+        """Replaces the spool with what is still pending. Caller holds the lock."""
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for mark in self._pending:
+                f.write(json.dumps(mark) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    # --- PUBLIC API ---
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="AttendanceQueue", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, person_id, person_name, date, time_of_day, latitude, longitude):
+        """Records a mark and returns immediately; the database write happens in the background."""
+        mark = (int(person_id), str(person_name), date, time_of_day, float(latitude), float(longitude))
+        with self._lock:
+            self._pending.append(mark)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(mark) + "\n")
+            pending = len(self._pending)
+            self._wakeup.notify()
+        self._emit("queued", f"Attendance for {person_name} queued.", pending)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def poll(self):
+        """Returns every status event since the last call (never blocks)."""
+        events = []
+        while True:
+            try:
+                events.append(self._status.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self, timeout=5.0):
+        """Stops the worker after it has tried to flush what is pending (up to `timeout`)."""
+        deadline = time.monotonic() + timeout
+        while self.pending_count() and time.monotonic() < deadline and self._thread and self._thread.is_alive():
+            time.sleep(0.05)
+        self._stop.set()
+        with self._lock:
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    # --- WORKER ---
+    def _emit(self, kind, message, pending, mark=None):
+        status = AttendanceStatus(kind, message, pending, mark)
+        self._status.put(status)
+        if self.status_callback is not None:
+            self.status_callback(status)
+
+    def _write_batch(self, batch):
+        if not self._backend_ready:
+            self.backend.setup()  # CREATE TABLE IF NOT EXISTS; deferred to the first write
+            self._backend_ready = True
+        self.backend.insert_many(batch)
+
+    def _dead_letter(self, mark, error):
+        """Moves the mark at the head of the queue to the dead-letter file."""
+        with self._lock:
+            self._pending.popleft()
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"mark": mark, "error": str(error)}) + "\n")
+            self._rewrite_spool()
+            pending = len(self._pending)
+        self._emit("failed", f"Could not save attendance for {mark[1]} ({error}). "
+                             f"Moved to {self.dead_letter_path}.", pending, mark)
+
+    def _run(self):
+        backoff = 1.0
+        limit = self.batch_size       # Shrinks while a rejected mark is being isolated
+        attempts = 0                  # Failures of the current batch, other than connection errors
+        while not self._stop.is_set():
+            with self._lock:
+                while not self._pending and not self._stop.is_set():
+                    self._wakeup.wait()
+                if self._stop.is_set():
+                    return
+                batch = list(islice(self._pending, limit))
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                kind = self.backend.classify_error(e)
+                isolating = limit < self.batch_size
+                if kind == "connection" or (kind == "other" and attempts < self.max_retries and not isolating):
+                    attempts += kind != "connection"
+                    self._emit("retrying", f"Could not save attendance ({e}). Retrying in {backoff:.0f}s.",
+                               self.pending_count())
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                # Some mark in the batch is being rejected: bisect until it is alone, then set it aside.
+                attempts = 0
+                if len(batch) > 1:
+                    limit = len(batch) // 2
+                else:
+                    self._dead_letter(batch[0], e)
+                    limit = self.batch_size
+                continue
+
+            backoff = 1.0
+            attempts = 0
+            limit = self.batch_size
+            with self._lock:
+                for _ in batch:
+                    self._pending.popleft()
+                self._rewrite_spool()
+                pending = len(self._pending)
+            names = ", ".join(sorted({mark[1] for mark in batch}))
+            self._emit("saved", f"Attendance saved for {names}.", pending)
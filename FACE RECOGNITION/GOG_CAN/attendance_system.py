@@ -1,8 +1,9 @@
 import os
 import datetime
 from tkinter import messagebox
-from geopy.geocoders import Nominatim
-import mysql.connector
+from attendance_backends import create_backend
+from attendance_queue import AttendanceQueue
+from location_provider import LocationProvider, location_config
 
 # --- DATABASE CONFIGURATION ---
 # !!! IMPORTANT !!!
@@ -16,6 +17,7 @@ db_config = {
 
 def get_db_connection():
     """Establishes a connection to the MySQL database."""
+    import mysql.connector  # Only needed when MySQL is actually used
     try:
         conn = mysql.connector.connect(**db_config)
         return conn
@@ -23,90 +25,89 @@ def get_db_connection():
         messagebox.showerror("Database Error", f"Failed to connect to MySQL: {err}")
         return None
 
-def setup_database():
-    """Connects to the database and creates the attendance table if it doesn't exist."""
-    conn = get_db_connection()
-    if conn is None:
-        return
+# --- STORAGE BACKEND ---
+# 'mysql' uses db_config above; 'sqlite' keeps attendance in a local WAL-mode file instead,
+# for kiosks without a database server. Both enforce one mark per person per day.
+storage_config = {
+    'backend': 'mysql',
+    'sqlite_path': "./TrainingData/attendance.db",
+    'pool_size': 2,
+}
+_backend = None
 
+def get_backend():
+    """Returns the configured attendance backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(storage_config, db_config)
+    return _backend
+
+def setup_database():
+    """Creates the attendance table and its indexes in the configured backend if they don't exist."""
     try:
-        cursor = conn.cursor()
-        # This SQL command creates the 'attendance' table with the required columns.
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                person_id INT NOT NULL,
-                person_name VARCHAR(255) NOT NULL,
-                attendance_date DATE NOT NULL,
-                attendance_time TIME NOT NULL,
-                latitude DECIMAL(10, 8) NOT NULL,
-                longitude DECIMAL(11, 8) NOT NULL,
-                UNIQUE KEY unique_attendance (person_id, attendance_date)
-            )
-        """)
-        conn.commit()
-    except mysql.connector.Error as err:
+        get_backend().setup()
+    except Exception as err:
         messagebox.showerror("Database Setup Error", f"Failed to create table: {err}")
-    finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
 
 
+# --- Location ---
+# Resolved once in the background (or taken from location_config['static']) and cached on
+# disk, so marking attendance never waits on a geocoding round-trip. Nothing is read or
+# fetched at import time; the app calls start_location() once its window is up.
+location_provider = LocationProvider(**location_config)
+
+def start_location():
+    """Loads the cached location and refreshes it in the background if stale (only the first call does anything)."""
+    location_provider.start()
+
 def get_location():
     """Gets the current GPS location."""
-    try:
-        geolocator = Nominatim(user_agent="face_recognition_app")
-        location = geolocator.geocode("India")
-        if location:
-            return location.latitude, location.longitude
-        else:
-            return 20.5937, 78.9629  # Fallback coordinates
-    except Exception as e:
-        print(f"Could not get location: {e}")
-        return 20.5937, 78.9629
+    start_location()
+    return location_provider.current()
 
-def mark_attendance(person_id, person_name):
-    """Marks attendance for the given person in the MySQL database."""
-    conn = get_db_connection()
-    if conn is None:
-        return
+# --- Write-behind attendance queue ---
+# Marks are written to the backend by a background worker (see attendance_queue.py) so the Tk thread
+# never waits on a connection. Pending marks are spooled to this file until they are saved.
+spool_path = "./TrainingData/attendance_spool.jsonl"
+_attendance_queue = None
+_marked_today = set()
+
+def get_attendance_queue():
+    """Returns the shared attendance queue, starting its worker on first use."""
+    global _attendance_queue
+    if _attendance_queue is None:
+        os.makedirs(os.path.dirname(spool_path), exist_ok=True)
+        _attendance_queue = AttendanceQueue(get_backend(), spool_path, status_callback=_forget_failed_mark).start()
+    return _attendance_queue
+
+def _forget_failed_mark(status):
+    """Runs on the queue worker: a dead-lettered mark was never stored, so the person may mark again."""
+    if status.kind == "failed" and status.mark is not None:
+        _marked_today.discard((status.mark[0], status.mark[2]))
+
+def poll_status():
+    """Status events (queued / saved / retrying / failed) since the last call; safe to call from after()."""
+    if _attendance_queue is None:
+        return []
+    return _attendance_queue.poll()
 
+def mark_attendance(person_id, person_name):
+    """Queues an attendance mark for the given person; the database write happens in the background."""
     lat, lon = get_location()
     now = datetime.datetime.now()
     date = now.strftime("%Y-%m-%d")
     time = now.strftime("%H:%M:%S")
 
-    try:
-        cursor = conn.cursor()
-        
-        # SQL query to insert a new attendance record.
-        # The ON DUPLICATE KEY UPDATE part handles cases where attendance for the
-        # same person on the same day already exists, preventing duplicates.
-        sql = """
-            INSERT INTO attendance (person_id, person_name, attendance_date, attendance_time, latitude, longitude)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE person_name = VALUES(person_name);
-        """
-        val = (person_id, person_name, date, time, lat, lon)
-        
-        cursor.execute(sql, val)
-        conn.commit()
-        
-        # Check if a new row was inserted or an existing one was updated.
-        if cursor.rowcount > 0:
-             messagebox.showinfo("Attendance Marked", f"Attendance for {person_name} has been marked successfully at\nLat: {lat}, Lon: {lon}")
-        else:
-             messagebox.showinfo("Attendance Info", f"Attendance for {person_name} has already been marked today.")
+    # The table is unique on (person_id, attendance_date); skip marks we already queued today.
+    # Marks the database rejects are removed again by _forget_failed_mark().
+    key = (int(person_id), date)
+    if key in _marked_today:
+        return False
+    _marked_today.add(key)
+    get_attendance_queue().enqueue(person_id, person_name, date, time, lat, lon)
+    return True
 
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Failed to record attendance: {err}")
-    finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
-
-# --- Initial Database Setup ---
-# This function will be called once when the application starts
-# to ensure the database table is ready.
-setup_database()
+# --- Database Setup ---
+# Nothing connects at import time: the queue worker creates the table before its first write
+# (a database that is down shows up as a retry status, not a blocking dialog at startup).
+# setup_database() is still available to prepare the table explicitly.
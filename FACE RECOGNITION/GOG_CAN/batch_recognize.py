@@ -0,0 +1,252 @@
+"""
+Headless face recognition over recorded video files and photo folders.
+
+    python batch_recognize.py footage.mp4 --output results.jsonl
+    python batch_recognize.py recordings/ photos/ --output results.csv --workers 8 --frame-step 2
+
+Uses the same trained model (trainer.yml, memory-mapped through trainer.lbph), Haar cascade
+and person_details.csv as the recognition window, without Tk or a camera. Videos are split
+into frame ranges and photo folders into chunks; each worker process decodes, detects and
+recognises its own share, so decoding is parallel too. One output row is written per detected
+face (in input order) with the source, frame number, timestamp, box, ID, name and distance.
+Throughput is reported at the end.
+
+Timestamps are seconds from the start of the video, or the file modification time (Unix
+seconds) for still images. `recognized` uses the same `distance < 75` rule as the app.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from frame_sources import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+from lbph_engine import LBPHEngine
+from person_directory import PersonDirectory
+from training_loader import decode_grayscale
+
+# --- BATCH CONFIGURATION ---
+batch_config = {
+    'model_path': "./TrainingData/trainer.yml",
+    'cascade_path': "haarcascade_frontalface_default.xml",
+    'persondetail_path': "./TrainingData/person_details.csv",
+    'threshold': 75,          # Distances below this count as recognised, as in face_recog.py
+    'chunk_frames': 240,      # Video frames per work unit
+    'chunk_images': 64,       # Still images per work unit
+    'scale_factor': 1.3,      # detectMultiScale parameters, same as the recognition window
+    'min_neighbors': 5,
+}
+
+OUTPUT_FIELDS = ["source", "frame", "timestamp", "x", "y", "w", "h", "person_id", "name", "confidence", "recognized"]
+
+
+# --- INPUTS ---
+def collect_inputs(paths):
+    """(kind, path) for every video file and still image in `paths` (directories are walked)."""
+    inputs = []
+
+    def classify(path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in VIDEO_EXTENSIONS:
+            inputs.append(("video", path))
+        elif ext in IMAGE_EXTENSIONS:
+            inputs.append(("image", path))
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    classify(os.path.join(dir_path, file_name))
+        else:
+            classify(path)
+    return inputs
+
+
+def plan_work(inputs, chunk_frames, chunk_images):
+    """
+    Splits the inputs into work units: ("video", path, first_frame, end_frame, fps) ranges and
+    ("images", [paths]) chunks. Also returns the total duration of the videos in seconds.
+    """
+    units, images, video_seconds = [], [], 0.0
+    for kind, path in inputs:
+        if kind == "image":
+            images.append(path)
+            continue
+        cap = cv2.VideoCapture(path)
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        cap.release()
+        if frames <= 0:
+            print(f"Skipping {path}: could not read the frame count", file=sys.stderr)
+            continue
+        video_seconds += frames / fps
+        for start in range(0, frames, chunk_frames):
+            units.append(("video", path, start, min(start + chunk_frames, frames), fps))
+    for start in range(0, len(images), chunk_images):
+        units.append(("images", images[start:start + chunk_images]))
+    return units, video_seconds
+
+
+# --- WORKERS ---
+_worker = {}
+
+
+def _init_worker(model_path, cascade_path, scale_factor, min_neighbors, frame_step):
+    # One OpenCV thread per process; the parallelism comes from the pool.
+    cv2.setNumThreads(1)
+    _worker['engine'] = LBPHEngine.from_model_path(model_path)  # Memory-mapped, shared by the OS page cache
+    _worker['cascade'] = cv2.CascadeClassifier(cascade_path)
+    _worker['detect'] = (scale_factor, min_neighbors)
+    _worker['frame_step'] = frame_step
+
+
+def recognize_faces(cascade, engine, gray, scale_factor=1.3, min_neighbors=5):
+    """[(box, person_id, distance)] for every face the cascade finds in a gray frame."""
+    faces = cascade.detectMultiScale(gray, scale_factor, min_neighbors)
+    boxes = [tuple(int(v) for v in box) for box in faces]
+    crops = [gray[y:y+h, x:x+w] for x, y, w, h in boxes]
+    results = []
+    for box, matches in zip(boxes, engine.predict_batch(crops)):
+        person_id, distance = matches[0] if matches else (-1, float("inf"))
+        results.append((box, person_id, distance))
+    return results
+
+
+def _recognize(gray):
+    return recognize_faces(_worker['cascade'], _worker['engine'], gray, *_worker['detect'])
+
+
+def _process_unit(unit):
+    """Returns (frames processed, [(source, frame, timestamp, box, person_id, distance), ...])."""
+    rows, frames = [], 0
+    if unit[0] == "video":
+        _, path, start, end, fps = unit
+        step = _worker['frame_step']
+        cap = cv2.VideoCapture(path)
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for index in range(start, end):
+            if index % step:
+                if not cap.grab():
+                    break
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames += 1
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            for box, person_id, distance in _recognize(gray):
+                rows.append((path, index, round(index / fps, 3), box, person_id, distance))
+        cap.release()
+    else:
+        for path in unit[1]:
+            gray = decode_grayscale(path)
+            if gray is None:
+                continue
+            frames += 1
+            timestamp = os.path.getmtime(path)
+            for box, person_id, distance in _recognize(gray):
+                rows.append((path, 0, timestamp, box, person_id, distance))
+    return frames, rows
+
+
+# --- OUTPUT ---
+class ResultWriter:
+    """Writes one record per detection as JSON lines or CSV, chosen by `fmt`."""
+    def __init__(self, path, fmt):
+        self._file = open(path, "w", newline="", encoding="utf-8") if path != "-" else sys.stdout
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="video files, images, or directories of either")
+    parser.add_argument("--output", "-o", default="-", help="results file (.jsonl or .csv); '-' for stdout")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="defaults to the output file's extension")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--frame-step", type=int, default=1, help="process every Nth video frame")
+    parser.add_argument("--model", default=batch_config['model_path'])
+    parser.add_argument("--cascade", default=batch_config['cascade_path'])
+    parser.add_argument("--people", default=batch_config['persondetail_path'])
+    parser.add_argument("--threshold", type=float, default=batch_config['threshold'])
+    args = parser.parse_args(argv)
+
+    for path, what in ((args.model, "Model"), (args.cascade, "Haar cascade")):
+        if not os.path.exists(path):
+            print(f"{what} not found: {path}", file=sys.stderr)
+            return 2
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+
+    inputs = collect_inputs(args.inputs)
+    units, video_seconds = plan_work(inputs, batch_config['chunk_frames'], batch_config['chunk_images'])
+    if not units:
+        print("No videos or images found.", file=sys.stderr)
+        return 1
+
+    # Build trainer.lbph up front so the workers only ever open it read-only.
+    LBPHEngine.from_model_path(args.model)
+    people = PersonDirectory(args.people)
+    init_args = (args.model, args.cascade, batch_config['scale_factor'], batch_config['min_neighbors'],
+                 max(1, args.frame_step))
+
+    writer = ResultWriter(args.output, fmt)
+    frames = detections = recognized = 0
+    pool = None
+    start = time.perf_counter()
+    try:
+        if args.workers <= 1:
+            _init_worker(*init_args)
+            results = map(_process_unit, units)
+        else:
+            pool = ProcessPoolExecutor(max_workers=min(args.workers, len(units)), initializer=_init_worker,
+                                       initargs=init_args)
+            results = pool.map(_process_unit, units)
+        for unit_frames, rows in results:
+            frames += unit_frames
+            for source, frame_index, timestamp, (x, y, w, h), person_id, distance in rows:
+                known = distance < args.threshold
+                person = people.get(person_id) if known and person_id >= 0 else None
+                writer.write({
+                    "source": source, "frame": frame_index, "timestamp": timestamp,
+                    "x": x, "y": y, "w": w, "h": h,
+                    "person_id": int(person_id) if known else None,
+                    "name": person.name if person is not None else None,
+                    "confidence": round(float(distance), 3) if distance != float("inf") else None,
+                    "recognized": known,
+                })
+                detections += 1
+                recognized += known
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    summary = (f"{frames} frames, {detections} faces ({recognized} recognised) in {elapsed:.2f} s: "
+               f"{frames / elapsed:.1f} frames/s")
+    if video_seconds:
+        summary += f", {video_seconds / elapsed:.1f}x real time over {video_seconds:.1f} s of video"
+    print(summary, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Attendance write throughput: one committed insert per mark vs. batched insert_many(), which is
+what the write-behind queue uses. Both modes run the same insert_many() statement, so the
+difference is only the batching (one transaction and round trip per row vs. per batch).
+
+    python benchmark_attendance_backend.py --rows 5000 --batch 50
+    python benchmark_attendance_backend.py --backend mysql     # uses db_config from attendance_system.py
+
+The SQLite runs use a throwaway database file; the MySQL run writes dates far in the future
+and deletes them again afterwards.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from attendance_backends import MySQLBackend, SQLiteBackend
+
+
+def make_records(rows, start_year):
+    """Synthetic marks: `rows` distinct (person_id, date) pairs spread over 50 people."""
+    records = []
+    for i in range(rows):
+        person_id = i % 50 + 1
+        day = i // 50
+        date = f"{start_year + day // 336:04d}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}"
+        records.append((person_id, f"Person {person_id}", date, "09:00:00", 20.5937, 78.9629))
+    return records
+
+
+def years_spanned(rows):
+    return rows // 50 // 336 + 1
+
+
+def run(backend, records, batched_records, batch):
+    """Both modes insert fresh rows: `batched_records` must not share a (person, date) with `records`."""
+    backend.setup()
+    t0 = time.perf_counter()
+    for record in records:
+        backend.insert_many([record])
+    per_row = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, len(batched_records), batch):
+        backend.insert_many(batched_records[i:i + batch])
+    batched = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    found = backend.query_range(records[0][2], batched_records[-1][2])
+    query = time.perf_counter() - t0
+    return per_row, batched, query, len(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=50, help="rows per insert_many() call")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.backend == "sqlite":
+        tmp_dir = tempfile.mkdtemp(prefix="attendance_bench_")
+        backend = SQLiteBackend(os.path.join(tmp_dir, "attendance.db"))
+        start_year = 2000
+    else:
+        from attendance_system import db_config
+        backend = MySQLBackend(db_config)
+        start_year = 9000
+    # Later dates for the batched run, so it times new inserts too rather than the upsert path.
+    records = make_records(args.rows, start_year)
+    batched_records = make_records(args.rows, start_year + years_spanned(args.rows))
+
+    try:
+        per_row, batched, query, found = run(backend, records, batched_records, args.batch)
+    finally:
+        if args.backend == "mysql":
+            backend._execute("DELETE FROM attendance WHERE attendance_date >= '9000-01-01'")
+        backend.close()
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"backend={args.backend}  rows={args.rows}  batch={args.batch}")
+    print(f"{'per-row':>18}: {per_row:8.3f} s  {args.rows / per_row:10.0f} rows/s")
+    print(f"{'batched':>18}: {batched:8.3f} s  {args.rows / batched:10.0f} rows/s"
+          f"  ({per_row / batched:.1f}x)")
+    print(f"{'query_range()':>18}: {query * 1000:8.2f} ms for {found} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Frame transport between processes: shared-memory slots vs. pickling through a queue.
+
+    python benchmark_frame_transport.py
+    python benchmark_frame_transport.py --frames 500 --slots 4 --sizes 1920x1080x3
+
+A producer process pushes frames as fast as the slots allow (waiting, not dropping, when
+they are all taken) to a consumer that reads every frame and frees its slot. Reported per
+transport and frame size: frames/s, latency from commit to the consumer holding the frame
+(p50 / p95 / max), and what commit() actually puts on the queue for one frame, pickled with
+protocol 5 so pixel buffers show up separately from the rest:
+
+    queued bytes   pickled size of the queued item without its pixel buffers
+    pixel bufs     array buffers the item carries (0 when only a descriptor is queued)
+    pixel MB       their size; multiprocessing.Queue pickles them in-band, so each one is
+                   copied into the pickle, through the pipe and into a new array on the far side
+"""
+import argparse
+import multiprocessing as mp
+import pickle
+import time
+
+import numpy as np
+
+from frame_transport import TRANSPORTS, create_transport
+
+
+def _producer(transport, shape, frames):
+    source = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    for i in range(frames):
+        frame = transport.reserve("cam", shape)
+        while frame is None:
+            time.sleep(0)
+            frame = transport.reserve("cam", shape)
+        frame[...] = source            # Stands in for the capture thread's cvtColor(dst=frame)
+        frame.flat[0] = i % 256
+        transport.commit(frame, time.monotonic())
+
+
+class _RecordingQueue:
+    """Stands in for a transport's queue and keeps what commit() puts on it."""
+    def __init__(self):
+        self.items = []
+
+    def put(self, item):
+        self.items.append(item)
+
+
+def queued_payload(kind, shape):
+    """(pickled bytes without pixel buffers, pixel buffers, pixel bytes) of one committed frame."""
+    transport = create_transport(kind, mp.get_context("spawn"), ["cam"], 1, int(np.prod(shape)))
+    recorder = transport._queue = _RecordingQueue()
+    try:
+        frame = transport.reserve("cam", shape)
+        frame[...] = 0
+        transport.commit(frame, time.monotonic())
+        del frame
+        buffers = []
+        data = pickle.dumps(recorder.items[0], protocol=5, buffer_callback=buffers.append)
+        return len(data), len(buffers), sum(buffer.raw().nbytes for buffer in buffers)
+    finally:
+        recorder.items.clear()  # Drop the slot views before the shared memory is freed
+        transport.close()
+
+
+def run(kind, shape, frames, slots):
+    ctx = mp.get_context("spawn")
+    transport = create_transport(kind, ctx, ["cam"], slots, int(np.prod(shape)))
+    producer = ctx.Process(target=_producer, args=(transport, shape, frames), daemon=True)
+    producer.start()
+    latencies = []
+    checksum = 0
+    first = transport.receive(timeout=30)   # Excludes process start-up from the timing
+    transport.done(first)
+    start = time.perf_counter()
+    for _ in range(frames - 1):
+        item = transport.receive(timeout=30)
+        latencies.append(time.monotonic() - item[0].meta)
+        checksum += int(item[1].flat[0])     # The consumer touches the pixels it was given
+        transport.done(item)
+    elapsed = time.perf_counter() - start
+    producer.join(timeout=10)
+    transport.close()
+    latencies = np.array(latencies) * 1000
+    return {
+        "fps": (frames - 1) / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "max": float(latencies.max()),
+    }
+
+
+def parse_size(text):
+    parts = [int(v) for v in text.lower().split("x")]
+    width, height = parts[:2]
+    return (height, width) + tuple(parts[2:3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=2, help="frames in flight (slots per camera)")
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1280x720x3", "1920x1080x3"],
+                        help="WIDTHxHEIGHT[xCHANNELS]")
+    args = parser.parse_args()
+
+    print(f"{args.frames} frames, {args.slots} slots")
+    print(f"{'size':>12} {'transport':>9} {'frames/s':>9} {'MB/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7}"
+          f" {'queued bytes':>13} {'pixel bufs':>10} {'pixel MB':>8}")
+    for text in args.sizes:
+        shape = parse_size(text)
+        frame_mb = np.prod(shape) / 1e6
+        for kind in TRANSPORTS:
+            row = run(kind, shape, args.frames, args.slots)
+            queued, buffers, pixel_bytes = queued_payload(kind, shape)
+            print(f"{text:>12} {kind:>9} {row['fps']:>9.0f} {row['fps'] * frame_mb:>8.0f} {row['p50']:>7.2f}"
+                  f" {row['p95']:>7.2f} {row['max']:>7.2f} {queued:>13} {buffers:>10} {pixel_bytes / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-face predict latency against gallery size, exhaustive LBPH scan vs. the ANN gallery index,
+plus the top-1 recall the index gives up relative to the exhaustive search.
+
+    python benchmark_gallery_index.py --sizes 100,1000,10000 --samples 2 --grid 4
+
+Galleries are synthetic: every identity gets a random sparse prototype histogram and each
+training/query sample is a noisy copy of it, normalised per cell like real LBPH histograms.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gallery_index import GalleryIndex
+from lbph_engine import LBPHEngine
+from model_store import LBPHModel
+
+
+def synthetic_histograms(prototypes, rng, noise):
+    """Noisy samples of the given (n, cells, patterns) prototypes, each cell summing to 1."""
+    samples = prototypes + noise * rng.gamma(0.2, 1.0, prototypes.shape).astype(np.float32)
+    samples /= samples.sum(axis=2, keepdims=True)
+    return samples.reshape(len(prototypes), -1).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated identity counts")
+    parser.add_argument("--samples", type=int, default=2, help="training histograms per identity")
+    parser.add_argument("--grid", type=int, default=4, help="LBPH grid_x = grid_y (8 matches the app)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.6, help="sample noise relative to the prototype")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--shortlist", type=int, default=32)
+    args = parser.parse_args()
+
+    cells, patterns = args.grid * args.grid, 256
+    print(f"bins={cells * patterns}  samples/identity={args.samples}  queries={args.queries}"
+          f"  nprobe={args.nprobe}  shortlist={args.shortlist}")
+    print(f"{'identities':>10} {'rows':>8} {'build s':>8} {'exhaustive ms':>14} {'indexed ms':>11} {'speed-up':>9} {'recall@1':>9}")
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rng = np.random.default_rng(size)
+        prototypes = rng.gamma(0.2, 1.0, (size, cells, patterns)).astype(np.float32)
+        gallery = np.vstack([synthetic_histograms(prototypes, rng, args.noise) for _ in range(args.samples)])
+        labels = np.tile(np.arange(size, dtype=np.int32), args.samples)
+        engine = LBPHEngine(LBPHModel(gallery, labels, grid_x=args.grid, grid_y=args.grid))
+
+        t0 = time.perf_counter()
+        index = GalleryIndex.build(gallery, labels)
+        build = time.perf_counter() - t0
+
+        truth = rng.integers(0, size, args.queries)
+        queries = synthetic_histograms(prototypes[truth], rng, args.noise)
+
+        t0 = time.perf_counter()
+        exhaustive = [engine.rank(engine.distances(q), 1)[0] for q in queries]
+        exhaustive_ms = (time.perf_counter() - t0) / args.queries * 1000
+
+        t0 = time.perf_counter()
+        indexed = index.search(engine, queries, 1, args.nprobe, args.shortlist)
+        indexed_ms = (time.perf_counter() - t0) / args.queries * 1000
+
+        agree = sum(1 for a, b in zip(exhaustive, indexed) if a and b and a[0][0] == b[0][0])
+        print(f"{size:>10} {len(labels):>8} {build:>8.2f} {exhaustive_ms:>14.2f} {indexed_ms:>11.2f}"
+              f" {exhaustive_ms / indexed_ms:>8.1f}x {agree / args.queries:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
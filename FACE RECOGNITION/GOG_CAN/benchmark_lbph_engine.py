@@ -0,0 +1,62 @@
+"""
+Per-frame predict latency, NumPy LBPHEngine vs. the cv2 LBPH recognizer it replaces.
+
+    python benchmark_lbph_engine.py
+    python benchmark_lbph_engine.py --scales 1,10 --faces 1,3 --tolerance 1.0
+
+The gallery is the bundled TrainingData/Images, repeated `scale` times to stand in for larger
+galleries. Each row times one frame with `faces` faces: one predict_batch() call for the
+engine, one recognizer.predict() per face for cv2. Both get the same crops.
+
+Exits with status 1 when the engine is slower than cv2 (times `tolerance`) in any row, so it
+can gate changes to lbph_engine. Galleries big enough for the ANN index are not covered here;
+see benchmark_gallery_index.py.
+"""
+import argparse
+import sys
+
+import cv2
+import numpy as np
+
+from benchmark_suite import timed
+from lbph_engine import LBPHEngine
+from model_store import LBPHModel
+from training_loader import load_training_data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="./TrainingData/Images")
+    parser.add_argument("--scales", default="1,10", help="comma-separated gallery repeats")
+    parser.add_argument("--faces", default="1,3", help="comma-separated faces per frame")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="fail when engine ms > cv2 ms * tolerance")
+    args = parser.parse_args(argv)
+
+    data = load_training_data(args.images)
+    if not len(data):
+        raise SystemExit(f"No training images under {args.images}")
+    rng = np.random.default_rng(0)
+
+    print(f"{'samples':>8} {'faces':>6} {'cv2 ms':>8} {'engine ms':>10} {'ratio':>6}")
+    failures = 0
+    for scale in [int(n) for n in args.scales.split(",")]:
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(list(data.faces) * scale, np.tile(data.labels, scale))
+        engine = LBPHEngine(LBPHModel.from_recognizer(recognizer))
+        for count in [int(n) for n in args.faces.split(",")]:
+            crops = [data.faces[i] for i in rng.choice(len(data), count, replace=False)]
+            engine.predict_batch(crops)  # First call builds the engine's lazy caches
+            cv2_ms = timed(lambda: [recognizer.predict(crop) for crop in crops], args.repeat)
+            engine_ms = timed(lambda: engine.predict_batch(crops), args.repeat)
+            slower = engine_ms > cv2_ms * args.tolerance
+            failures += slower
+            print(f"{len(engine):>8} {count:>6} {cv2_ms:>8.1f} {engine_ms:>10.1f} {engine_ms / cv2_ms:>6.2f}"
+                  f"{'  SLOWER THAN CV2' if slower else ''}")
+        del recognizer, engine
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
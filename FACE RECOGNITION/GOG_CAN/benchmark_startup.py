@@ -0,0 +1,112 @@
+"""
+Cold-start cost of the main application, meant to be tracked across releases:
+
+  1. an `python -X importtime` breakdown of `import face_recog` (the slowest modules by
+     cumulative import time, plus the total), and
+  2. time-to-first-paint: process start until the main window has been mapped and drawn,
+     and until the background preloader (cascade + model) has finished.
+
+    python benchmark_startup.py --runs 5 --top 15
+    python benchmark_startup.py --json startup.json
+
+Each measurement runs in a fresh interpreter so nothing is already imported. Step 2 needs a
+display; without one only the import breakdown is reported. Run it from the folder the app
+is normally started from so TrainingData/ resolves the same way.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PAINT_PROBE = r"""
+import time
+t0 = time.perf_counter()
+import sys, json
+sys.path.insert(0, {here!r})
+import tkinter as tk
+import face_recog
+imported = time.perf_counter() - t0
+
+root = tk.Tk()
+if sys.platform != "win32":
+    root.state = lambda *args: None  # state('zoomed') only exists on Windows
+app = face_recog.PersonalIdentifierApp(root)
+root.wait_visibility()
+root.update()
+painted = time.perf_counter() - t0
+while not app.preloader.finished:
+    root.update()
+    time.sleep(0.005)
+preloaded = time.perf_counter() - t0
+root.destroy()
+print(json.dumps({{"import": imported, "first_paint": painted, "preloaded": preloaded}}))
+"""
+
+
+def import_breakdown(module):
+    """(total_us, [(cumulative_us, self_us, name), ...]) from -X importtime for `import module`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=os.getcwd(), env=dict(os.environ, PYTHONPATH=HERE),
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    total = sum(self_us for _, self_us, _ in rows)
+    return total, rows
+
+
+def first_paint():
+    proc = subprocess.run([sys.executable, "-c", PAINT_PROBE.format(here=HERE)],
+                          cwd=os.getcwd(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="face_recog")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    totals, last_rows = [], []
+    for _ in range(args.runs):
+        total, last_rows = import_breakdown(args.module)
+        totals.append(total)
+    summary = {"module": args.module, "runs": args.runs, "import_ms": statistics.median(totals) / 1000}
+
+    print(f"import {args.module}: median {summary['import_ms']:.1f} ms over {args.runs} runs")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module (last run)")
+    for cumulative_us, self_us, name in sorted(last_rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+    summary["slowest"] = [{"module": name.strip(), "cumulative_ms": c / 1000}
+                          for c, _, name in sorted(last_rows, reverse=True)[:args.top]]
+
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        paints = [first_paint() for _ in range(args.runs)]
+        for key in ("import", "first_paint", "preloaded"):
+            summary[f"{key}_s"] = statistics.median(p[key] for p in paints)
+        print(f"time to first paint: {summary['first_paint_s'] * 1000:.0f} ms"
+              f"  (imports {summary['import_s'] * 1000:.0f} ms,"
+              f" preload done {summary['preloaded_s'] * 1000:.0f} ms)")
+    else:
+        print("No display available; skipping time-to-first-paint.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
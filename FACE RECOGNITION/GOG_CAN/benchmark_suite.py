@@ -0,0 +1,268 @@
+"""
+End-to-end performance suite for the capture/train/recognise pipeline, headless.
+
+    python benchmark_suite.py run --output bench.json
+    python benchmark_suite.py run --output quick.json --sizes 100,1000 --repeat 3
+    python benchmark_suite.py compare baseline.json bench.json --threshold 0.15
+
+`run` measures, on the bundled TrainingData/Images and Haar cascade:
+    training.load            decode the training images (training_loader, process pool)
+    training.train           recognizer.train on them
+    model.save_yaml / save_lbph / load_yaml / load_lbph
+    detect.<W>x<H>           detectMultiScale per frame (synthetic frames made of bundled faces)
+    predict.bundled_cv2 / predict.bundled_engine
+                             one face against the trained model
+and on synthetic galleries of 100, 1k and 10k identities:
+    predict.<N>.exhaustive / predict.<N>.indexed
+                             one face, full LBPH scan vs. with the ANN gallery index
+                             attached (small galleries still scan, as in the app)
+    model.save_lbph.<N> / model.load_lbph.<N>
+    lookup.<N>               1000 PersonDirectory.get calls on an N-row person details CSV
+    lookup.reload.<N>        re-reading that CSV
+
+Every metric is a time in milliseconds (lower is better), the median over --repeat runs.
+Results go to a JSON file together with the machine and library versions.
+
+`compare` lines two result files up and flags every metric that got slower by more than
+--threshold (relative) and --min-delta-ms (absolute). It exits with status 1 when anything
+regressed, so it can gate a CI job.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmark_gallery_index import synthetic_histograms
+from frame_sources import SyntheticSource
+from gallery_index import GalleryIndex
+from lbph_engine import LBPHEngine
+from model_store import LBPHModel
+from person_directory import PersonDirectory
+from training_loader import load_training_data
+
+RESULTS_VERSION = 1
+
+# --- SUITE CONFIGURATION ---
+suite_config = {
+    'image_root': "./TrainingData/Images",
+    'cascade_path': "haarcascade_frontalface_default.xml",
+    'frame_sizes': [(320, 240), (640, 480), (1280, 720)],
+    'gallery_sizes': [100, 1000, 10000],
+    'gallery_samples': 2,     # Histograms per synthetic identity
+    'gallery_grid': 4,        # LBPH grid of the synthetic galleries (the app uses 8; 4 keeps 10k in RAM)
+    'repeat': 5,
+    'threshold': 0.10,        # compare: relative slow-down that counts as a regression
+    'min_delta_ms': 0.05,     # compare: ignore differences smaller than this
+}
+
+
+def timed(fn, repeat, inner=1):
+    """Median milliseconds per call of fn() over `repeat` rounds of `inner` calls."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        samples.append((time.perf_counter() - t0) / inner * 1000)
+    return statistics.median(samples)
+
+
+class Suite:
+    """Runs the benchmarks in order and collects {metric: milliseconds}."""
+    def __init__(self, workdir, **settings):
+        self.settings = dict(suite_config, **settings)
+        self.workdir = workdir
+        self.results = {}
+
+    def record(self, name, value):
+        self.results[name] = float(f"{value:.5g}")
+        print(f"  {name:<32} {value:>12.3f} ms", flush=True)
+
+    def run(self):
+        s = self.settings
+        faces = self.bundled(s['image_root'], s['repeat'])
+        self.detection(s['cascade_path'], faces, s['frame_sizes'], s['repeat'])
+        for size in s['gallery_sizes']:
+            self.gallery(size, faces, s['gallery_samples'], s['gallery_grid'], s['repeat'])
+            self.lookup(size, s['repeat'])
+        return self.results
+
+    def bundled(self, image_root, repeat):
+        """Load, train, save and load the model for the bundled images; returns the face crops."""
+        data = load_training_data(image_root)
+        if not len(data):
+            raise SystemExit(f"No training images under {image_root}")
+        print(f"bundled gallery: {len(data)} images, {len(set(data.labels.tolist()))} identities")
+        self.record("training.load", timed(lambda: load_training_data(image_root), repeat))
+
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        self.record("training.train", timed(lambda: recognizer.train(data.faces, data.labels), repeat))
+
+        yaml_path = os.path.join(self.workdir, "trainer.yml")
+        lbph_path = os.path.join(self.workdir, "trainer.lbph")
+        model = LBPHModel.from_recognizer(recognizer)
+        self.record("model.save_yaml", timed(lambda: recognizer.save(yaml_path), repeat))
+        self.record("model.save_lbph", timed(lambda: model.save(lbph_path), repeat))
+        self.record("model.load_yaml", timed(lambda: cv2.face.LBPHFaceRecognizer_create().read(yaml_path), repeat))
+        self.record("model.load_lbph", timed(lambda: LBPHEngine(LBPHModel.load(lbph_path)), repeat))
+
+        face = data.faces[len(data) // 2]
+        engine = LBPHEngine(LBPHModel.load(lbph_path))
+        self.record("predict.bundled_cv2", timed(lambda: recognizer.predict(face), repeat, 20))
+        self.record("predict.bundled_engine", timed(lambda: engine.predict(face), repeat, 20))
+        return data.faces
+
+    def detection(self, cascade_path, faces, frame_sizes, repeat):
+        cascade = cv2.CascadeClassifier(cascade_path)
+        if cascade.empty():
+            raise SystemExit(f"Could not load the Haar cascade from {cascade_path}")
+        for width, height in frame_sizes:
+            source = SyntheticSource(width, height, fps=None, seed=0, faces=faces[::max(1, len(faces) // 8)])
+            frames = [cv2.cvtColor(source.read()[1], cv2.COLOR_BGR2GRAY) for _ in range(8)]
+            frame_iter = itertools.cycle(frames)
+            self.record(f"detect.{width}x{height}",
+                        timed(lambda: cascade.detectMultiScale(next(frame_iter), 1.3, 5), repeat, len(frames)))
+
+    def gallery(self, size, faces, samples, grid, repeat):
+        rng = np.random.default_rng(size)
+        prototypes = rng.gamma(0.2, 1.0, (size, grid * grid, 256)).astype(np.float32)
+        histograms = np.vstack([synthetic_histograms(prototypes, rng, 0.6) for _ in range(samples)])
+        labels = np.tile(np.arange(size, dtype=np.int32), samples)
+        del prototypes
+
+        path = os.path.join(self.workdir, f"gallery_{size}.lbph")
+        model = LBPHModel(histograms, labels, grid_x=grid, grid_y=grid)
+        self.record(f"model.save_lbph.{size}", timed(lambda: model.save(path), repeat))
+        self.record(f"model.load_lbph.{size}", timed(lambda: LBPHEngine(LBPHModel.load(path)), repeat))
+
+        engine = LBPHEngine(LBPHModel.load(path))
+        face = faces[0]
+        inner = max(1, 2000 // size)
+        self.record(f"predict.{size}.exhaustive", timed(lambda: engine.predict(face), repeat, inner))
+        engine.index = GalleryIndex.build(engine.gallery, engine.labels)
+        self.record(f"predict.{size}.indexed", timed(lambda: engine.predict(face), repeat, inner))
+        del engine, model, histograms
+
+    def lookup(self, size, repeat):
+        path = os.path.join(self.workdir, f"people_{size}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("ID,Name,Roll,Department\n")
+            for person_id in range(1, size + 1):
+                f.write(f"{person_id},PERSON {person_id},{1000 + person_id},DEPT {person_id % 7}\n")
+        directory = PersonDirectory(path)
+        ids = [(i * 7919) % size + 1 for i in range(1000)]
+
+        def lookups():
+            for person_id in ids:
+                directory.get(person_id)
+
+        self.record(f"lookup.{size}", timed(lookups, repeat))
+        self.record(f"lookup.reload.{size}", timed(directory.reload, repeat))
+
+
+# --- RESULT FILES ---
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def write_results(path, results, settings):
+    document = {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "settings": {k: settings[k] for k in ("gallery_sizes", "gallery_samples", "gallery_grid", "repeat")},
+        "unit": "ms",
+        "results": results,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("version") != RESULTS_VERSION:
+        raise SystemExit(f"{path}: unsupported results version {document.get('version')}")
+    return document
+
+
+def compare(baseline, current, threshold, min_delta_ms):
+    """[(metric, old ms, new ms, relative change, regressed)] for metrics present in both."""
+    rows = []
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        rows.append((name, old, new, change, change > threshold and new - old > min_delta_ms))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write a results file")
+    run_parser.add_argument("--output", "-o", default="benchmark_results.json")
+    run_parser.add_argument("--images", default=suite_config['image_root'])
+    run_parser.add_argument("--cascade", default=suite_config['cascade_path'])
+    run_parser.add_argument("--sizes", default=",".join(str(n) for n in suite_config['gallery_sizes']),
+                            help="comma-separated synthetic gallery sizes (identities)")
+    run_parser.add_argument("--repeat", type=int, default=suite_config['repeat'])
+    compare_parser = commands.add_parser("compare", help="flag regressions between two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=suite_config['threshold'],
+                                help="relative slow-down that counts as a regression (0.10 = 10%%)")
+    compare_parser.add_argument("--min-delta-ms", type=float, default=suite_config['min_delta_ms'])
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        settings = {
+            'image_root': args.images, 'cascade_path': args.cascade, 'repeat': max(1, args.repeat),
+            'gallery_sizes': [int(n) for n in args.sizes.split(",") if n.strip()],
+        }
+        workdir = tempfile.mkdtemp(prefix="face_bench_")
+        try:
+            suite = Suite(workdir, **settings)
+            results = suite.run()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        write_results(args.output, results, suite.settings)
+        print(f"{len(results)} metrics written to {args.output}")
+        return 0
+
+    baseline, current = read_results(args.baseline), read_results(args.current)
+    if baseline["machine"] != current["machine"]:
+        print("note: the two runs come from different machines or library versions", file=sys.stderr)
+    rows = compare(baseline, current, args.threshold, args.min_delta_ms)
+    print(f"{'metric':<32} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, old, new, change, regressed in rows:
+        print(f"{name:<32} {old:>12.3f} {new:>12.3f} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"missing from {args.current}: {', '.join(missing)}")
+    regressions = [row for row in rows if row[4]]
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} in {len(rows)} metrics")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
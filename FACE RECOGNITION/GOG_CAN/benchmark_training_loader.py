@@ -0,0 +1,102 @@
+"""
+Compares the process-pool training loader against the original serial PIL loader
+on a synthetic TrainingData/Images-style tree.
+
+    python benchmark_training_loader.py --identities 100 --images 50
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from training_loader import load_training_data, label_from_directory
+
+
+def serial_get_images_and_labels(path):
+    """The loader face_recog.py used before training_loader (kept here as the baseline)."""
+    image_paths = [os.path.join(path, f) for f in os.listdir(path) if os.path.isdir(os.path.join(path, f))]
+    faces, ids = [], []
+
+    for dir_path in image_paths:
+        for file_name in os.listdir(dir_path):
+            image_path = os.path.join(dir_path, file_name)
+            try:
+                pil_image = Image.open(image_path).convert("L")
+                image_np = np.array(pil_image, "uint8")
+                person_id = int(os.path.basename(dir_path).split("_")[0])
+                faces.append(image_np)
+                ids.append(person_id)
+            except Exception:
+                continue
+    return faces, ids
+
+
+def build_synthetic_tree(root, identities, images_per_identity, size, corrupt_every=0):
+    """Writes `identities` folders of noisy gray JPEG crops, like run_face_capture produces."""
+    rng = np.random.default_rng(0)
+    written = 0
+    for person_id in range(1, identities + 1):
+        name = f"PERSON {person_id}"
+        folder = os.path.join(root, f"{person_id}_{name}")
+        os.makedirs(folder, exist_ok=True)
+        base = rng.integers(0, 256, (size, size), dtype=np.uint8)
+        base = cv2.GaussianBlur(base, (0, 0), 3)
+        for sample in range(1, images_per_identity + 1):
+            img = cv2.add(base, rng.integers(0, 20, (size, size), dtype=np.uint8))
+            file_path = os.path.join(folder, f"{name}_{person_id}_{sample}.jpg")
+            written += 1
+            if corrupt_every and written % corrupt_every == 0:
+                with open(file_path, "wb") as f:
+                    f.write(b"not a jpeg")
+            else:
+                cv2.imwrite(file_path, img)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--identities", type=int, default=100)
+    parser.add_argument("--images", type=int, default=50, help="images per identity")
+    parser.add_argument("--size", type=int, default=200, help="side of each synthetic face crop")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: all cores)")
+    parser.add_argument("--max-side", type=int, default=None, help="reduced-resolution decode cap")
+    parser.add_argument("--corrupt-every", type=int, default=500, help="write a broken file every N files (0 = never)")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic tree afterwards")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="face_loader_bench_")
+    try:
+        t0 = time.perf_counter()
+        total = build_synthetic_tree(root, args.identities, args.images, args.size, args.corrupt_every)
+        print(f"Built {total} images in {time.perf_counter() - t0:.1f}s under {root}")
+
+        t0 = time.perf_counter()
+        faces, ids = serial_get_images_and_labels(root)
+        serial = time.perf_counter() - t0
+        print(f"serial PIL loader : {serial:7.2f}s  {len(faces)} faces  ({len(faces) / serial:,.0f} img/s)")
+
+        def progress(done, total, skipped, identities):
+            print(f"\r  {done}/{total} files, {identities} identities, {skipped} skipped", end="", flush=True)
+
+        t0 = time.perf_counter()
+        data = load_training_data(root, label_parser=label_from_directory, workers=args.workers,
+                                  max_side=args.max_side, progress_callback=progress)
+        pooled = time.perf_counter() - t0
+        print()
+        print(f"process-pool      : {pooled:7.2f}s  {len(data)} faces  ({len(data) / pooled:,.0f} img/s)"
+              f"  {len(data.skipped)} skipped")
+        print(f"speed-up          : {serial / pooled:.1f}x")
+        if len(data) != len(faces):
+            print("WARNING: loaders returned a different number of faces")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
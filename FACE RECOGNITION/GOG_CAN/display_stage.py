@@ -0,0 +1,85 @@
+import time
+
+import cv2
+from PIL import Image, ImageTk
+
+# --- DISPLAY CONFIGURATION ---
+display_config = {
+    'max_fps': 30,              # Display refresh cap, independent of how fast frames are processed
+    'interpolation': cv2.INTER_LINEAR,  # ~10x cheaper than INTER_AREA for a preview-sized image
+    'font_scale': 0.6,          # Label text size on the displayed (already downscaled) image
+    'thickness': 2,
+}
+
+
+class DisplayStage:
+    """
+    Shows camera frames in a Tk label at the label's on-screen size.
+
+    Each rendered frame is scaled down to fit the label (keeping its aspect ratio) before any
+    colour conversion or drawing, boxes and captions are drawn on that small image, and the
+    result is pasted into one PhotoImage that is only re-created when the display size
+    changes. Rendering is skipped entirely when the max_fps cap says it is not yet due.
+    """
+    def __init__(self, label, **settings):
+        self.label = label
+        self.settings = dict(display_config, **settings)
+        self._photo = None
+        self._photo_size = None
+        self._last_render = 0.0
+        self.render_time = 0.0       # Seconds spent in the last render(); includes the Tk paste
+        self.rendered = 0
+        self.skipped = 0
+
+    def set_max_fps(self, max_fps):
+        self.settings['max_fps'] = max_fps
+
+    def due(self, now=None):
+        """True when enough time has passed since the last render to show another frame."""
+        now = time.perf_counter() if now is None else now
+        max_fps = self.settings['max_fps']
+        if max_fps and now - self._last_render < 1.0 / max_fps:
+            self.skipped += 1
+            return False
+        return True
+
+    def target_size(self, frame_width, frame_height):
+        """The largest size with the frame's aspect ratio that fits in the label right now."""
+        width, height = self.label.winfo_width(), self.label.winfo_height()
+        if width < 2 or height < 2:
+            return frame_width, frame_height  # Not laid out yet
+        scale = min(width / frame_width, height / frame_height)
+        return max(1, int(frame_width * scale)), max(1, int(frame_height * scale))
+
+    def render(self, frame, annotations=()):
+        """
+        Displays a BGR frame. `annotations` are (box, text, bgr_color) with boxes in frame
+        coordinates; they are scaled to the display size and drawn there.
+        """
+        start = time.perf_counter()
+        frame_height, frame_width = frame.shape[:2]
+        width, height = self.target_size(frame_width, frame_height)
+        if (width, height) != (frame_width, frame_height):
+            small = cv2.resize(frame, (width, height), interpolation=self.settings['interpolation'])
+        else:
+            small = frame.copy()  # Never draw on the caller's frame
+
+        sx, sy = width / frame_width, height / frame_height
+        font_scale, thickness = self.settings['font_scale'], self.settings['thickness']
+        for (x, y, w, h), text, color in annotations:
+            x0, y0 = int(x * sx), int(y * sy)
+            cv2.rectangle(small, (x0, y0), (int((x + w) * sx), int((y + h) * sy)), color, thickness)
+            cv2.putText(small, text, (x0, max(y0 - 8, 12)), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+
+        image = Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if self._photo is None or self._photo_size != (width, height):
+            self._photo = ImageTk.PhotoImage(image=image)
+            self._photo_size = (width, height)
+            self.label.configure(image=self._photo)
+            self.label.imgtk = self._photo
+        else:
+            self._photo.paste(image)
+
+        self._last_render = time.perf_counter()
+        self.render_time = self._last_render - start
+        self.rendered += 1
@@ -0,0 +1,192 @@
+"""
+Quality- and diversity-gated enrollment: which face crops are worth keeping for training.
+
+Every candidate crop is checked in order:
+    one face      frames with several detected faces are skipped (whose face would it be?)
+    size          the face must be at least `min_face_size` pixels on its shorter side
+    sharpness     variance of the Laplacian at a fixed 100x100 scale, at least `min_sharpness`
+    novelty       the 64-bit difference hash (dHash) must differ from every crop already
+                  kept in at least `min_hash_distance` bits, so near-identical frames of a
+                  person holding still are dropped
+Capture stops once `target_samples` crops are kept, or once at least `min_samples` are kept
+and `patience` frames in a row brought nothing new (the person's current pose is covered).
+
+The same gate prunes galleries that were captured before it existed:
+
+    python enrollment.py prune TrainingData/Images               # report only
+    python enrollment.py prune TrainingData/Images --apply       # move rejects to Images_pruned/
+
+Removed files are noticed by the training manifest, so the next Train Model does a full rebuild.
+"""
+import argparse
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+
+# --- ENROLLMENT CONFIGURATION ---
+enrollment_config = {
+    'target_samples': 20,         # Crops kept per person; capture stops here
+    'min_samples': 8,             # Below this, capture never stops early
+    'patience': 90,               # Frames without a new crop (after min_samples) before stopping
+    'max_frames': 900,            # Hard stop, about a minute at 15 fps
+    'min_face_size': 100,         # Pixels, shorter side of the detected face
+    'min_sharpness': 50.0,        # Laplacian variance at 100x100; blurred crops score well below
+    'min_hash_distance': 6,       # Bits of 64 by which a crop's dHash must differ from every kept one
+}
+
+SHARPNESS_SIZE = (100, 100)
+
+
+def sharpness(gray_crop):
+    """Variance of the Laplacian, measured at a fixed size so crops of any size compare."""
+    small = cv2.resize(gray_crop, SHARPNESS_SIZE, interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(small, cv2.CV_64F).var())
+
+
+def difference_hash(gray_crop):
+    """64-bit dHash: whether each pixel of a 9x8 thumbnail is brighter than its left neighbour."""
+    small = cv2.resize(gray_crop, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class Decision:
+    """The outcome of EnrollmentSession.offer() for one frame."""
+    def __init__(self, reason, box=None, crop=None, score=0.0):
+        self.reason = reason      # 'accepted', 'no face', 'several faces', 'too small', 'blurry', 'duplicate'
+        self.box = box
+        self.crop = crop
+        self.score = score
+
+    @property
+    def accepted(self):
+        return self.reason == "accepted"
+
+
+class EnrollmentSession:
+    """
+    Decides, frame by frame, which face crops to keep for one person.
+    Call offer(gray, faces) with the detector's boxes until `done`; accepted decisions carry
+    the crop to save. `rejected` counts the reasons for everything else.
+    """
+    def __init__(self, **settings):
+        self.settings = dict(enrollment_config, **settings)
+        self.samples = []             # (crop, hash, sharpness) of every kept crop
+        self.rejected = {}
+        self.frames = 0
+        self._since_accept = 0
+
+    @property
+    def done(self):
+        s = self.settings
+        kept = len(self.samples)
+        return (kept >= s['target_samples'] or self.frames >= s['max_frames']
+                or (kept >= s['min_samples'] and self._since_accept >= s['patience']))
+
+    def offer(self, gray, faces):
+        """Scores the face in one frame; returns a Decision (accepted ones are kept)."""
+        self.frames += 1
+        decision = self._judge(gray, faces)
+        if decision.accepted:
+            self._since_accept = 0
+        else:
+            self._since_accept += 1
+            self.rejected[decision.reason] = self.rejected.get(decision.reason, 0) + 1
+        return decision
+
+    def offer_crop(self, crop):
+        """Like offer() for an already cropped face (used when pruning an existing gallery)."""
+        h, w = crop.shape[:2]
+        return self.offer(crop, [(0, 0, w, h)])
+
+    def _judge(self, gray, faces):
+        s = self.settings
+        if len(faces) == 0:
+            return Decision("no face")
+        if len(faces) > 1:
+            return Decision("several faces")
+        x, y, w, h = (int(v) for v in faces[0])
+        box = (x, y, w, h)
+        if min(w, h) < s['min_face_size']:
+            return Decision("too small", box)
+        crop = gray[y:y+h, x:x+w]
+        score = sharpness(crop)
+        if score < s['min_sharpness']:
+            return Decision("blurry", box, score=score)
+        signature = difference_hash(crop)
+        if any(hamming(signature, kept) < s['min_hash_distance'] for _, kept, _ in self.samples):
+            return Decision("duplicate", box, score=score)
+        crop = crop.copy()
+        self.samples.append((crop, signature, score))
+        return Decision("accepted", box, crop, score)
+
+    def describe_rejections(self):
+        return ", ".join(f"{count} {reason}" for reason, count in sorted(self.rejected.items(), key=lambda r: -r[1]))
+
+
+# --- PRUNING EXISTING GALLERIES ---
+def prune_directory(person_dir, **settings):
+    """
+    Runs a person's saved crops through the gate, sharpest first, and returns (kept, rejected)
+    file paths. Unreadable files count as rejected.
+    """
+    session = EnrollmentSession(**dict(settings, min_samples=0, patience=float("inf"), max_frames=float("inf")))
+    scored, rejected = [], []
+    for file_name in sorted(os.listdir(person_dir)):
+        path = os.path.join(person_dir, file_name)
+        crop = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if crop is None:
+            rejected.append(path)
+            continue
+        scored.append((sharpness(crop), path, crop))
+    scored.sort(key=lambda item: -item[0])
+    kept = []
+    for _, path, crop in scored:
+        if not session.done and session.offer_crop(crop).accepted:
+            kept.append(path)
+        else:
+            rejected.append(path)
+    return kept, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    prune = commands.add_parser("prune", help="apply the enrollment gate to an existing image gallery")
+    prune.add_argument("image_root", help="e.g. TrainingData/Images (one sub-directory per person)")
+    prune.add_argument("--apply", action="store_true", help="move rejected files out (default: report only)")
+    prune.add_argument("--target", type=int, default=enrollment_config['target_samples'])
+    prune.add_argument("--min-distance", type=int, default=enrollment_config['min_hash_distance'])
+    args = parser.parse_args(argv)
+
+    root = os.path.normpath(args.image_root)
+    pruned_root = root + "_pruned"
+    total_kept = total = 0
+    for dir_name in sorted(os.listdir(root)):
+        person_dir = os.path.join(root, dir_name)
+        if not os.path.isdir(person_dir):
+            continue
+        kept, rejected = prune_directory(person_dir, target_samples=args.target, min_hash_distance=args.min_distance)
+        total_kept += len(kept)
+        total += len(kept) + len(rejected)
+        print(f"{dir_name}: keep {len(kept)} of {len(kept) + len(rejected)}")
+        if args.apply and rejected:
+            target_dir = os.path.join(pruned_root, dir_name)
+            os.makedirs(target_dir, exist_ok=True)
+            for path in rejected:
+                shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+    if total:
+        print(f"total: keep {total_kept} of {total} ({total_kept / total:.0%})"
+              + (f"; rejected files moved to {pruned_root}" if args.apply else "; nothing changed (use --apply)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
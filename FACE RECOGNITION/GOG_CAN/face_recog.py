@@ -1,41 +1,83 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
-from PIL import Image, ImageTk
 import os
-import cv2
+import sys
 import csv
-import numpy as np
-import pandas as pd
 import datetime
+import time
+from collections import OrderedDict
 import attendance_system # <-- IMPORT THE NEW MODULE
+from person_directory import PersonDirectory
+from perf_metrics import metrics
+from startup_preload import StartupPreloader
+# OpenCV, PIL, NumPy and the recognition modules are imported where they are used (and warmed
+# up by StartupPreloader after the main window appears), so the window paints without them.
 
 # --- Custom Gradient Frame ---
+# Rendered gradients keyed by (width, height, color1, color2), shared by every GradientFrame,
+# so reopening a window of the same size costs nothing. Only the most recent few are kept.
+_gradient_cache = OrderedDict()
+_GRADIENT_CACHE_SIZE = 8
+
 class GradientFrame(tk.Canvas):
     """A canvas that draws a gradient background."""
-    def __init__(self, parent, color1="#2C3E50", color2="#4CA1AF", **kwargs):
+    def __init__(self, parent, color1="#2C3E50", color2="#4CA1AF", redraw_delay=80, **kwargs):
         tk.Canvas.__init__(self, parent, **kwargs)
         self._color1 = color1
         self._color2 = color2
-        self.bind("<Configure>", self._draw_gradient)
+        self._redraw_delay = redraw_delay  # ms of quiet after the last resize before redrawing
+        self._pending_redraw = None
+        self._drawn_size = None
+        self._image = None
+        self.bind("<Configure>", self._on_configure)
+
+    def _on_configure(self, event):
+        """Debounces resizes: only the size the window settles on is rendered."""
+        if (event.width, event.height) == self._drawn_size:
+            return
+        if self._pending_redraw is not None:
+            self.after_cancel(self._pending_redraw)
+        if self._image is None:
+            self._draw_gradient()  # First layout: draw right away so the window never shows bare
+        else:
+            self._pending_redraw = self.after(self._redraw_delay, self._draw_gradient)
+
+    def _render(self, width, height):
+        """The gradient as one PhotoImage, built as raw PPM bytes (one repeated row per scanline)."""
+        key = (width, height, self._color1, self._color2)
+        image = _gradient_cache.get(key)
+        if image is not None:
+            _gradient_cache.move_to_end(key)
+            return image
+
+        (r1, g1, b1) = (c >> 8 for c in self.winfo_rgb(self._color1))
+        (r2, g2, b2) = (c >> 8 for c in self.winfo_rgb(self._color2))
+        r_ratio = float(r2 - r1) / height
+        g_ratio = float(g2 - g1) / height
+        b_ratio = float(b2 - b1) / height
+        rows = [bytes((int(r1 + r_ratio * i), int(g1 + g_ratio * i), int(b1 + b_ratio * i))) * width
+                for i in range(height)]
+        ppm = b"P6 %d %d 255\n" % (width, height) + b"".join(rows)
+        image = tk.PhotoImage(master=self, data=ppm, format="PPM")
+
+        _gradient_cache[key] = image
+        while len(_gradient_cache) > _GRADIENT_CACHE_SIZE:
+            _gradient_cache.popitem(last=False)
+        return image
 
     def _draw_gradient(self, event=None):
         """Draw the gradient."""
-        self.delete("gradient")
+        self._pending_redraw = None
         width = self.winfo_width()
         height = self.winfo_height()
-        limit = height
-        (r1, g1, b1) = self.winfo_rgb(self._color1)
-        (r2, g2, b2) = self.winfo_rgb(self._color2)
-        r_ratio = float(r2 - r1) / limit
-        g_ratio = float(g2 - g1) / limit
-        b_ratio = float(b2 - b1) / limit
-
-        for i in range(limit):
-            nr = int(r1 + (r_ratio * i))
-            ng = int(g1 + (g_ratio * i))
-            nb = int(b1 + (b_ratio * i))
-            color = f"#{nr:04x}{ng:04x}{nb:04x}"
-            self.create_line(0, i, width, i, tags=("gradient",), fill=color)
+        if width < 2 or height < 2:
+            return  # Not laid out yet; the next <Configure> will draw it
+        self._image = self._render(width, height)
+        self._drawn_size = (width, height)
+        if self.find_withtag("gradient"):
+            self.itemconfig("gradient", image=self._image)
+        else:
+            self.create_image(0, 0, anchor="nw", image=self._image, tags=("gradient",))
         self.lower("gradient")
 
 # --- Main Application Class ---
@@ -60,6 +102,29 @@ class PersonalIdentifierApp:
         self.trainimage_path = "TrainingData/Images"
         self.persondetail_path = "./TrainingData/person_details.csv"
         self.attendance_path = "./TrainingData/attendance.csv"
+
+        # --- CAMERA CONFIGURATION ---
+        # Overrides for frame_capture.capture_config (e.g. {'width': 640, 'height': 480, 'fourcc': 'YUYV'}).
+        self.capture_settings = {}
+        # Overrides for face_tracking.tracking_config. Set 'detect_interval' to 1 to detect on every frame.
+        self.tracking_settings = {}
+        # Overrides for identity_cache.identity_cache_config (how often a tracked face is re-recognised).
+        self.identity_cache_settings = {}
+        # Overrides for display_stage.display_config (e.g. {'max_fps': 15} on slow kiosks).
+        self.display_settings = {}
+        # Overrides for frame_scheduler.scheduler_config (frame budget and load-shedding steps).
+        self.scheduler_settings = {}
+        # Overrides for perf_metrics.metrics_config (e.g. {'enabled': True} to export stage timings).
+        self.metrics_settings = {}
+        # Overrides for session_profiler.profile_config; {'enabled': True} (or --profile) profiles
+        # every recognition window and training run.
+        self.profile_settings = {}
+        # Overrides for enrollment.enrollment_config (how many crops Register keeps and how different they must be).
+        self.enrollment_settings = {}
+
+        self.training_job = None
+        # The open Live Recognition window, if any; its engine maps the model files training replaces.
+        self.recognition_window = None
         
         self.setup_directories_and_files()
 
@@ -71,6 +136,28 @@ class PersonalIdentifierApp:
         # --- MAIN LAYOUT ---
         self.create_main_widgets()
 
+        # Cascade download, OpenCV import and model loading happen once the window is on screen.
+        self.preloader = StartupPreloader(self.haarcasecade_path, self.trainimagelabel_path)
+        self.window.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        if event.widget is not self.window:
+            return
+        self.window.unbind("<Map>")
+        metrics.configure(**self.metrics_settings)
+        attendance_system.start_location()
+        self.preloader.start()
+        self.window.after(100, self.poll_preloader)
+
+    def poll_preloader(self):
+        """Reports a failed cascade download once background preloading has finished."""
+        if not self.preloader.finished:
+            self.window.after(100, self.poll_preloader)
+            return
+        if self.preloader.error is not None and not os.path.exists(self.haarcasecade_path):
+            messagebox.showerror("Download Error", f"Could not download model file.\nPlease ensure you have an internet connection.\nError: {self.preloader.error}")
+            self.window.quit()
+
     def setup_directories_and_files(self):
         """Creates necessary directories and files for the application to function correctly."""
         os.makedirs(self.trainimage_path, exist_ok=True)
@@ -86,24 +173,7 @@ class PersonalIdentifierApp:
             with open(self.attendance_path, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow(['ID', 'Name', 'Date', 'Time', 'Latitude', 'Longitude'])
-        
-        if not os.path.exists(self.haarcasecade_path):
-            self.download_haar_cascade()
-
-    def download_haar_cascade(self):
-        """Downloads the Haar Cascade XML file from OpenCV's repository if it's missing."""
-        url = "https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/haarcascade_frontalface_default.xml"
-        try:
-            import requests
-            print("Downloading required face detection model...")
-            response = requests.get(url)
-            response.raise_for_status()
-            with open(self.haarcasecade_path, 'wb') as f:
-                f.write(response.content)
-            print("Download complete.")
-        except Exception as e:
-            messagebox.showerror("Download Error", f"Could not download model file.\nPlease ensure you have an internet connection.\nError: {e}")
-            self.window.quit()
+        # The Haar cascade is downloaded, if missing, by StartupPreloader in the background.
 
     def configure_styles(self):
         """Configures the styles for various widgets for a modern and cohesive look."""
@@ -208,6 +278,8 @@ class PersonalIdentifierApp:
 
         ttk.Button(buttons_frame, text="Capture Images", command=lambda: self.capture_images_action(update_notification)).pack(side="left", padx=10)
         ttk.Button(buttons_frame, text="Train Model", command=lambda: self.train_model_action(update_notification)).pack(side="left", padx=10)
+        ttk.Button(buttons_frame, text="Rebuild Model", command=lambda: self.train_model_action(update_notification, full_rebuild=True)).pack(side="left", padx=10)
+        ttk.Button(buttons_frame, text="Cancel", command=lambda: self.cancel_training_action(update_notification)).pack(side="left", padx=10)
 
     def capture_images_action(self, notification_callback):
         #face captuirng initiation
@@ -218,8 +290,7 @@ class PersonalIdentifierApp:
 
         try:
             if os.path.exists(self.persondetail_path) and os.path.getsize(self.persondetail_path) > 0:
-                df = pd.read_csv(self.persondetail_path)
-                if int(details['ID']) in df['ID'].values:
+                if int(details['ID']) in PersonDirectory(self.persondetail_path):
                     notification_callback("This ID already exists. Please use a unique ID.", is_error=True)
                     return
         except Exception as e:
@@ -230,84 +301,150 @@ class PersonalIdentifierApp:
     
     def run_face_capture(self, details, notification_callback):
         # face capute r image save korar jonno
+        import cv2
+        from enrollment import EnrollmentSession
+        from frame_capture import capture_config
+        from frame_sources import open_source
+        self.preloader.wait()
         try:
-            cam = cv2.VideoCapture(0)
+            # Same source as the recognition window: the camera unless capture_settings says otherwise.
+            settings = dict(capture_config, **self.capture_settings)
+            cam = open_source(settings['source'], **settings)
             detector = cv2.CascadeClassifier(self.haarcasecade_path)
             path = os.path.join(self.trainimage_path, f"{details['ID']}_{details['Name']}")
             os.makedirs(path, exist_ok=True)
             
-            sample_num = 0
-            notification_callback("Look at the camera. Capturing 50 images...", is_error=False)
+            session = EnrollmentSession(**self.enrollment_settings)
+            target = session.settings['target_samples']
+            notification_callback(f"Look at the camera and turn your head slowly. Keeping up to {target} images...",
+                                  is_error=False)
             
-            while True:
+            # Only sharp, single-face crops that differ from the ones already kept are saved.
+            while not session.done:
                 ret, img = cam.read()
                 if not ret: break
                 gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
                 faces = detector.detectMultiScale(gray, 1.3, 5)
-                
+                decision = session.offer(gray, faces)
+                if decision.accepted:
+                    cv2.imwrite(f"{path}/{details['Name']}_{details['ID']}_{len(session.samples)}.jpg", decision.crop)
+
+                color = (0, 255, 0) if decision.accepted else (0, 165, 255)
                 for (x, y, w, h) in faces:
-                    cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    sample_num += 1
-                    cv2.imwrite(f"{path}/{details['Name']}_{details['ID']}_{sample_num}.jpg", gray[y:y+h, x:x+w])
-                    cv2.putText(img, f"Images Captured: {sample_num}/50", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    cv2.imshow("Capturing Images...", img)
+                    cv2.rectangle(img, (x, y), (x + w, y + h), color, 2)
+                status = "" if decision.accepted else f" ({decision.reason})"
+                cv2.putText(img, f"Images: {len(session.samples)}/{target}{status}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+                cv2.imshow("Capturing Images...", img)
                 
-                if cv2.waitKey(100) & 0xFF == ord('q') or sample_num >= 50: break
+                if cv2.waitKey(1) & 0xFF == ord('q'): break
             
             cam.release()
             cv2.destroyAllWindows()
 
+            if not session.samples:
+                notification_callback(f"No usable face images were captured for {details['Name']}. "
+                                      f"Skipped: {session.describe_rejections() or 'no frames'}.", is_error=True)
+                return
+
             with open(self.persondetail_path, "a", newline='') as csvFile:
                 writer = csv.writer(csvFile)
                 writer.writerow([details['ID'], details['Name'], details['Age'], details['Status']])
             
-            notification_callback(f"Images saved for {details['Name']}. Please train the model.", is_error=False)
+            notification_callback(f"{len(session.samples)} images saved for {details['Name']} "
+                                  f"(skipped {session.describe_rejections() or 'none'}). Please train the model.", is_error=False)
         except Exception as e:
             notification_callback(f"An error occurred: {e}", is_error=True)
             if 'cam' in locals() and cam.isOpened(): cam.release()
             cv2.destroyAllWindows()
 
-    def train_model_action(self, notification_callback):
-        """Trains the face recognizer model with the collected images."""
+    def train_model_action(self, notification_callback, full_rebuild=False):
+        """
+        Trains the face recognizer model with the collected images.
+        Only images added since the last training are processed unless a full rebuild is requested.
+        Training runs on a background thread; progress is polled from the Tk loop with after().
+        """
+        if self.training_job is not None and self.training_job.is_running():
+            notification_callback("Training is already running.", is_error=True)
+            return
+        if self.recognition_window is not None:
+            # Its engine keeps trainer.lbph mapped, which training has to replace.
+            notification_callback("Close the Live Recognition window before training.", is_error=True)
+            return
+
+        from training_worker import TrainingJob
         notification_callback("Training model... This may take a moment.", is_error=False)
-        self.window.update_idletasks()
-        try:
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
-            faces, ids = self.get_images_and_labels(self.trainimage_path)
-            
-            if not faces:
-                notification_callback("No images found to train. Please register a person first.", is_error=True)
-                return
+        # The cached engine maps trainer.lbph, which training replaces; it is reloaded afterwards.
+        self.preloader.release()
+        self.training_job = TrainingJob(self.trainimage_path, self.trainimagelabel_path, full_rebuild=full_rebuild,
+                                        profile_settings=self.profile_settings).start()
+        self.window.after(100, self.poll_training_job, self.training_job, notification_callback)
+
+    def cancel_training_action(self, notification_callback):
+        """Cancels the running training job, if any."""
+        if self.training_job is not None and self.training_job.is_running():
+            self.training_job.cancel()
+            notification_callback("Cancelling training...", is_error=False)
+
+    def poll_training_job(self, job, notification_callback):
+        """Reports progress of a background training job and its final outcome."""
+        def notify(message, is_error):
+            try:
+                notification_callback(message, is_error=is_error)
+            except tk.TclError:
+                pass  # The registration window was closed while training ran; keep following the job.
+
+        events = job.poll()
+        if not job.finished:
+            if events:
+                notify(events[-1].describe(), is_error=False)
+            self.window.after(100, self.poll_training_job, job, notification_callback)
+            return
 
-            recognizer.train(faces, np.array(ids))
-            recognizer.save(self.trainimagelabel_path)
-            notification_callback("Model trained successfully!", is_error=False)
-        except Exception as e:
-            notification_callback(f"Error during training: {e}", is_error=True)
-
-    def get_images_and_labels(self, path):
-        """Reads image files and extracts face data and corresponding IDs for training."""
-        image_paths = [os.path.join(path, f) for f in os.listdir(path) if os.path.isdir(os.path.join(path, f))]
-        faces, ids = [], []
-
-        for dir_path in image_paths:
-            for file_name in os.listdir(dir_path):
-                image_path = os.path.join(dir_path, file_name)
-                try:
-                    pil_image = Image.open(image_path).convert("L")
-                    image_np = np.array(pil_image, "uint8")
-                    person_id = int(os.path.basename(dir_path).split("_")[0])
-                    faces.append(image_np)
-                    ids.append(person_id)
-                except Exception:
-                    continue
-        return faces, ids
+        if job.cancelled:
+            notify("Training cancelled. The previous model was kept.", is_error=True)
+        elif job.error is not None:
+            notify(f"Error during training: {job.error}", is_error=True)
+        else:
+            result = job.result
+            for image_path, reason in result.skipped:
+                print(f"Skipping {image_path}: {reason}")
+
+            if result.mode == "up-to-date":
+                notify("Model is already up to date.", is_error=False)
+            elif result.images == 0 and result.mode == "full":
+                notify("No images found to train. Please register a person first.", is_error=True)
+            elif result.mode == "incremental" and result.images == 0:
+                notify(f"No usable new images ({len(result.skipped)} skipped). The model is unchanged.", is_error=True)
+            elif result.mode == "incremental":
+                notify(f"Model updated with {result.images} new images.", is_error=False)
+            else:
+                notify("Model trained successfully!", is_error=False)
+        # Whatever the outcome, reload the engine released in train_model_action.
+        if os.path.exists(self.trainimagelabel_path):
+            self.preloader.reload_engine()
 
     def open_recognition_window(self):
         """Opens the main real-time face recognition window."""
         if not os.path.exists(self.trainimagelabel_path):
             messagebox.showerror("Error", "Model not trained. Please register a person and train the model first.")
             return
+        if self.training_job is not None and self.training_job.is_running():
+            messagebox.showerror("Error", "The model is being trained. Please wait for training to finish.")
+            return
+        if self.recognition_window is not None:
+            self.recognition_window.lift()
+            return
+
+        import cv2
+        from PIL import Image, ImageTk
+        from frame_capture import ThreadedCapture
+        from face_tracking import FaceTracker
+        from identity_cache import IdentityCache
+        from display_stage import DisplayStage
+        from frame_scheduler import FrameScheduler
+        from session_profiler import ProfileSession
+        # Usually instant: the preloader has already imported all of this and loaded the cascade.
+        self.preloader.wait()
 
         rec_window = Toplevel(self.window)
         rec_window.title("Live Recognition")
@@ -317,8 +454,10 @@ class PersonalIdentifierApp:
         main_frame = ttk.Frame(rec_window, style="TFrame")
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-        video_label = ttk.Label(main_frame, style="Black.TLabel")
+        video_label = ttk.Label(main_frame, style="Black.TLabel", anchor="center")
         video_label.pack(side="left", fill="both", expand=True, padx=(0, 20))
+        # Frames are shown at the label's size, through one reused PhotoImage, at most max_fps times a second.
+        display = DisplayStage(video_label, **self.display_settings)
 
         info_panel = ttk.Frame(main_frame, style="InfoPanel.TFrame", width=350)
         info_panel.pack(side="right", fill="y")
@@ -328,6 +467,8 @@ class PersonalIdentifierApp:
         
         profile_pic_label = ttk.Label(info_panel, style="InfoPanel.TFrame") # Match panel bg
         profile_pic_label.pack(pady=10)
+        profile_pic_label.image = None
+        profile_photo = ImageTk.PhotoImage("RGB", (150, 150))  # Pasted into, never re-created
         
         details_frame = ttk.Frame(info_panel, style="InfoPanel.TFrame")
         details_frame.pack(pady=20, padx=20, fill="x")
@@ -339,88 +480,215 @@ class PersonalIdentifierApp:
             value_label.grid(row=i, column=1, sticky="w", padx=10)
             info_labels[field] = value_label
             
-        attendance_button = ttk.Button(info_panel, text="Mark Attendance", state="disabled")
+        # The button's command is bound once and marks whoever is currently recognised. Binding a
+        # new lambda every frame would register a new Tcl command each time, which Tk never frees.
+        attendance_target = {'person': None}
+        attendance_button = ttk.Button(info_panel, text="Mark Attendance", state="disabled",
+                                       command=lambda: attendance_target['person'] and mark_attendance(attendance_target['person']))
         attendance_button.pack(pady=20)
 
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
-        recognizer.read(self.trainimagelabel_path)
-        face_cascade = cv2.CascadeClassifier(self.haarcasecade_path)
-        df = pd.read_csv(self.persondetail_path)
+        def set_attendance_target(person):
+            if (person is None) != (attendance_target['person'] is None):
+                attendance_button.config(state="disabled" if person is None else "normal")
+            attendance_target['person'] = person
+
+        # Marks are saved in the background; their progress is reported here instead of a dialog.
+        attendance_status = ttk.Label(info_panel, text="", wraplength=300, style="Info.TLabel")
+        attendance_status.pack(pady=(0, 10), padx=20)
+
+        # Shows why the loop is running in a degraded mode, if it is.
+        performance_status = ttk.Label(info_panel, text="", wraplength=300, style="Info.TLabel")
+        performance_status.pack(side="bottom", pady=10, padx=20)
+
+        # F2 toggles per-stage timings over the live view; showing it turns metric collection on.
+        overlay = tk.Label(video_label, justify="left", anchor="nw", font=("Consolas", 9), bg="#000000", fg="#7CFC00")
+        overlay_state = {'visible': False, 'was_enabled': metrics.enabled, 'frames': 0, 'time': None}
+
+        def refresh_overlay():
+            if not overlay_state['visible'] or not overlay.winfo_exists():
+                return
+            now, frames = time.perf_counter(), metrics.counters.get("frames", 0)
+            fps = 0.0
+            if overlay_state['time'] is not None and now > overlay_state['time']:
+                fps = (frames - overlay_state['frames']) / (now - overlay_state['time'])
+            overlay_state.update(frames=frames, time=now)
+            overlay.config(text="\n".join([f"{fps:5.1f} fps  level {scheduler.level}"] + metrics.summary_lines()))
+            rec_window.after(500, refresh_overlay)
+
+        def toggle_overlay(event=None):
+            overlay_state['visible'] = not overlay_state['visible']
+            if overlay_state['visible']:
+                metrics.enable()
+                overlay_state['time'] = None
+                overlay.place(x=8, y=8)
+                refresh_overlay()
+            else:
+                overlay.place_forget()
+                if not overlay_state['was_enabled']:
+                    metrics.disable()
+
+        rec_window.bind("<F2>", toggle_overlay)
+
+        def mark_attendance(person):
+            if not attendance_system.mark_attendance(person.id, person.name):
+                attendance_status.config(text=f"Attendance for {person.name} has already been marked today.")
+
+        # The NumPy matcher memory-maps TrainingData/trainer.lbph (created from trainer.yml if needed)
+        # and scores all faces of a frame in one batch; distances match recognizer.predict().
+        engine = self.preloader.engine()
+        face_cascade = self.preloader.cascade
+        if face_cascade is None or face_cascade.empty():
+            messagebox.showerror("Error", f"Could not load the face detection model from {self.haarcasecade_path}.", parent=rec_window)
+            rec_window.destroy()
+            return
+        tracker = FaceTracker(face_cascade, **self.tracking_settings)
+        identities = IdentityCache(**self.identity_cache_settings)
+        # ID -> preformatted details; reloaded automatically when person_details.csv changes.
+        people = PersonDirectory(self.persondetail_path)
         
-        cam = cv2.VideoCapture(0)
+        # The capture thread owns the camera; update_frame only ever picks up the newest frame,
+        # so slow recognition drops frames instead of falling further behind the camera.
+        cam = ThreadedCapture(**self.capture_settings)
+        if not cam.start():
+            messagebox.showerror("Camera Error", cam.error, parent=rec_window)
+            rec_window.destroy()
+            return
+
+        # Paces the loop from a frame budget and sheds load in steps when frames run over it.
+        scheduler = FrameScheduler(**self.scheduler_settings)
+        display_fps = display.settings['max_fps']
 
         def update_frame():
+            if not cam.is_running():
+                if cam.error is not None and rec_window.winfo_exists():
+                    # The camera stopped on its own (unplugged, end of a video file): release it and say why.
+                    cam.release()
+                    performance_status.config(text=f"Camera stopped: {cam.error}")
+                    messagebox.showerror("Camera Error", cam.error, parent=rec_window)
+                return
+            for status in attendance_system.poll_status():
+                attendance_status.config(text=status.message)
+            for change in scheduler.poll():
+                # Per-stage timings are in the metrics overlay/export; the label shows the split at the change.
+                performance_status.config(text=f"{change.describe()} Stage costs: {scheduler.describe_costs()}")
+                metrics.count("degradation_changes")
             ret, frame = cam.read()
             if not ret:
-                rec_window.after(10, update_frame)
+                rec_window.after(5, update_frame)
                 return
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            scheduler.begin_frame()
+            tracker.settings['detect_scale'] = scheduler.detect_scale
+            display.set_max_fps(scheduler.display_fps(display_fps))
+            metrics.count("frames")
+
+            people.refresh()
+            with scheduler.stage("detect"):
+                with metrics.stage("convert"):
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                with metrics.stage("detect"):
+                    tracks = tracker.update(gray)
+                identities.evict_missing(track.id for track in tracks)
+            metrics.count("faces", len(tracks))
+
+            # Only run the recognizer for new faces or when the cached result has gone stale,
+            # and score all of those faces against the gallery in a single batch.
+            with scheduler.stage("recognize"):
+                stale = [track for track in tracks if identities.needs_verification(track, tracker.frame_index)]
+                if scheduler.skip_known_recognition:
+                    # Degraded: only faces nobody has been matched to yet are sent to the recognizer.
+                    stale = [t for t in stale if identities.get(t.id) is None or identities.get(t.id).confidence >= 75]
+                crops = [gray[t.box[1]:t.box[1]+t.box[3], t.box[0]:t.box[0]+t.box[2]] for t in stale]
+                with metrics.stage("predict"):
+                    predictions = engine.predict_batch(crops)
+                metrics.count("predictions", len(crops))
+                for track, matches in zip(stale, predictions):
+                    person_id, confidence = matches[0] if matches else (-1, float("inf"))
+                    identities.store(track, person_id, confidence, tracker.frame_index)
 
             recognized_this_frame = False
-            for (x, y, w, h) in faces:
-                person_id, confidence = recognizer.predict(gray[y:y+h, x:x+w])
+            annotations = []
+            recognized = unknown = 0
+            annotate_start = time.perf_counter()  # Person lookups, info panel and profile picture
+            for track in tracks:
+                x, y, w, h = track.box
+                cached = identities.get(track.id)
+                person_id, confidence = cached.label, cached.confidence
 
                 if confidence < 75:
-                    try:
-                        person_details = df[df['ID'] == person_id].iloc[0]
-                        display_text = f"{person_details['Name']} ({int(100 - confidence)}%)"
+                    person_details = people.get(person_id)
+                    if person_details is not None:
+                        display_text = f"{person_details.name} ({int(100 - confidence)}%)"
                         color = (0, 255, 0)
+                        recognized += 1
                         
                         if not recognized_this_frame:
-                            info_labels["ID"].config(text=person_details['ID'])
-                            info_labels["Name"].config(text=person_details['Name'])
-                            info_labels["Age"].config(text=person_details['Age'])
-                            info_labels["Status"].config(text=person_details['Status'])
+                            for field, label in info_labels.items():
+                                label.config(text=person_details.display.get(field, "---"))
                             
-                            profile_img_arr = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2RGB)
-                            profile_img = Image.fromarray(profile_img_arr).resize((150, 150), Image.LANCZOS)
-                            profile_photo = ImageTk.PhotoImage(image=profile_img)
-                            profile_pic_label.config(image=profile_photo)
-                            profile_pic_label.image = profile_photo
+                            profile_img_arr = cv2.resize(frame[y:y+h, x:x+w], (150, 150), interpolation=cv2.INTER_AREA)
+                            profile_photo.paste(Image.fromarray(cv2.cvtColor(profile_img_arr, cv2.COLOR_BGR2RGB)))
+                            if profile_pic_label.image is None:
+                                profile_pic_label.config(image=profile_photo)
+                                profile_pic_label.image = profile_photo
                             recognized_this_frame = True
                             
-                            # --- FIXED LINE ---
-                            # Convert the numpy.int64 to a standard Python int before passing it.
-                            attendance_button.config(state="normal", command=lambda: attendance_system.mark_attendance(int(person_details['ID']), person_details['Name']))
+                            set_attendance_target(person_details)
 
 
-                    except IndexError:
+                    else:
                         display_text = "Unknown ID"
                         color = (0, 255, 255)
-                        attendance_button.config(state="disabled")
+                        set_attendance_target(None)
+                        unknown += 1
                 else:
                     display_text = "Unknown"
                     color = (0, 0, 255)
-                    attendance_button.config(state="disabled")
+                    set_attendance_target(None)
+                    unknown += 1
                 
-                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                cv2.putText(frame, display_text, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, color, 2)
+                annotations.append((track.box, display_text, color))
 
             if not recognized_this_frame:
                 for label in info_labels.values(): label.config(text="---")
                 profile_pic_label.config(image='')
-                attendance_button.config(state="disabled")
-
-
-            img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(img)
-            img_tk = ImageTk.PhotoImage(image=img)
-            video_label.imgtk = img_tk
-            video_label.configure(image=img_tk)
-            
-            rec_window.after(10, update_frame)
+                profile_pic_label.image = None
+                set_attendance_target(None)
+            metrics.observe("annotate", time.perf_counter() - annotate_start)
+            metrics.count("recognized", recognized)
+            metrics.count("unknown", unknown)
+
+            # Boxes are drawn on the downscaled display image, not the full-resolution frame.
+            if display.due():
+                with scheduler.stage("display"), metrics.stage("render"):
+                    display.render(frame, annotations)
+
+            delay = scheduler.end_frame()
+            metrics.observe("frame", scheduler.last_frame)
+            metrics.gauge("dropped_frames", cam.buffer.dropped)
+            metrics.gauge("degradation_level", scheduler.level)
+            rec_window.after(delay, update_frame)
+
+        # With profiling on, the whole window session runs under cProfile and tracemalloc.
+        profiler = ProfileSession("recognition", **self.profile_settings)
 
         def on_close():
             cam.release()
+            profiler.stop()
+            if overlay_state['visible'] and not overlay_state['was_enabled']:
+                metrics.disable()
             rec_window.destroy()
+            self.recognition_window = None
 
+        self.recognition_window = rec_window
         rec_window.protocol("WM_DELETE_WINDOW", on_close)
+        profiler.start()
         update_frame()
 
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = PersonalIdentifierApp(root)
+    if "--profile" in sys.argv[1:]:
+        app.profile_settings['enabled'] = True
     root.mainloop()
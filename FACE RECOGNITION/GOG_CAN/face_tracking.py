@@ -0,0 +1,174 @@
+import itertools
+
+import cv2
+import numpy as np
+
+# --- TRACKING CONFIGURATION ---
+tracking_config = {
+    'detect_interval': 10,    # Run a full Haar detection at least every N frames
+    'track_scale': 0.5,       # Optical flow runs on the gray frame downscaled by this factor
+    'detect_scale': 1.0,      # Haar detection runs on the gray frame downscaled by this factor
+    'min_confidence': 0.5,    # Fraction of flow points that must survive; below this we re-detect
+    'match_iou': 0.3,         # Minimum overlap for a detection to keep an existing track's ID
+    'scale_factor': 1.3,      # detectMultiScale parameters, same as the original update_frame
+    'min_neighbors': 5,
+}
+
+
+def box_iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes."""
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    iw = min(ax2, bx2) - max(a[0], b[0])
+    ih = min(ay2, by2) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+
+class FaceTrack:
+    """A face followed across frames. `box` is (x, y, w, h) in full-resolution pixel coordinates."""
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.confidence = 1.0
+        self.age = 0            # Frames since the track was created
+        self.points = None      # Flow points (downscaled coordinates) carried between frames
+
+    def __repr__(self):
+        return f"FaceTrack(id={self.id}, box={self.box}, confidence={self.confidence:.2f})"
+
+
+class FaceTracker:
+    """
+    Detect-then-track: runs the Haar cascade every `detect_interval` frames (or as soon as
+    a track loses confidence) and carries the boxes in between with sparse optical flow on a
+    downscaled gray image. Each face keeps a stable track ID for as long as it stays matched.
+    """
+    def __init__(self, face_cascade, **settings):
+        self.cascade = face_cascade
+        self.settings = dict(tracking_config, **settings)
+        self.tracks = []
+        self.frame_index = 0
+        self.last_was_detection = False
+        self._prev_small = None
+        self._force_detect = True
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        """Drops all tracks; the next update runs a full detection."""
+        self.tracks = []
+        self._prev_small = None
+        self._force_detect = True
+
+    def update(self, gray):
+        """Advances all tracks to the given gray frame and returns the current list of FaceTrack."""
+        scale = self.settings['track_scale']
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale != 1 else gray
+
+        interval = max(1, int(self.settings['detect_interval']))
+        due = self.frame_index % interval == 0
+        if due or self._force_detect or self._prev_small is None:
+            self._detect(gray, small)
+            self.last_was_detection = True
+        else:
+            self._track(small, gray.shape)
+            self.last_was_detection = False
+
+        for track in self.tracks:
+            track.age += 1
+        self._prev_small = small
+        self.frame_index += 1
+        return self.tracks
+
+    def _detect(self, gray, small):
+        """Full detection; detections inherit the ID of the best-overlapping existing track."""
+        detect_scale = self.settings['detect_scale']
+        if detect_scale != 1:
+            reduced = cv2.resize(gray, None, fx=detect_scale, fy=detect_scale, interpolation=cv2.INTER_LINEAR)
+            faces = self.cascade.detectMultiScale(reduced, self.settings['scale_factor'], self.settings['min_neighbors'])
+            faces = [[v / detect_scale for v in box] for box in faces]
+        else:
+            faces = self.cascade.detectMultiScale(gray, self.settings['scale_factor'], self.settings['min_neighbors'])
+        unmatched = list(self.tracks)
+        tracks = []
+        for box in faces:
+            box = tuple(int(v) for v in box)
+            best, best_iou = None, self.settings['match_iou']
+            for track in unmatched:
+                iou = box_iou(box, track.box)
+                if iou >= best_iou:
+                    best, best_iou = track, iou
+            if best is not None:
+                unmatched.remove(best)
+                best.box = box
+                best.confidence = 1.0
+                track = best
+            else:
+                track = FaceTrack(next(self._ids), box)
+            track.points = self._seed_points(small, box)
+            tracks.append(track)
+        self.tracks = tracks
+        self._force_detect = False
+
+    def _seed_points(self, small, box):
+        """Picks corner features inside the (downscaled) face box to follow with optical flow."""
+        scale = self.settings['track_scale']
+        x, y, w, h = (int(v * scale) for v in box)
+        if w < 4 or h < 4:
+            return None
+        mask = np.zeros(small.shape, dtype=np.uint8)
+        # Stay inside the box so background edges don't drag it around.
+        mask[y + h // 8:y + h - h // 8, x + w // 8:x + w - w // 8] = 255
+        points = cv2.goodFeaturesToTrack(small, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+        return points
+
+    def _track(self, small, full_shape):
+        """Moves each box by the median optical flow of its points."""
+        scale = self.settings['track_scale']
+        frame_h, frame_w = full_shape[:2]
+        kept = []
+        for track in self.tracks:
+            if track.points is None or len(track.points) < 3:
+                self._force_detect = True
+                continue
+
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._prev_small, small, track.points, None, winSize=(15, 15), maxLevel=2)
+            if new_points is None:
+                self._force_detect = True
+                continue
+            good = status.reshape(-1) == 1
+            track.confidence = float(good.mean())
+            if track.confidence < self.settings['min_confidence'] or good.sum() < 3:
+                # Lost the face; keep showing the old box this frame and re-detect on the next.
+                self._force_detect = True
+                kept.append(track)
+                continue
+
+            old = track.points.reshape(-1, 2)[good]
+            new = new_points.reshape(-1, 2)[good]
+            dx, dy = np.median(new - old, axis=0) / scale
+
+            # Scale change from the spread of the points around their centroid.
+            old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+            new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+            valid = old_spread > 1e-3
+            zoom = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+
+            x, y, w, h = track.box
+            cx, cy = x + w / 2.0 + dx, y + h / 2.0 + dy
+            w, h = w * zoom, h * zoom
+            x = int(round(min(max(cx - w / 2.0, 0), frame_w - 1)))
+            y = int(round(min(max(cy - h / 2.0, 0), frame_h - 1)))
+            w = int(round(min(w, frame_w - x)))
+            h = int(round(min(h, frame_h - y)))
+            if w < 8 or h < 8:
+                self._force_detect = True
+                continue
+
+            track.box = (x, y, w, h)
+            track.points = new.reshape(-1, 1, 2)
+            kept.append(track)
+        self.tracks = kept
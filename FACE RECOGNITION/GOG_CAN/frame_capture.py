@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+from frame_sources import open_source
+from perf_metrics import metrics
+
+# --- CAPTURE CONFIGURATION ---
+# Default settings for the camera owned by the capture thread.
+# Any of these can be overridden per window by passing keyword arguments to ThreadedCapture.
+# Replay sources also take their own settings here, e.g.
+# {'source': 'TrainingData/Images', 'fps': 15, 'jitter': 0.1} (see frame_sources.py).
+capture_config = {
+    'source': 0,            # Device index, video file, image directory or "synthetic" (see frame_sources.open_source)
+    'width': 1280,          # Requested frame width (None keeps the driver default)
+    'height': 720,          # Requested frame height (None keeps the driver default)
+    'fourcc': 'MJPG',       # Requested pixel format (None keeps the driver default)
+    'buffer_size': 1,       # Driver-side buffer; 1 keeps the camera from queueing stale frames
+    'ring_size': 2,         # Frames kept in our own ring buffer (only the newest is ever read)
+}
+
+
+class LatestFrameBuffer:
+    """A small bounded ring buffer that always hands out the newest frame and drops the rest."""
+    def __init__(self, size=2):
+        self._frames = deque(maxlen=max(1, size))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._read_seq = 0  # Newest frame handed out by latest()
+        self.dropped = 0    # Frames overwritten or discarded without ever being handed out
+
+    def publish(self, frame):
+        """Stores a new frame, silently overwriting the oldest one when the buffer is full."""
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen and self._frames[0][0] > self._read_seq:
+                self.dropped += 1
+            self._seq += 1
+            self._frames.append((self._seq, time.monotonic(), frame))
+            self._cond.notify_all()
+
+    def latest(self, after_seq=0, timeout=None):
+        """
+        Returns (seq, timestamp, frame) for the newest frame, or None.
+        Only frames newer than `after_seq` are returned; with a timeout the call waits for one.
+        Older frames still sitting in the buffer are discarded.
+        """
+        with self._cond:
+            if timeout is not None and (not self._frames or self._frames[-1][0] <= after_seq):
+                self._cond.wait_for(lambda: self._frames and self._frames[-1][0] > after_seq, timeout)
+            if not self._frames or self._frames[-1][0] <= after_seq:
+                return None
+            item = self._frames[-1]
+            self.dropped += sum(1 for seq, _, _ in list(self._frames)[:-1] if seq > self._read_seq)
+            self._read_seq = item[0]
+            self._frames.clear()
+            self._frames.append(item)
+            return item
+
+
+class ThreadedCapture:
+    """
+    Owns a frame source (a camera by default) on a dedicated thread and publishes frames into a LatestFrameBuffer.
+    The UI thread never blocks on camera I/O: it just picks up whatever frame is newest.
+    """
+    def __init__(self, **settings):
+        self.settings = dict(capture_config, **settings)
+        self.buffer = LatestFrameBuffer(self.settings['ring_size'])
+        self._cam = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_seq = 0
+        self.error = None
+
+    def start(self):
+        """Opens the source and starts the capture thread. Returns True if the source opened."""
+        try:
+            self._cam = open_source(self.settings['source'], **self.settings)
+        except (ValueError, OSError) as e:
+            self.error = str(e)
+            return False
+        if not self._cam.isOpened():
+            self.error = f"Could not open {self._cam.describe()}."
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="FrameCapture", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        """Capture loop; runs until stop() is called or the camera stops delivering frames."""
+        failures = 0
+        while not self._stop.is_set():
+            with metrics.stage("capture"):
+                ret, frame = self._cam.read()
+            if not ret:
+                if self._cam.finished:
+                    self.error = f"{self._cam.describe()} has no more frames."
+                    break
+                failures += 1
+                if failures > 50:
+                    self.error = "Camera stopped delivering frames."
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            self.buffer.publish(frame)
+
+    def read(self, timeout=None):
+        """
+        Returns (ret, frame) like cv2.VideoCapture.read(), but without touching the camera.
+        ret is False when no frame newer than the last one read is available yet.
+        """
+        item = self.buffer.latest(self._last_seq, timeout)
+        if item is None:
+            return False, None
+        self._last_seq = item[0]
+        return True, item[2]
+
+    def read_with_timestamp(self, timeout=None):
+        """Like read(), but also returns the monotonic time at which the frame was captured."""
+        item = self.buffer.latest(self._last_seq, timeout)
+        if item is None:
+            return False, None, None
+        self._last_seq = item[0]
+        return True, item[2], item[1]
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def release(self):
+        """Stops the capture thread and releases the camera."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._cam is not None:
+            self._cam.release()
+            self._cam = None
@@ -0,0 +1,145 @@
+import time
+from contextlib import contextmanager
+
+# --- SCHEDULER CONFIGURATION ---
+scheduler_config = {
+    'target_fps': 15,             # Frame budget is 1 / target_fps seconds of processing per frame
+    'smoothing': 0.2,             # Weight of the newest frame in the moving average of stage costs
+    'degrade_after': 10,          # Consecutive over-budget frames before shedding the next bit of load
+    'recover_after': 60,          # Consecutive frames under `headroom` x budget before restoring one
+    'headroom': 0.7,
+    'detect_scale': 0.6,          # Level 1: face detection input is downscaled by this factor
+    'degraded_display_fps': 10,   # Level 3: display refresh cap
+    'min_delay_ms': 1,            # Always yield to Tk between frames
+}
+
+# Load-shedding steps, applied cumulatively from level 1 upwards.
+LEVELS = [
+    ("normal", "Full quality."),
+    ("detection-downscaled", "Face detection runs on a downscaled frame."),
+    ("recognition-reduced", "Faces already recognised are not re-checked."),
+    ("display-reduced", "The live view refreshes less often."),
+]
+
+
+class LevelChange:
+    """A change of degradation level, for showing to the operator."""
+    def __init__(self, level, previous, frame_cost, budget):
+        self.level = level
+        self.previous = previous
+        self.frame_cost = frame_cost
+        self.budget = budget
+
+    @property
+    def name(self):
+        return LEVELS[self.level][0]
+
+    def describe(self):
+        if self.level == 0:
+            return "Performance: normal."
+        return (f"Performance: degraded ({self.level}/{len(LEVELS) - 1}, {self.name}). {LEVELS[self.level][1]} "
+                f"Frame cost {self.frame_cost * 1000:.0f} ms vs budget {self.budget * 1000:.0f} ms.")
+
+    def __repr__(self):
+        return f"LevelChange({self.previous} -> {self.level}, cost={self.frame_cost:.4f}, budget={self.budget:.4f})"
+
+
+class FrameScheduler:
+    """
+    Paces the recognition loop from a frame budget instead of a fixed after() delay.
+
+    Each tick is wrapped in begin_frame()/end_frame() with the expensive parts timed by
+    stage(name). end_frame() returns how long to wait before the next tick (the unused part
+    of the budget), and moves the degradation level one step when the smoothed frame cost
+    has been over budget for `degrade_after` frames, or comfortably under it for
+    `recover_after` frames. The loop reads detect_scale, skip_known_recognition and
+    display_fps() to apply the current level.
+    """
+    def __init__(self, **settings):
+        self.settings = dict(scheduler_config, **settings)
+        self.level = 0
+        self.costs = {}              # Stage name -> smoothed seconds per frame
+        self.frame_cost = 0.0        # Smoothed seconds per frame, all stages
+        self.last_frame = 0.0        # Unsmoothed seconds of the last frame
+        self.frames = 0
+        self.changes = []            # Every LevelChange so far
+        self._frame_start = None
+        self._frame_stages = {}
+        self._over = 0
+        self._under = 0
+        self._reported = 0
+
+    @property
+    def budget(self):
+        return 1.0 / self.settings['target_fps']
+
+    # --- WHAT THE CURRENT LEVEL MEANS ---
+    @property
+    def detect_scale(self):
+        return self.settings['detect_scale'] if self.level >= 1 else 1.0
+
+    @property
+    def skip_known_recognition(self):
+        return self.level >= 2
+
+    def display_fps(self, normal_fps):
+        return min(normal_fps, self.settings['degraded_display_fps']) if self.level >= 3 else normal_fps
+
+    # --- TIMING ---
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self._frame_stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._frame_stages[name] = self._frame_stages.get(name, 0.0) + time.perf_counter() - start
+
+    def end_frame(self):
+        """Updates costs and level; returns the delay in ms before the next tick should run."""
+        elapsed = self.last_frame = time.perf_counter() - self._frame_start
+        alpha = self.settings['smoothing']
+        first = self.frames == 0
+        self.frame_cost = elapsed if first else (1 - alpha) * self.frame_cost + alpha * elapsed
+        for name, cost in self._frame_stages.items():
+            previous = self.costs.get(name)
+            self.costs[name] = cost if previous is None else (1 - alpha) * previous + alpha * cost
+        self.frames += 1
+        self._adjust_level()
+
+        delay = (self.budget - elapsed) * 1000
+        return max(int(self.settings['min_delay_ms']), int(delay))
+
+    def _adjust_level(self):
+        budget = self.budget
+        if self.frame_cost > budget:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.settings['degrade_after'] and self.level < len(LEVELS) - 1:
+                self._set_level(self.level + 1)
+        elif self.frame_cost < self.settings['headroom'] * budget:
+            self._under += 1
+            self._over = 0
+            if self._under >= self.settings['recover_after'] and self.level > 0:
+                self._set_level(self.level - 1)
+        else:
+            self._over = self._under = 0
+
+    def _set_level(self, level):
+        change = LevelChange(level, self.level, self.frame_cost, self.budget)
+        self.level = level
+        self._over = self._under = 0
+        self.changes.append(change)
+
+    def poll(self):
+        """Level changes since the last call (for the status label)."""
+        changes = self.changes[self._reported:]
+        self._reported = len(self.changes)
+        return changes
+
+    def describe_costs(self):
+        """e.g. 'capture 0.3 ms, detect 21.0 ms, ...' in the order stages were first seen."""
+        return ", ".join(f"{name} {cost * 1000:.1f} ms" for name, cost in self.costs.items())
@@ -0,0 +1,303 @@
+"""
+Frame sources: everything the app can read frames from, behind the cv2.VideoCapture-style
+interface the capture code already uses (isOpened / read / release).
+
+    DeviceSource          -- a camera by index (what cv2.VideoCapture(0) used to be)
+    VideoFileSource       -- a recorded video, optionally looped and paced at its own FPS
+    ImageDirectorySource  -- replays still images (e.g. TrainingData/Images) as a camera
+    SyntheticSource       -- generated frames, no files or hardware needed
+
+Replay and synthetic sources are paced to a target FPS with optional, seeded jitter, so
+latency and throughput can be measured reproducibly on machines without a webcam.
+
+open_source() turns a 'source' setting into a FrameSource:
+    0, "1"                     -> DeviceSource
+    "clip.mp4"                 -> VideoFileSource
+    "TrainingData/Images"      -> ImageDirectorySource
+    "synthetic", "synthetic:640x480"
+                               -> SyntheticSource
+    a FrameSource instance     -> returned as is
+"""
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".m4v", ".wmv", ".webm", ".mpg", ".mpeg"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+
+class Pacer:
+    """Spaces calls to wait() 1/fps apart, each deadline shifted by up to +-jitter of the interval."""
+    def __init__(self, fps=None, jitter=0.0, seed=0):
+        self.interval = 1.0 / fps if fps else 0.0
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next = now  # Fell behind; don't try to catch up with a burst
+        offset = self._rng.uniform(-self.jitter, self.jitter) * self.interval if self.jitter else 0.0
+        self._next += self.interval + offset
+
+
+class FrameSource(ABC):
+    """Interface shared by all frame sources. Subclasses produce BGR uint8 frames from read()."""
+    def __init__(self):
+        self.frames_read = 0
+        self.finished = False      # True once a finite source has nothing more to give
+
+    @abstractmethod
+    def isOpened(self):
+        """True if the source is ready to deliver frames, like cv2.VideoCapture.isOpened()."""
+
+    @abstractmethod
+    def read(self):
+        """(True, frame) or (False, None), like cv2.VideoCapture.read()."""
+
+    def release(self):
+        pass
+
+    def describe(self):
+        return type(self).__name__
+
+
+# --- CAMERA ---
+class DeviceSource(FrameSource):
+    """A camera by device index, with the capture settings pushed to the driver."""
+    def __init__(self, index=0, width=None, height=None, fourcc=None, buffer_size=None):
+        super().__init__()
+        self.index = index
+        self._cap = cv2.VideoCapture(index)
+        if self._cap.isOpened():
+            if fourcc:
+                self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            if width:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if buffer_size:
+                self._cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self):
+        ret, frame = self._cap.read()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def release(self):
+        self._cap.release()
+
+    def describe(self):
+        return f"camera {self.index}"
+
+
+# --- RECORDED VIDEO ---
+class VideoFileSource(FrameSource):
+    """
+    A video file. With realtime=True frames come out at the file's own frame rate (or `fps`),
+    like a live camera; otherwise as fast as they decode. loop=True restarts at the end.
+    """
+    def __init__(self, path, loop=False, realtime=False, fps=None, jitter=0.0, seed=0):
+        super().__init__()
+        self.path = path
+        self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        rate = fps or (self._cap.get(cv2.CAP_PROP_FPS) or 25.0)
+        self.pacer = Pacer(rate if (realtime or fps) else None, jitter, seed)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self):
+        self.pacer.wait()
+        ret, frame = self._cap.read()
+        if not ret and self.loop and self.frames_read:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        if not ret:
+            self.finished = True
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self._cap.release()
+
+    def describe(self):
+        return f"video {self.path}"
+
+
+# --- IMAGE REPLAY ---
+def list_images(root):
+    """Every image file under `root`, sorted by path."""
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(dir_path, file_name))
+    return paths
+
+
+def fit_frame(img, size):
+    """Letterboxes an image into a (width, height) frame so replayed stills look like one camera."""
+    width, height = size
+    scale = min(width / img.shape[1], height / img.shape[0])
+    resized = cv2.resize(img, (max(1, int(img.shape[1] * scale)), max(1, int(img.shape[0] * scale))),
+                         interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    y, x = (height - resized.shape[0]) // 2, (width - resized.shape[1]) // 2
+    frame[y:y+resized.shape[0], x:x+resized.shape[1]] = resized
+    return frame
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Replays the images under a directory as camera frames at `fps` (None = unpaced),
+    cycling through them when loop=True. shuffle uses `seed`, so runs are repeatable.
+    Frames are letterboxed to `size` (width, height); None keeps each image's own size.
+    Decoded frames are kept for the next loop up to `cache_mb` megabytes.
+    """
+    def __init__(self, root, fps=15, jitter=0.0, loop=True, shuffle=False, seed=0, size=(640, 480), cache_mb=64):
+        super().__init__()
+        self.root = root
+        self.loop = loop
+        self.size = size
+        self.paths = list_images(root) if os.path.isdir(root) else []
+        if shuffle:
+            random.Random(seed).shuffle(self.paths)
+        self.pacer = Pacer(fps, jitter, seed)
+        self._position = 0
+        self._cache = {}
+        self._cache_budget = cache_mb * 1024 * 1024
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def _load(self, path):
+        frame = self._cache.get(path)
+        if frame is None:
+            img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                return None
+            frame = fit_frame(img, self.size) if self.size else img
+            if frame.nbytes <= self._cache_budget:  # Small directories are decoded only once
+                self._cache[path] = frame
+                self._cache_budget -= frame.nbytes
+        return frame
+
+    def read(self):
+        self.pacer.wait()
+        for _ in range(len(self.paths)):
+            if self._position >= len(self.paths):
+                if not self.loop:
+                    break
+                self._position = 0
+            path = self.paths[self._position]
+            self._position += 1
+            frame = self._load(path)
+            if frame is not None:
+                self.frames_read += 1
+                return True, frame.copy()  # Callers draw on frames
+        self.finished = True
+        return False, None
+
+    def describe(self):
+        return f"images {self.root} ({len(self.paths)} files)"
+
+
+# --- SYNTHETIC ---
+class SyntheticSource(FrameSource):
+    """
+    Generated frames: a noisy background with a bright face-sized patch drifting across it,
+    or, when `faces` (a list of BGR/gray images) is given, those faces moving around instead,
+    so detection and recognition have real work to do. Fully determined by `seed`.
+    """
+    def __init__(self, width=640, height=480, fps=30, jitter=0.0, seed=0, faces=None, count=None):
+        super().__init__()
+        self.width, self.height = width, height
+        self.count = count                 # Stop after this many frames (None = endless)
+        self.pacer = Pacer(fps, jitter, seed)
+        self._rng = np.random.default_rng(seed)
+        self._background = self._rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        side = max(16, min(width, height) // 3)
+        self._faces = []
+        for face in faces or []:
+            face = cv2.cvtColor(face, cv2.COLOR_GRAY2BGR) if face.ndim == 2 else face
+            self._faces.append(cv2.resize(face, (side, side), interpolation=cv2.INTER_AREA))
+        self._side = side
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.count is not None and self.frames_read >= self.count:
+            self.finished = True
+            return False, None
+        self.pacer.wait()
+        frame = self._background.copy()
+        t = self.frames_read
+        side = self._side
+        x = int((self.width - side) * (0.5 + 0.4 * np.sin(t / 40.0)))
+        y = int((self.height - side) * (0.5 + 0.3 * np.cos(t / 55.0)))
+        if self._faces:
+            frame[y:y+side, x:x+side] = self._faces[(t // 30) % len(self._faces)]
+        else:
+            cv2.rectangle(frame, (x, y), (x + side, y + side), (200, 200, 200), -1)
+        # A little sensor noise so consecutive frames are never identical.
+        frame[::7, ::7] = cv2.add(frame[::7, ::7], self._rng.integers(0, 8, frame[::7, ::7].shape, dtype=np.uint8))
+        self.frames_read += 1
+        return True, frame
+
+    def describe(self):
+        return f"synthetic {self.width}x{self.height}"
+
+
+def open_source(spec, **settings):
+    """
+    Builds a FrameSource from a source setting `spec` (see the module docstring). `settings` are
+    passed to the chosen class; keys it does not take are ignored, so a capture_config can
+    be passed straight through. Its width/height also set the size of replayed and
+    synthetic frames.
+    """
+    resolution = (settings.get('width'), settings.get('height'))
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.strip().isdigit()):
+        return DeviceSource(int(spec), **_accepted(settings, "width", "height", "fourcc", "buffer_size"))
+    if isinstance(spec, str) and spec.startswith("synthetic"):
+        kwargs = _accepted(settings, "fps", "jitter", "seed", "faces", "count")
+        if all(resolution):
+            kwargs.update(width=resolution[0], height=resolution[1])
+        if ":" in spec:
+            width, height = spec.split(":", 1)[1].lower().split("x")
+            kwargs.update(width=int(width), height=int(height))
+        return SyntheticSource(**kwargs)
+    if os.path.isdir(spec):
+        kwargs = _accepted(settings, "fps", "jitter", "loop", "shuffle", "seed", "size", "cache_mb")
+        if all(resolution):
+            kwargs.setdefault("size", resolution)
+        return ImageDirectorySource(spec, **kwargs)
+    if os.path.splitext(spec)[1].lower() in VIDEO_EXTENSIONS or os.path.isfile(spec):
+        return VideoFileSource(spec, **_accepted(settings, "loop", "realtime", "fps", "jitter", "seed"))
+    raise ValueError(f"Unknown frame source: {spec!r}")
+
+
+def _accepted(settings, *names):
+    return {name: settings[name] for name in names if name in settings}
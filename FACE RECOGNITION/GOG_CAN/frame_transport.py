@@ -0,0 +1,225 @@
+"""
+Moving frames between processes.
+
+    SharedMemoryTransport -- frames live in a fixed pool of preallocated shared-memory slots;
+                             only a small descriptor (channel, slot, sequence number, shape,
+                             metadata) goes through the queue and the consumer reads the
+                             pixels in place.
+    QueueTransport        -- frames are pickled through a multiprocessing queue (the baseline,
+                             and what multi_camera.py used before).
+
+Both have the same API and the same back-pressure rule: each channel (camera) owns `slots`
+frames that are either waiting or being processed, and a producer that finds them all taken
+gets None / False back and drops the frame instead of queueing it.
+
+    producer:  frame = transport.reserve(channel, shape)  # writable array, or None if no slot is free
+               cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY, dst=frame)  # write straight into the slot
+               transport.commit(frame, meta)
+           or  transport.send(channel, array, meta) -> bool   # reserve + copy + commit
+    consumer:  item = transport.receive()          # (handle, frame) or None after close_consumers()
+               ... read frame (a view into shared memory; do not keep it) ...
+               transport.done(item)                # frees the slot
+
+A transport is created in the parent process and handed to the child processes as a
+Process argument; the shared memory is attached by name in each process on first use and
+freed when the parent calls close().
+"""
+import numpy as np
+
+FREE, RESERVED, QUEUED = 0, 1, 2
+
+
+class FrameHandle:
+    """The descriptor that travels through the queue in place of the pixels."""
+    __slots__ = ("channel", "slot", "seq", "shape", "dtype", "meta")
+
+    def __init__(self, channel, slot, seq, shape, dtype, meta=None):
+        self.channel = channel
+        self.slot = slot
+        self.seq = seq           # Per-slot write counter, checked by the reader
+        self.shape = shape
+        self.dtype = dtype
+        self.meta = meta
+
+    def __getstate__(self):
+        return self.channel, self.slot, self.seq, self.shape, self.dtype, self.meta
+
+    def __setstate__(self, state):
+        self.channel, self.slot, self.seq, self.shape, self.dtype, self.meta = state
+
+
+class _SlotFrame(np.ndarray):
+    """A writable view of a reserved slot; remembers which slot it belongs to for commit()."""
+    handle = None
+
+
+class SharedMemoryTransport:
+    """
+    `slots` slots of `slot_bytes` each per channel, in one shared-memory block.
+
+    Slot states and sequence numbers are shared arrays. A slot goes FREE -> RESERVED
+    (reserve) -> QUEUED (commit) -> FREE (done), so the producer can never overwrite a
+    frame a consumer is still reading. Every commit bumps the slot's sequence number and
+    the reader checks it against the descriptor before handing out the view; a mismatch
+    (only possible after a crashed consumer or a bug) is skipped and counted in `stale`.
+    """
+    def __init__(self, ctx, channels, slots=2, slot_bytes=1920 * 1080 * 3):
+        from multiprocessing import shared_memory
+        self.channels = list(channels)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        total = len(self.channels) * slots
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, total * slot_bytes))
+        self.name = self._shm.name
+        self._owner = True
+        self._states = ctx.Array("b", total)
+        self._seqs = ctx.Array("q", total, lock=False)
+        self._stale = ctx.Value("q", 0)
+        self._queue = ctx.Queue()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = None      # Attached again by name in the receiving process
+        state["_owner"] = False
+        return state
+
+    @property
+    def stale(self):
+        return self._stale.value
+
+    def _buffer(self):
+        if self._shm is None:
+            from multiprocessing import shared_memory
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return self._shm.buf
+
+    def _view(self, slot, shape, dtype, cls=np.ndarray):
+        return np.ndarray(shape, dtype=dtype, buffer=self._buffer(), offset=slot * self.slot_bytes).view(cls)
+
+    def reserve(self, channel, shape, dtype=np.uint8):
+        """A writable frame in a free slot of `channel`, or None if they are all in use (or it would not fit)."""
+        dtype = np.dtype(dtype)
+        if int(np.prod(shape)) * dtype.itemsize > self.slot_bytes:
+            return None
+        first = self.channels.index(channel) * self.slots
+        with self._states.get_lock():
+            for slot in range(first, first + self.slots):
+                if self._states[slot] == FREE:
+                    self._states[slot] = RESERVED
+                    break
+            else:
+                return None
+        frame = self._view(slot, shape, dtype, _SlotFrame)
+        frame.handle = FrameHandle(channel, slot, 0, tuple(shape), dtype.str)
+        return frame
+
+    def commit(self, frame, meta=None):
+        """Publishes a reserved frame to the consumers."""
+        handle = frame.handle
+        frame.handle = None
+        self._seqs[handle.slot] += 1
+        handle.seq = self._seqs[handle.slot]
+        handle.meta = meta
+        with self._states.get_lock():
+            self._states[handle.slot] = QUEUED
+        self._queue.put(handle)
+
+    def send(self, channel, array, meta=None):
+        frame = self.reserve(channel, array.shape, array.dtype)
+        if frame is None:
+            return False
+        frame[...] = array
+        self.commit(frame, meta)
+        return True
+
+    def receive(self, timeout=None):
+        """(handle, frame) with `frame` a read-only view into shared memory, or None at shutdown."""
+        while True:
+            handle = self._queue.get(timeout=timeout)
+            if handle is None:
+                return None
+            if self._seqs[handle.slot] != handle.seq:
+                with self._stale.get_lock():
+                    self._stale.value += 1
+                continue
+            frame = self._view(handle.slot, handle.shape, np.dtype(handle.dtype))
+            frame.flags.writeable = False
+            return handle, frame
+
+    def done(self, item):
+        with self._states.get_lock():
+            self._states[item[0].slot] = FREE
+
+    def close_consumers(self, count):
+        for _ in range(count):
+            self._queue.put(None)
+
+    def close(self):
+        """Detaches this process; in the creating process also frees the shared memory."""
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                return  # A view is still alive somewhere in this process; leave it to the OS
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+
+class QueueTransport:
+    """The same interface over a plain multiprocessing queue: every frame is pickled and copied."""
+    def __init__(self, ctx, channels, slots=2, slot_bytes=None):
+        self.channels = list(channels)
+        self.slots = slots
+        self._in_flight = ctx.Array("q", len(self.channels))
+        self._queue = ctx.Queue()
+        self.stale = 0
+
+    def reserve(self, channel, shape, dtype=np.uint8):
+        index = self.channels.index(channel)
+        with self._in_flight.get_lock():
+            if self._in_flight[index] >= self.slots:
+                return None
+            self._in_flight[index] += 1
+        frame = np.empty(shape, dtype).view(_SlotFrame)
+        frame.handle = FrameHandle(channel, None, 0, tuple(shape), np.dtype(dtype).str)
+        return frame
+
+    def commit(self, frame, meta=None):
+        handle = frame.handle
+        frame.handle = None
+        handle.meta = meta
+        self._queue.put((handle, frame.view(np.ndarray)))
+
+    def send(self, channel, array, meta=None):
+        frame = self.reserve(channel, array.shape, array.dtype)
+        if frame is None:
+            return False
+        frame[...] = array
+        self.commit(frame, meta)
+        return True
+
+    def receive(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def done(self, item):
+        index = self.channels.index(item[0].channel)
+        with self._in_flight.get_lock():
+            self._in_flight[index] -= 1
+
+    def close_consumers(self, count):
+        for _ in range(count):
+            self._queue.put(None)
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {"shm": SharedMemoryTransport, "queue": QueueTransport}
+
+
+def create_transport(kind, ctx, channels, slots=2, slot_bytes=1920 * 1080 * 3):
+    """'shm' (SharedMemoryTransport) or 'queue' (QueueTransport)."""
+    if kind not in TRANSPORTS:
+        raise ValueError(f"Unknown frame transport: {kind!r}")
+    return TRANSPORTS[kind](ctx, channels, slots, slot_bytes)
@@ -0,0 +1,216 @@
+"""
+Approximate nearest-neighbour index over the LBPH gallery.
+
+Search runs in three steps, each narrowing the candidates for the next:
+
+1. coarse clusters -- per-identity centroids are grouped with k-means (on square-rooted
+   histograms, where L2 approximates chi-square); the query only visits the `nprobe`
+   closest clusters;
+2. centroid shortlist -- the identities in those clusters are ranked by chi-square distance
+   to their centroid and the best `shortlist` are kept;
+3. exact re-rank -- every training histogram of the shortlisted identities is compared with
+   the exact LBPH distance, so returned distances are the same as an exhaustive search.
+
+Raising nprobe / shortlist trades speed for recall. The index is built at train time and
+saved next to the model (trainer.yml -> trainer.index.npz, with the centroids in
+trainer.index.centroids.npy so recognition windows can memory-map them). Incremental training
+extends the saved index instead of re-clustering; a full retrain builds a fresh one.
+"""
+import os
+
+import numpy as np
+
+from lbph_engine import chi_square_alt, row_sums
+
+# --- INDEX CONFIGURATION ---
+index_config = {
+    'nprobe': 8,             # Coarse clusters visited per query
+    'shortlist': 32,         # Identities re-ranked exactly per query
+    'min_identities': 500,   # Smaller galleries are always searched exhaustively
+}
+
+
+def index_path_for(model_path):
+    """TrainingData/trainer.yml -> TrainingData/trainer.index.npz"""
+    return os.path.splitext(model_path)[0] + ".index.npz"
+
+
+def centroids_path_for(index_path):
+    """TrainingData/trainer.index.npz -> TrainingData/trainer.index.centroids.npy"""
+    return os.path.splitext(index_path)[0] + ".centroids.npy"
+
+
+def worth_building(identities):
+    """Galleries below min_identities are always scanned exhaustively, so get no index."""
+    return identities >= index_config['min_identities']
+
+
+def _group_rows(labels):
+    """Gallery rows grouped by label: (identity_labels, row_order, row_starts) in CSR form."""
+    row_order = np.argsort(labels, kind="stable").astype(np.int64)
+    sorted_labels = labels[row_order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    return sorted_labels[starts].astype(np.int32), row_order, np.r_[starts, len(labels)].astype(np.int64)
+
+
+def _group_clusters(assignment, clusters):
+    """Identities grouped by cluster: (cluster_order, cluster_starts) in CSR form."""
+    cluster_order = np.argsort(assignment, kind="stable").astype(np.int64)
+    cluster_starts = np.searchsorted(assignment[cluster_order], np.arange(clusters + 1)).astype(np.int64)
+    return cluster_order, cluster_starts
+
+
+def _kmeans(points, clusters, iterations, seed):
+    """Plain Lloyd's k-means (L2) on float32 rows. Returns (centers, assignment)."""
+    rng = np.random.default_rng(seed)
+    centers = points[rng.choice(len(points), clusters, replace=False)].copy()
+    point_norms = (points * points).sum(axis=1)
+    assignment = np.zeros(len(points), dtype=np.int32)
+    for _ in range(iterations):
+        dists = point_norms[:, None] - 2.0 * points @ centers.T + (centers * centers).sum(axis=1)[None, :]
+        assignment = dists.argmin(axis=1).astype(np.int32)
+        counts = np.bincount(assignment, minlength=clusters)
+        order = np.argsort(assignment, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = np.r_[0, np.cumsum(counts)[:-1]][filled]
+        centers[filled] = np.add.reduceat(points[order], starts, axis=0) / counts[filled, None]
+        for c in np.flatnonzero(counts == 0):
+            # Re-seed empty clusters on the point farthest from its center.
+            far = dists[np.arange(len(points)), assignment].argmax()
+            centers[c] = points[far]
+            dists[far, assignment[far]] = -np.inf
+    return centers, assignment
+
+
+class GalleryIndex:
+    """Coarse-cluster + centroid prefilter over an LBPH gallery, with exact re-ranking."""
+    def __init__(self, identity_labels, centroids, row_order, row_starts, cluster_centers, cluster_order, cluster_starts,
+                 centroid_sums=None):
+        self.identity_labels = identity_labels    # (L,) label of each identity
+        self.centroids = centroids                # (L, bins) mean histogram per identity; may be a memmap
+        self.row_order = row_order                # gallery row indices grouped by identity
+        self.row_starts = row_starts              # (L + 1,) CSR offsets into row_order
+        self.cluster_centers = cluster_centers    # (C, bins) in square-root space
+        self.cluster_order = cluster_order        # identity indices grouped by cluster
+        self.cluster_starts = cluster_starts      # (C + 1,) CSR offsets into cluster_order
+        self.centroid_sums = row_sums(centroids) if centroid_sums is None else centroid_sums
+
+    def __len__(self):
+        return len(self.identity_labels)
+
+    @classmethod
+    def build(cls, histograms, labels, clusters=None, iterations=10, seed=0):
+        """Builds the index from a (count, bins) histogram matrix and its labels."""
+        identity_labels, row_order, row_starts = _group_rows(np.asarray(labels))
+        centroids = np.empty((len(identity_labels), histograms.shape[1]), dtype=np.float32)
+        for i in range(len(identity_labels)):
+            rows = row_order[row_starts[i]:row_starts[i + 1]]
+            centroids[i] = np.asarray(histograms[np.sort(rows)], dtype=np.float64).mean(axis=0)
+
+        if clusters is None:
+            clusters = int(round(np.sqrt(len(identity_labels))))
+        clusters = max(1, min(clusters, len(identity_labels)))
+        centers, assignment = _kmeans(np.sqrt(centroids), clusters, iterations, seed)
+        return cls(identity_labels, centroids, row_order, row_starts, centers.astype(np.float32),
+                   *_group_clusters(assignment, clusters))
+
+    def extend(self, histograms, labels):
+        """
+        The index for a gallery that grew by appending rows to the one this index covers
+        (what recognizer.update() does). The clusters are kept: identities with new rows get
+        their centroid recomputed, and new identities join the nearest cluster. Run build()
+        again after large changes, since the clusters drift from the data.
+        """
+        labels = np.asarray(labels)
+        previous = int(self.row_starts[-1])
+        identity_labels, row_order, row_starts = _group_rows(labels)
+        changed = set(labels[previous:].tolist())
+
+        clusters = len(self.cluster_centers)
+        old_assignment = np.empty(len(self.identity_labels), dtype=np.int32)
+        for c in range(clusters):
+            old_assignment[self.cluster_order[self.cluster_starts[c]:self.cluster_starts[c + 1]]] = c
+        old_positions = {label: i for i, label in enumerate(self.identity_labels.tolist())}
+
+        centroids = np.empty((len(identity_labels), histograms.shape[1]), dtype=np.float32)
+        centroid_sums = np.empty(len(identity_labels), dtype=self.centroid_sums.dtype)
+        assignment = np.full(len(identity_labels), -1, dtype=np.int32)
+        for i, label in enumerate(identity_labels.tolist()):
+            old = old_positions.get(label)
+            if old is not None:
+                assignment[i] = old_assignment[old]
+            if old is None or label in changed:
+                rows = row_order[row_starts[i]:row_starts[i + 1]]
+                centroids[i] = np.asarray(histograms[np.sort(rows)], dtype=np.float64).mean(axis=0)
+                centroid_sums[i] = row_sums(centroids[i:i + 1])[0]
+            else:
+                centroids[i] = self.centroids[old]
+                centroid_sums[i] = self.centroid_sums[old]
+
+        new = np.flatnonzero(assignment < 0)
+        if len(new):
+            root = np.sqrt(centroids[new])
+            dists = ((root * root).sum(axis=1)[:, None] - 2.0 * root @ self.cluster_centers.T
+                     + (self.cluster_centers * self.cluster_centers).sum(axis=1)[None, :])
+            assignment[new] = dists.argmin(axis=1)
+        return GalleryIndex(identity_labels, centroids, row_order, row_starts, self.cluster_centers,
+                            *_group_clusters(assignment, clusters), centroid_sums=centroid_sums)
+
+    def save(self, path):
+        """Writes the npz and its centroids sidecar; both are replaced only once both are complete."""
+        centroids_path = centroids_path_for(path)
+        tmp_path, tmp_centroids_path = path + ".tmp.npz", centroids_path + ".tmp.npy"
+        np.save(tmp_centroids_path, np.ascontiguousarray(self.centroids, dtype=np.float32))
+        np.savez(tmp_path, identity_labels=self.identity_labels, centroid_sums=self.centroid_sums,
+                 row_order=self.row_order, row_starts=self.row_starts,
+                 cluster_centers=self.cluster_centers, cluster_order=self.cluster_order,
+                 cluster_starts=self.cluster_starts)
+        os.replace(tmp_centroids_path, centroids_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index saved by save(). The centroids are memory-mapped, so recognition
+        windows share them through the page cache. Raises ValueError if the two files do
+        not belong together.
+        """
+        centroids = np.load(centroids_path_for(path), mmap_mode="r")
+        with np.load(path) as data:
+            index = cls(data["identity_labels"], centroids, data["row_order"], data["row_starts"],
+                        data["cluster_centers"], data["cluster_order"], data["cluster_starts"],
+                        centroid_sums=data["centroid_sums"])
+        if len(index.centroids) != len(index.identity_labels):
+            raise ValueError(f"{path}: centroids do not match the index")
+        return index
+
+    def worthwhile(self, identities):
+        """Small galleries are cheaper (and exact) to scan exhaustively."""
+        return worth_building(identities)
+
+    def candidate_rows(self, query, nprobe=None, shortlist=None):
+        """Gallery rows worth comparing exactly with one query histogram (sorted)."""
+        nprobe = nprobe or index_config['nprobe']
+        shortlist = shortlist or index_config['shortlist']
+
+        root = np.sqrt(np.asarray(query, dtype=np.float32))
+        coarse = ((self.cluster_centers - root) ** 2).sum(axis=1)
+        probe = np.argsort(coarse)[:nprobe]
+        identities = np.concatenate([self.cluster_order[self.cluster_starts[c]:self.cluster_starts[c + 1]]
+                                     for c in probe])
+
+        if len(identities) > shortlist:
+            dists = chi_square_alt(query, self.centroids, self.centroid_sums, identities)[0]
+            identities = identities[np.argpartition(dists, shortlist - 1)[:shortlist]]
+
+        rows = np.concatenate([self.row_order[self.row_starts[i]:self.row_starts[i + 1]] for i in identities])
+        return np.sort(rows)
+
+    def search(self, engine, queries, k=1, nprobe=None, shortlist=None):
+        """Top-k (label, distance) lists per query histogram, like LBPHEngine.rank()."""
+        results = []
+        for query in np.atleast_2d(queries):
+            rows = self.candidate_rows(query, nprobe, shortlist)
+            dists = engine.distances(query, rows)
+            results.extend(engine.rank(dists, k, rows))
+        return results
@@ -0,0 +1,90 @@
+from collections import deque
+
+# --- IDENTITY CACHE CONFIGURATION ---
+identity_cache_config = {
+    'reverify_interval': 15,  # Re-run the recognizer on a track at least every K frames
+    'max_shift': 0.35,        # Re-verify when the box centre moves more than this fraction of its size
+    'max_scale_change': 0.25, # Re-verify when the box grows or shrinks by more than this fraction
+    'history_size': 10,       # Number of recent confidences kept per track
+}
+
+
+class CachedIdentity:
+    """The last recognizer result for one face track."""
+    def __init__(self, label, confidence, box, frame_index):
+        self.label = label
+        self.confidence = confidence
+        self.box = box                # Box the prediction was made on
+        self.frame_index = frame_index
+        self.history = deque()
+        self.predictions = 0
+
+    @property
+    def mean_confidence(self):
+        """Average distance over the recent predictions (lower is a better match, like LBPH)."""
+        return sum(self.history) / len(self.history) if self.history else self.confidence
+
+
+class IdentityCache:
+    """
+    Remembers who each face track is, so the recognizer only runs when a face is new,
+    the cached result is older than `reverify_interval` frames, or the box has moved or
+    changed scale enough that the old crop no longer describes it.
+    """
+    def __init__(self, **settings):
+        self.settings = dict(identity_cache_config, **settings)
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, track_id):
+        return self._entries.get(track_id)
+
+    def needs_verification(self, track, frame_index):
+        """True if the recognizer has to run on this track's crop for this frame."""
+        entry = self._entries.get(track.id)
+        if entry is None or frame_index - entry.frame_index >= self.settings['reverify_interval']:
+            self.misses += 1
+            return True
+
+        x, y, w, h = track.box
+        ex, ey, ew, eh = entry.box
+        shift = max(abs((x + w / 2.0) - (ex + ew / 2.0)), abs((y + h / 2.0) - (ey + eh / 2.0)))
+        if shift > self.settings['max_shift'] * max(ew, eh):
+            self.misses += 1
+            return True
+        if abs(w * h - ew * eh) > self.settings['max_scale_change'] * ew * eh:
+            self.misses += 1
+            return True
+
+        self.hits += 1
+        return False
+
+    def store(self, track, label, confidence, frame_index):
+        """Records a fresh prediction for the track and returns its cache entry."""
+        entry = self._entries.get(track.id)
+        if entry is None or entry.label != label:
+            # A different identity starts a new confidence history.
+            entry = CachedIdentity(label, confidence, track.box, frame_index)
+            self._entries[track.id] = entry
+        entry.label = label
+        entry.confidence = confidence
+        entry.box = track.box
+        entry.frame_index = frame_index
+        entry.predictions += 1
+        entry.history.append(confidence)
+        while len(entry.history) > self.settings['history_size']:
+            entry.history.popleft()
+        return entry
+
+    def evict_missing(self, active_ids):
+        """Forgets every track that is no longer in the scene."""
+        active = set(active_ids)
+        for track_id in [tid for tid in self._entries if tid not in active]:
+            del self._entries[track_id]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,265 @@
+"""
+NumPy implementation of OpenCV's LBPH face matching.
+
+Histograms are computed exactly like cv2.face.LBPHFaceRecognizer (circular extended LBP with
+bilinear interpolation, per-cell histograms normalised by the cell area) and compared with the
+same chi-square variant (HISTCMP_CHISQR_ALT), so distances can be checked against the existing
+thresholds (`confidence < 75` in face_recog.py, `conf < 70` in no_needed.py).
+
+The gallery is one (count, bins) matrix, and every face in a frame is scored against it in one
+batched call instead of one recognizer.predict() per face.
+"""
+import math
+import os
+
+import numpy as np
+
+from model_store import LBPHModel, binary_model_path_for
+
+FLT_EPSILON = np.float32(np.finfo(np.float32).eps)
+
+
+def lbp_image(src, radius=1, neighbors=8):
+    """Extended (circular) LBP codes of a gray uint8 image; same output as OpenCV's elbp()."""
+    src = np.asarray(src)
+    rows, cols = src.shape
+    out_rows, out_cols = rows - 2 * radius, cols - 2 * radius
+    codes = np.zeros((max(out_rows, 0), max(out_cols, 0)), dtype=np.int32)
+    if out_rows <= 0 or out_cols <= 0:
+        return codes
+
+    pixels = src.astype(np.float32)
+    center = pixels[radius:rows - radius, radius:cols - radius]
+
+    def shifted(dy, dx):
+        return pixels[radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+    for n in range(neighbors):
+        # Sample point, computed in double and stored as float like the C++ code.
+        x = np.float32(radius * math.cos(2.0 * math.pi * n / float(neighbors)))
+        y = np.float32(-radius * math.sin(2.0 * math.pi * n / float(neighbors)))
+        fx, fy = int(math.floor(x)), int(math.floor(y))
+        cx, cy = int(math.ceil(x)), int(math.ceil(y))
+        ty = np.float32(y - np.float32(fy))
+        tx = np.float32(x - np.float32(fx))
+        one = np.float32(1)
+        w1 = (one - tx) * (one - ty)
+        w2 = tx * (one - ty)
+        w3 = (one - tx) * ty
+        w4 = tx * ty
+        t = w1 * shifted(fy, fx) + w2 * shifted(fy, cx) + w3 * shifted(cy, fx) + w4 * shifted(cy, cx)
+        bit = (t > center) | (np.abs(t - center) < FLT_EPSILON)
+        codes += bit.astype(np.int32) << n
+    return codes
+
+
+def spatial_histogram(codes, neighbors=8, grid_x=8, grid_y=8):
+    """Concatenated per-cell histograms of an LBP code image, each divided by its cell area."""
+    patterns = 1 << neighbors
+    height, width = codes.shape[0] // grid_y, codes.shape[1] // grid_x
+    cells = grid_x * grid_y
+    if height == 0 or width == 0:
+        return np.zeros(cells * patterns, dtype=np.float32)
+    # (grid_y, height, grid_x, width) -> one row of pixels per cell, in row-major cell order.
+    grid = codes[:grid_y * height, :grid_x * width].reshape(grid_y, height, grid_x, width)
+    per_cell = grid.transpose(0, 2, 1, 3).reshape(cells, height * width)
+    offsets = (np.arange(cells, dtype=np.int64) * patterns)[:, None]
+    counts = np.bincount((per_cell + offsets).ravel(), minlength=cells * patterns).astype(np.float32)
+    # OpenCV scales by 1/area (convertTo with a double factor applied in float).
+    return counts * np.float32(1.0 / (height * width))
+
+
+def row_sums(matrix, chunk_rows=2048):
+    """float64 sum of every row, read in chunks so memory-mapped matrices are streamed."""
+    sums = np.empty(len(matrix), dtype=np.float64)
+    for start in range(0, len(sums), chunk_rows):
+        block = np.asarray(matrix[start:start + chunk_rows], dtype=np.float64)
+        sums[start:start + len(block)] = block.sum(axis=1)
+    return sums
+
+
+def _finish(result):
+    # Clamp tiny negative values from cancellation; the ALT variant doubles the sum.
+    np.maximum(result, 0.0, out=result)
+    result *= 2.0
+    return result
+
+
+def chi_square_alt(queries, matrix, sums, rows=None, chunk_rows=2048):
+    """
+    HISTCMP_CHISQR_ALT distance between every query histogram and the rows of `matrix`
+    (all rows, or only `rows`), shape (len(queries), n). `sums` are the row sums of `matrix`.
+
+    With s = q + g, (q - g)^2 / s = g - 3q + 4 q^2 / s, and where q is zero the term is just g.
+    So only the bins where the query is non-zero are read, and summing q^2 / s over them is one
+    float32 matrix-vector product per query.
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    count = len(matrix) if rows is None else len(rows)
+    result = np.empty((len(queries), count), dtype=np.float64)
+    if count == 0:
+        return result
+    if rows is not None:
+        sums = sums[rows]
+    nonzero = [np.flatnonzero(q) for q in queries]
+    query_sums = queries.sum(axis=1, dtype=np.float64)
+
+    for start in range(0, count, chunk_rows):
+        stop = min(start + chunk_rows, count)
+        # Contiguous slices keep memory-mapped reads sequential when scanning everything.
+        block = matrix[start:stop] if rows is None else matrix[rows[start:stop]]
+        for i, nz in enumerate(nonzero):
+            q = queries[i, nz]
+            denominators = np.take(block, nz, axis=1)
+            denominators += q
+            np.reciprocal(denominators, out=denominators)
+            result[i, start:stop] = sums[start:stop] - 3.0 * query_sums[i] + 4.0 * (denominators @ (q * q))
+    return _finish(result)
+
+
+def chi_square_alt_columns(queries, columns, sums):
+    """
+    chi_square_alt() against a bins-major copy of the gallery, columns = matrix.T (contiguous).
+    Picking a query's non-zero bins is then a copy of whole rows instead of a scattered gather.
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    result = np.empty((len(queries), columns.shape[1]), dtype=np.float64)
+    query_sums = queries.sum(axis=1, dtype=np.float64)
+    for i, query in enumerate(queries):
+        nz = np.flatnonzero(query)
+        q = query[nz]
+        denominators = columns[nz]
+        denominators += q[:, None]
+        np.reciprocal(denominators, out=denominators)
+        result[i] = sums - 3.0 * query_sums[i] + 4.0 * ((q * q) @ denominators)
+    return _finish(result)
+
+
+class LBPHEngine:
+    """
+    Batched LBPH matcher over an LBPHModel gallery.
+
+    predict() mirrors recognizer.predict(); predict_batch() scores several faces at once and
+    returns the top-k identities per face.
+    """
+    def __init__(self, model, chunk_rows=2048, index=None, max_column_bytes=256 * 1024 * 1024):
+        self.model = model
+        self.index = index          # Optional gallery_index.GalleryIndex for large galleries
+        self.radius = model.radius
+        self.neighbors = model.neighbors
+        self.grid_x = model.grid_x
+        self.grid_y = model.grid_y
+        self.threshold = model.threshold
+        self.chunk_rows = chunk_rows
+        self.gallery = model.float_histograms()
+        self.labels = np.asarray(model.labels, dtype=np.int32)
+        self._gallery_sums = None
+        # Exhaustive scans read a bins-major copy of the gallery, made on first use, unless it
+        # would be bigger than this; larger galleries are streamed from the (mapped) matrix.
+        self.max_column_bytes = max_column_bytes
+        self._columns = None
+
+        # Group gallery rows by label once so per-identity minima are a single reduceat.
+        self._order = np.argsort(self.labels, kind="stable")
+        sorted_labels = self.labels[self._order]
+        if len(sorted_labels):
+            self._label_starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+        else:
+            self._label_starts = np.empty(0, dtype=np.intp)
+        self.identities = sorted_labels[self._label_starts]
+
+    @classmethod
+    def from_model_path(cls, model_path):
+        """
+        Loads the binary store next to `model_path` (e.g. trainer.lbph for trainer.yml),
+        creating it from the YAML model first if it is missing or older.
+        """
+        binary_path = binary_model_path_for(model_path)
+        if not os.path.exists(binary_path) or (
+                os.path.exists(model_path) and os.path.getmtime(binary_path) < os.path.getmtime(model_path)):
+            LBPHModel.from_yaml(model_path).save(binary_path)
+        model = LBPHModel.load(binary_path)
+
+        # Use the ANN index saved at train time, unless it predates the current gallery.
+        from gallery_index import GalleryIndex, index_path_for
+        index = None
+        index_path = index_path_for(model_path)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(binary_path):
+            try:
+                index = GalleryIndex.load(index_path)
+            except (OSError, ValueError, KeyError):
+                index = None  # Half-written or from an older version; search exhaustively
+            if index is not None and index.row_starts[-1] != model.count:
+                index = None
+        return cls(model, index=index)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def histogram(self, face):
+        """LBPH feature vector of one gray face crop."""
+        return spatial_histogram(lbp_image(face, self.radius, self.neighbors), self.neighbors, self.grid_x, self.grid_y)
+
+    def _sums(self):
+        # Row sums are only needed by chi_square_alt; computed on first use so opening a
+        # memory-mapped model stays cheap.
+        if self._gallery_sums is None:
+            self._gallery_sums = row_sums(self.gallery, self.chunk_rows)
+        return self._gallery_sums
+
+    def _gallery_columns(self):
+        if self._columns is None and self.gallery.nbytes <= self.max_column_bytes:
+            self._columns = np.ascontiguousarray(self.gallery.T, dtype=np.float32)
+        return self._columns
+
+    def distances(self, queries, rows=None):
+        """Chi-square distances from each query histogram to the gallery (or to `rows` of it)."""
+        if rows is None:
+            columns = self._gallery_columns()
+            if columns is not None:
+                return chi_square_alt_columns(queries, columns, self._sums())
+        return chi_square_alt(queries, self.gallery, self._sums(), rows, self.chunk_rows)
+
+    def predict_batch(self, faces, k=1):
+        """
+        Scores every face crop against the gallery in one pass.
+        Returns, per face, a list of up to k (label, distance) pairs for the closest identities,
+        nearest first. Distances are on the same scale as recognizer.predict()'s confidence.
+        Large galleries go through the ANN index when one is attached (see gallery_index).
+        """
+        if not len(faces):
+            return []
+        if not len(self.labels):
+            return [[] for _ in faces]
+        queries = np.vstack([self.histogram(face) for face in faces])
+        if self.index is not None and self.index.worthwhile(len(self.identities)):
+            return self.index.search(self, queries, k)
+        return self.rank(self.distances(queries), k)
+
+    def rank(self, dists, k=1, rows=None):
+        """Turns a (m, n) distance matrix into per-query top-k (label, distance) lists."""
+        if rows is None:
+            order, starts, identities = self._order, self._label_starts, self.identities
+        else:
+            labels = self.labels[rows]
+            order = np.argsort(labels, kind="stable")
+            sorted_labels = labels[order]
+            starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+            identities = sorted_labels[starts]
+        results = []
+        for d in dists:
+            if not len(d):
+                results.append([])
+                continue
+            per_identity = np.minimum.reduceat(d[order], starts)
+            top = np.argsort(per_identity, kind="stable")[:k]
+            results.append([(int(identities[j]), float(per_identity[j])) for j in top
+                            if per_identity[j] < self.threshold])
+        return results
+
+    def predict(self, face):
+        """Same contract as recognizer.predict(): (label, distance), or (-1, DBL_MAX) if no match."""
+        matches = self.predict_batch([face], k=1)[0]
+        if not matches:
+            return -1, float(np.finfo(np.float64).max)
+        return matches[0]
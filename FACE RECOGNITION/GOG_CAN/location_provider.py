@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+
+# --- LOCATION CONFIGURATION ---
+location_config = {
+    'static': None,                 # (latitude, longitude) for a fixed kiosk; skips geocoding entirely
+    'query': "India",               # What to geocode when no static location is configured
+    'cache_path': "./TrainingData/location_cache.json",
+    'ttl': 24 * 60 * 60,            # Seconds before the cached location is refreshed
+    'fallback': (20.5937, 78.9629), # Used until anything better is known
+    'timeout': 10,                  # Geocoder network timeout in seconds
+}
+
+
+class LocationProvider:
+    """
+    Supplies the coordinates stored with each attendance record without ever blocking.
+
+    Priority: a static per-device location, then the last geocoded result (cached on disk
+    with a TTL and refreshed in the background when stale), then a fixed fallback.
+    """
+    def __init__(self, **settings):
+        self.settings = dict(location_config, **settings)
+        self._location = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._started = False
+        self.source = "fallback"     # 'static', 'cache', 'geocoder' or 'fallback'
+
+    def start(self):
+        """Loads the cache and, if it is missing or stale, geocodes on a background thread. Runs once."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        static = self.settings['static']
+        if static:
+            with self._lock:
+                self._location = (float(static[0]), float(static[1]))
+                self.source = "static"
+            return self
+
+        cached, fetched_at = self._read_cache()
+        if cached is not None:
+            with self._lock:
+                self._location = cached
+                self.source = "cache"
+        if cached is None or time.time() - fetched_at > self.settings['ttl']:
+            self._thread = threading.Thread(target=self._resolve, name="LocationProvider", daemon=True)
+            self._thread.start()
+        return self
+
+    def current(self):
+        """(latitude, longitude) right now; never touches the network."""
+        with self._lock:
+            return self._location if self._location is not None else tuple(self.settings['fallback'])
+
+    def _read_cache(self):
+        try:
+            with open(self.settings['cache_path'], "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("query") != self.settings['query']:
+                return None, 0
+            return (float(data["latitude"]), float(data["longitude"])), float(data["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 0
+
+    def _write_cache(self, location):
+        path = self.settings['cache_path']
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"query": self.settings['query'], "latitude": location[0], "longitude": location[1],
+                       "fetched_at": time.time()}, f)
+        os.replace(tmp_path, path)
+
+    def _resolve(self):
+        """Background geocode; failures just leave the cached or fallback location in place."""
+        try:
+            from geopy.geocoders import Nominatim
+            geolocator = Nominatim(user_agent="face_recognition_app", timeout=self.settings['timeout'])
+            location = geolocator.geocode(self.settings['query'])
+            if not location:
+                return
+            resolved = (location.latitude, location.longitude)
+            with self._lock:
+                self._location = resolved
+                self.source = "geocoder"
+            self._write_cache(resolved)
+        except Exception as e:
+            print(f"Could not get location: {e}")
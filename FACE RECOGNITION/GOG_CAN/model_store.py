@@ -0,0 +1,229 @@
+"""
+Compact binary store for LBPH models.
+
+trainer.yml keeps one text-encoded float histogram (grid_x * grid_y * 2**neighbors bins) per
+training image, which makes it large and slow to parse. This module keeps the same data as
+
+    8 bytes   magic  b"LBPHBIN\\0"
+    4 bytes   format version (little-endian uint32)
+    4 bytes   length of the JSON header
+    n bytes   JSON header: LBPH parameters, count, bins, dtype, array offsets
+    padding   up to a 64-byte boundary
+    count*bins histograms, float32 (exact) or uint16 (quantised, half the size)
+    count     labels, int32
+
+so the arrays can be memory-mapped instead of parsed.
+
+    python model_store.py import TrainingData/trainer.yml TrainingData/trainer.lbph
+    python model_store.py export TrainingData/trainer.lbph TrainingData/trainer.yml
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+MAGIC = b"LBPHBIN\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+DBL_MAX = sys.float_info.max  # OpenCV's default LBPH threshold
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def binary_model_path_for(model_path):
+    """TrainingData/trainer.yml -> TrainingData/trainer.lbph"""
+    return os.path.splitext(model_path)[0] + ".lbph"
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _temp_path_for(path):
+    """Sibling temp file that keeps the extension (OpenCV picks the format from it)."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.tmp-{os.getpid()}{ext}"
+
+
+class LBPHModel:
+    """
+    LBPH parameters plus the gallery as one (count, bins) histogram matrix and a label array.
+    Loaded models keep their arrays memory-mapped, so opening one costs a few page faults.
+    """
+    def __init__(self, histograms, labels, radius=1, neighbors=8, grid_x=8, grid_y=8,
+                 threshold=DBL_MAX, scale=None):
+        self.histograms = histograms
+        self.labels = labels
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.threshold = threshold
+        self.scale = scale          # Quantisation factor for uint16 histograms, None for float32
+
+    @property
+    def count(self):
+        return int(self.labels.shape[0])
+
+    @property
+    def bins(self):
+        return self.grid_x * self.grid_y * (1 << self.neighbors)
+
+    def float_histograms(self):
+        """The histograms as float32 (dequantised if the store was written as uint16)."""
+        if self.histograms.dtype == np.float32:
+            return self.histograms
+        return self.histograms.astype(np.float32) / np.float32(self.scale)
+
+    # --- CONVERSION FROM/TO OPENCV ---
+    @classmethod
+    def from_recognizer(cls, recognizer):
+        """Copies the gallery out of a trained cv2.face.LBPHFaceRecognizer."""
+        histograms = recognizer.getHistograms()
+        bins = recognizer.getGridX() * recognizer.getGridY() * (1 << recognizer.getNeighbors())
+        if histograms:
+            matrix = np.ascontiguousarray(np.vstack([h.reshape(1, -1) for h in histograms]), dtype=np.float32)
+        else:
+            matrix = np.empty((0, bins), dtype=np.float32)
+        labels = np.asarray(recognizer.getLabels(), dtype=np.int32).reshape(-1)
+        return cls(matrix, labels, recognizer.getRadius(), recognizer.getNeighbors(),
+                   recognizer.getGridX(), recognizer.getGridY(), recognizer.getThreshold())
+
+    @classmethod
+    def from_yaml(cls, yaml_path):
+        """Imports a model saved with recognizer.save() (e.g. TrainingData/trainer.yml)."""
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(yaml_path)
+        return cls.from_recognizer(recognizer)
+
+    def to_yaml(self, yaml_path):
+        """Exports in the layout LBPHFaceRecognizer.read() expects."""
+        tmp_path = _temp_path_for(yaml_path)
+        fs = cv2.FileStorage(tmp_path, cv2.FILE_STORAGE_WRITE)
+        try:
+            fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+            fs.write("threshold", float(self.threshold))
+            fs.write("radius", int(self.radius))
+            fs.write("neighbors", int(self.neighbors))
+            fs.write("grid_x", int(self.grid_x))
+            fs.write("grid_y", int(self.grid_y))
+            fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+            histograms = self.float_histograms()
+            for i in range(self.count):
+                fs.write("", np.asarray(histograms[i], dtype=np.float32).reshape(1, -1))
+            fs.endWriteStruct()
+            fs.write("labels", np.asarray(self.labels, dtype=np.int32).reshape(-1, 1))
+            fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+            fs.endWriteStruct()
+            fs.endWriteStruct()
+        finally:
+            fs.release()
+        os.replace(tmp_path, yaml_path)
+
+    def to_recognizer(self):
+        """Builds a cv2 LBPHFaceRecognizer holding this gallery (goes through a YAML file)."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".yml")
+        os.close(fd)
+        self.to_yaml(tmp_path)
+        try:
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.read(tmp_path)
+        finally:
+            os.remove(tmp_path)
+        return recognizer
+
+    # --- BINARY STORE ---
+    def save(self, path, dtype="float32"):
+        """Writes the binary store atomically. dtype is 'float32' (exact) or 'uint16' (quantised)."""
+        histograms = self.float_histograms()
+        scale = None
+        if dtype == "uint16":
+            # Every cell histogram is normalised to sum to 1, so values lie in [0, 1].
+            scale = 65535.0
+            data = np.rint(np.clip(histograms, 0.0, 1.0) * scale).astype("<u2")
+        elif dtype == "float32":
+            data = np.asarray(histograms, dtype="<f4")
+        else:
+            raise ValueError(f"Unsupported histogram dtype: {dtype}")
+        labels = np.asarray(self.labels, dtype="<i4").reshape(-1)
+
+        header = {
+            "radius": int(self.radius), "neighbors": int(self.neighbors),
+            "grid_x": int(self.grid_x), "grid_y": int(self.grid_y),
+            "threshold": float(self.threshold),
+            "count": int(labels.shape[0]), "bins": int(self.bins),
+            "dtype": dtype, "scale": scale,
+        }
+        # Offsets depend on the header length, which depends on the offsets; iterate until stable.
+        header["hist_offset"] = header["labels_offset"] = 0
+        while True:
+            header_bytes = json.dumps(header).encode("utf-8")
+            hist_offset = _align(_PREAMBLE.size + len(header_bytes))
+            labels_offset = _align(hist_offset + data.nbytes)
+            if (header["hist_offset"], header["labels_offset"]) == (hist_offset, labels_offset):
+                break
+            header["hist_offset"], header["labels_offset"] = hist_offset, labels_offset
+
+        tmp_path = _temp_path_for(path)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+                f.write(header_bytes)
+                f.write(b"\0" * (hist_offset - f.tell()))
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.write(b"\0" * (labels_offset - f.tell()))
+                f.write(labels.tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Opens a binary store; with mmap=True the arrays are read lazily from the page cache."""
+        with open(path, "rb") as f:
+            magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an LBPH binary model")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has unsupported format version {version}")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        count, bins = header["count"], header["bins"]
+        dtype = np.dtype("<u2") if header["dtype"] == "uint16" else np.dtype("<f4")
+        if count == 0:
+            histograms = np.empty((0, bins), dtype=dtype)
+            labels = np.empty(0, dtype=np.int32)
+        elif mmap:
+            histograms = np.memmap(path, dtype=dtype, mode="r", offset=header["hist_offset"], shape=(count, bins))
+            labels = np.memmap(path, dtype="<i4", mode="r", offset=header["labels_offset"], shape=(count,))
+        else:
+            with open(path, "rb") as f:
+                f.seek(header["hist_offset"])
+                histograms = np.fromfile(f, dtype=dtype, count=count * bins).reshape(count, bins)
+                f.seek(header["labels_offset"])
+                labels = np.fromfile(f, dtype="<i4", count=count)
+        return cls(histograms, labels, header["radius"], header["neighbors"], header["grid_x"],
+                   header["grid_y"], header["threshold"], header["scale"])
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] not in ("import", "export"):
+        print(__doc__)
+        return 2
+    command, source, target = argv[0], argv[1], argv[2]
+    if command == "import":
+        dtype = argv[3] if len(argv) > 3 else "float32"
+        LBPHModel.from_yaml(source).save(target, dtype=dtype)
+    else:
+        LBPHModel.load(source).to_yaml(target)
+    print(f"Wrote {target} ({os.path.getsize(target) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
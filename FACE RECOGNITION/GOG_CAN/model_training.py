@@ -0,0 +1,283 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from gallery_index import GalleryIndex, centroids_path_for, index_path_for, worth_building
+from model_store import LBPHModel, binary_model_path_for
+from perf_metrics import metrics
+from training_loader import load_training_data, label_from_directory, TrainingCancelled
+
+MANIFEST_VERSION = 1
+
+
+class TrainingResult:
+    """What a call to train_model did: mode is 'full', 'incremental' or 'up-to-date'."""
+    def __init__(self, mode, images=0, identities=0, skipped=None):
+        self.mode = mode
+        self.images = images          # Images fed to the recognizer by this call
+        self.identities = identities  # Distinct IDs among those images
+        self.skipped = skipped or []
+
+
+# --- MANIFEST ---
+# The manifest sits next to the model and lists, per person directory, every file that has
+# already been fed to the recognizer. Anything on disk that is not listed is new, except files
+# the loader could not use: those are kept under "skipped" with their mtime and size and are
+# only tried again once they change.
+def manifest_path_for(model_path):
+    """TrainingData/trainer.yml -> TrainingData/trainer_manifest.json"""
+    return os.path.splitext(model_path)[0] + "_manifest.json"
+
+
+def read_manifest(path):
+    """Returns the manifest dict, or None if it is missing, unreadable or from another version."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(path, gallery, skipped=None):
+    """
+    Writes the manifest for `gallery` (see scan_gallery); files in `skipped`, a
+    {(dir_name, file_name): stamp} dict, are listed as skipped instead of trained.
+    Written atomically so a crash never leaves a half-written file behind.
+    """
+    skipped = skipped or {}
+    skipped_by_dir = {}
+    for (dir_name, file_name), stamp in sorted(skipped.items()):
+        skipped_by_dir.setdefault(dir_name, {})[file_name] = stamp
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "directories": {d: sorted(f for f in files if (d, f) not in skipped) for d, files in gallery.items()},
+        "skipped": skipped_by_dir,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def scan_gallery(image_root):
+    """{person directory name: [file names]} for everything currently under image_root."""
+    gallery = {}
+    for dir_name in sorted(os.listdir(image_root)):
+        dir_path = os.path.join(image_root, dir_name)
+        if os.path.isdir(dir_path):
+            gallery[dir_name] = sorted(os.listdir(dir_path))
+    return gallery
+
+
+def _file_stamp(path):
+    """[mtime_ns, size] of a file, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def still_skipped(manifest, image_root):
+    """Files the manifest lists as skipped that are unchanged on disk, as {(dir_name, file_name): stamp}."""
+    unchanged = {}
+    for dir_name, files in manifest.get("skipped", {}).items():
+        for file_name, stamp in files.items():
+            if _file_stamp(os.path.join(image_root, dir_name, file_name)) == stamp:
+                unchanged[(dir_name, file_name)] = stamp
+    return unchanged
+
+
+def record_skipped(skipped, known=None):
+    """Adds the loader's (path, reason) pairs to `known`, keyed (dir_name, file_name) with their stamp."""
+    recorded = dict(known or {})
+    for path, _ in skipped:
+        stamp = _file_stamp(path)
+        if stamp is not None:
+            recorded[(os.path.basename(os.path.dirname(path)), os.path.basename(path))] = stamp
+    return recorded
+
+
+def diff_gallery(manifest, gallery, ignored=()):
+    """
+    Compares the gallery on disk with the manifest.
+    Returns (new_files, needs_rebuild) where new_files is a list of (dir_name, file_name),
+    leaving out the `ignored` ones (unchanged files that were skipped before).
+    LBPH cannot forget samples, so any removed file or directory forces a full rebuild.
+    """
+    trained = manifest["directories"]
+    new_files = []
+    for dir_name, files in gallery.items():
+        known = set(trained.get(dir_name, ()))
+        new_files.extend((dir_name, f) for f in files if f not in known and (dir_name, f) not in ignored)
+    for dir_name, files in trained.items():
+        on_disk = set(gallery.get(dir_name, ()))
+        if any(f not in on_disk for f in files):
+            return new_files, True
+    return new_files, False
+
+
+# --- TRAINING ---
+def _staging_path(path):
+    """A temporary name next to `path` that keeps its extension (OpenCV and NumPy go by it)."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.tmp-{os.getpid()}{ext}"
+
+
+def _updated_index(model, index_path, appended):
+    """
+    The gallery index for `model`, or None when the gallery is too small to need one.
+    After an incremental run (`appended` rows added), the saved index is extended if it
+    covers exactly the previous rows; otherwise it is built from scratch.
+    """
+    if not worth_building(len(np.unique(model.labels))):
+        return None
+    if appended and os.path.exists(index_path):
+        try:
+            previous = GalleryIndex.load(index_path)
+        except (OSError, ValueError, KeyError):
+            previous = None
+        if previous is not None and previous.row_starts[-1] == model.count - appended:
+            return previous.extend(model.histograms, model.labels)
+    return GalleryIndex.build(model.histograms, model.labels)
+
+
+def save_model_atomically(recognizer, model_path, manifest_path=None, gallery=None, skipped=None, appended=0):
+    """
+    Saves trainer.yml, the compact binary store (trainer.lbph), the gallery index and, if
+    manifest_path is given, the manifest for `gallery` and `skipped`, as one unit.
+    `appended` is the number of rows an incremental run added, which lets the index be
+    extended instead of rebuilt.
+
+    Everything is written to temporary files first; nothing is replaced until all of them are
+    complete. The binary store and index go in first (on Windows the store cannot be replaced
+    while a recognition window maps it). trainer.yml and the manifest, which together decide
+    what the next incremental run adds, go in last, and if the manifest cannot be replaced the
+    previous trainer.yml is put back.
+    """
+    model = LBPHModel.from_recognizer(recognizer)
+    binary_path, index_path = binary_model_path_for(model_path), index_path_for(model_path)
+    centroids_path = centroids_path_for(index_path)
+    staged = {path: _staging_path(path) for path in (model_path, binary_path, index_path, manifest_path) if path}
+    backup_path = None
+    try:
+        recognizer.save(staged[model_path])
+        # The binary copy is what the recognition window memory-maps; see model_store.
+        model.save(staged[binary_path])
+        # The ANN index is saved with every model so it never goes stale; see gallery_index.
+        index = _updated_index(model, index_path, appended) if model.count else None
+        if index is not None:
+            index.save(staged[index_path])
+            staged[centroids_path] = centroids_path_for(staged[index_path])
+        else:
+            del staged[index_path]
+        if manifest_path:
+            write_manifest(staged[manifest_path], gallery, skipped)
+
+        def swap_in(path):
+            os.replace(staged[path], path)
+            del staged[path]
+
+        swap_in(binary_path)
+        if index is not None:
+            swap_in(centroids_path)
+            swap_in(index_path)
+        else:
+            # A small gallery is scanned exhaustively; drop the index of an earlier, larger one.
+            for path in (index_path, centroids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        if manifest_path and os.path.exists(model_path):
+            backup_path = _staging_path(model_path) + ".bak"
+            os.replace(model_path, backup_path)
+        swap_in(model_path)
+        if manifest_path:
+            try:
+                swap_in(manifest_path)
+            except BaseException:
+                if backup_path:
+                    os.replace(backup_path, model_path)
+                    backup_path = None
+                raise
+    finally:
+        for tmp_path in list(staged.values()) + [backup_path]:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def train_model(image_root, model_path, full_rebuild=False, label_parser=label_from_directory,
+                progress_callback=None, cancel_event=None):
+    """
+    Brings the LBPH model at `model_path` up to date with the images under `image_root`.
+
+    If a model and a matching manifest exist, only images the manifest does not list are
+    loaded and passed to recognizer.update(); otherwise (or with full_rebuild=True) the
+    model is trained from scratch. Returns a TrainingResult; raises on recognizer errors.
+
+    progress_callback is called as progress_callback(phase, done, total, skipped, identities)
+    with phase one of 'loading', 'training' or 'saving'. Setting cancel_event stops the run
+    with TrainingCancelled at the next checkpoint; the existing model is left untouched.
+    """
+    def report(phase, done=0, total=0, skipped=0, identities=0):
+        if progress_callback is not None:
+            progress_callback(phase, done, total, skipped, identities)
+
+    def on_load_progress(done, total, skipped, identities):
+        report("loading", done, total, skipped, identities)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelled()
+
+    manifest_path = manifest_path_for(model_path)
+    gallery = scan_gallery(image_root)
+    manifest = None if full_rebuild or not os.path.exists(model_path) else read_manifest(manifest_path)
+
+    if manifest is not None:
+        unchanged_skipped = still_skipped(manifest, image_root)
+        new_files, needs_rebuild = diff_gallery(manifest, gallery, unchanged_skipped)
+        if not needs_rebuild:
+            if not new_files:
+                return TrainingResult("up-to-date")
+            image_paths = [os.path.join(image_root, d, f) for d, f in new_files]
+            with metrics.stage("training.load"):
+                data = load_training_data(image_root, label_parser=label_parser, image_paths=image_paths,
+                                          progress_callback=on_load_progress, cancel_event=cancel_event)
+            identities = len(set(data.labels.tolist()))
+            skipped = record_skipped(data.skipped, unchanged_skipped)
+            if len(data):
+                report("training", len(data), len(data), len(data.skipped), identities)
+                with metrics.stage("training.train"):
+                    recognizer = cv2.face.LBPHFaceRecognizer_create()
+                    recognizer.read(model_path)
+                    recognizer.update(data.faces, data.labels)
+                check_cancelled()
+                report("saving", len(data), len(data), len(data.skipped), identities)
+                with metrics.stage("training.save"):
+                    save_model_atomically(recognizer, model_path, manifest_path, gallery, skipped, appended=len(data))
+                metrics.count("trained_images", len(data))
+            else:
+                write_manifest(manifest_path, gallery, skipped)
+            return TrainingResult("incremental", len(data), identities, data.skipped)
+
+    with metrics.stage("training.load"):
+        data = load_training_data(image_root, label_parser=label_parser, progress_callback=on_load_progress,
+                                  cancel_event=cancel_event)
+    if not len(data):
+        return TrainingResult("full", 0, 0, data.skipped)
+    identities = len(set(data.labels.tolist()))
+    report("training", len(data), len(data), len(data.skipped), identities)
+    with metrics.stage("training.train"):
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(data.faces, data.labels)
+    check_cancelled()
+    report("saving", len(data), len(data), len(data.skipped), identities)
+    with metrics.stage("training.save"):
+        save_model_atomically(recognizer, model_path, manifest_path, gallery, record_skipped(data.skipped))
+    metrics.count("trained_images", len(data))
+    return TrainingResult("full", len(data), identities, data.skipped)
@@ -0,0 +1,311 @@
+"""
+Multi-camera recognition: one capture worker per camera, one shared pool of recognition
+processes, and an aggregator that merges the results per camera.
+
+    python multi_camera.py 0 1 2 3 --seconds 30
+    python multi_camera.py synthetic synthetic TrainingData/Images --workers 4 --fps 15
+
+Capture workers only grab frames, convert them to gray and hand them on. Each camera may have
+at most `in_flight` frames in the pool; past that, its new frames are dropped rather than
+queued, so no camera falls behind and a busy camera cannot starve the others.
+Frames travel through frame_transport: by default each camera's gray frame is converted
+straight into a shared-memory slot and only a descriptor is queued (transport='queue'
+pickles the pixels instead, for comparison).
+They are threads in a single capture process (OpenCV releases the GIL while it waits on a
+camera or converts a frame), so a camera costs a thread, not another interpreter.
+Recognition workers run Haar detection plus the NumPy LBPH matcher; each one memory-maps the
+same trainer.lbph, so the model is in memory once no matter how many workers or cameras there
+are. Memory therefore stays flat as cameras are added.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+
+from frame_sources import open_source
+from frame_transport import create_transport
+
+# --- PIPELINE CONFIGURATION ---
+pipeline_config = {
+    'model_path': "./TrainingData/trainer.yml",
+    'cascade_path': "haarcascade_frontalface_default.xml",
+    'workers': None,          # Recognition processes; None = one per CPU core
+    'in_flight': 2,           # Frames per camera waiting or being recognised before that camera drops
+    'transport': "shm",       # "shm" (shared-memory slots) or "queue" (pickled frames); see frame_transport.py
+    'slot_bytes': 1920 * 1080,  # Largest gray frame a shared-memory slot holds; bigger frames are dropped
+    'threshold': 75,          # Distances below this count as recognised, as in face_recog.py
+    'scale_factor': 1.3,      # detectMultiScale parameters, same as the recognition window
+    'min_neighbors': 5,
+}
+
+
+class CameraResult:
+    """Recognition output for one frame of one camera."""
+    def __init__(self, camera, seq, captured_at, faces, latency, worker):
+        self.camera = camera
+        self.seq = seq
+        self.captured_at = captured_at   # time.monotonic() in the capture process
+        self.faces = faces               # [(box, person_id, distance)]
+        self.latency = latency           # Capture to result, seconds
+        self.worker = worker             # PID of the recognition worker
+
+    def __repr__(self):
+        return f"CameraResult({self.camera!r}, seq={self.seq}, faces={len(self.faces)}, latency={self.latency:.3f})"
+
+
+class CameraStats:
+    """Per-camera counters kept by the aggregator."""
+    def __init__(self):
+        self.processed = 0
+        self.faces = 0
+        self.recognized = 0
+        self.latency_total = 0.0
+        self.first = None
+        self.last = None
+        self.latest = None               # Most recent CameraResult
+        self.seen = {}                   # person_id -> monotonic time last recognised
+
+    def fps(self):
+        if self.processed < 2 or self.last == self.first:
+            return 0.0
+        return (self.processed - 1) / (self.last - self.first)
+
+
+# --- PROCESSES ---
+# Slots of each camera's shared counter array.
+CAPTURED, DROPPED = 0, 1
+
+
+def _capture_host(cameras, settings, transport, counters, stop):
+    """The capture process: one _capture_worker thread per camera."""
+    import cv2
+    cv2.setNumThreads(1)
+    threads = [threading.Thread(target=_capture_worker, name=f"capture-{name}", daemon=True,
+                                args=(name, spec, settings, transport, counters[name], stop))
+               for name, spec in cameras.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _capture_worker(camera, spec, settings, transport, counters, stop):
+    """Reads one camera and passes each gray frame to the recognition pool unless its slots are all taken."""
+    import cv2
+    source = open_source(spec, **settings)
+    if not source.isOpened():
+        print(f"[{camera}] could not open {source.describe()}")
+        return
+    seq = 0
+    try:
+        while not stop.is_set():
+            ret, frame = source.read()
+            if not ret:
+                if source.finished:
+                    break
+                time.sleep(0.01)
+                continue
+            seq += 1
+            gray = transport.reserve(camera, frame.shape[:2])
+            with counters.get_lock():
+                counters[CAPTURED] += 1
+                counters[DROPPED] += gray is None
+            if gray is not None:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+                transport.commit(gray, (seq, time.monotonic()))
+    finally:
+        source.release()
+
+
+def _recognition_worker(transport, results, model_path, cascade_path, scale_factor, min_neighbors):
+    """Detects and recognises faces in frames from any camera until it receives None."""
+    import cv2
+    from batch_recognize import recognize_faces
+    from lbph_engine import LBPHEngine
+    cv2.setNumThreads(1)
+    engine = LBPHEngine.from_model_path(model_path)  # Memory-mapped; the pages are shared between workers
+    cascade = cv2.CascadeClassifier(cascade_path)
+    pid = os.getpid()
+    while True:
+        item = transport.receive()
+        if item is None:
+            break
+        handle, gray = item
+        camera, (seq, captured_at) = handle.channel, handle.meta
+        try:
+            faces = recognize_faces(cascade, engine, gray, scale_factor, min_neighbors)
+        finally:
+            transport.done(item)  # The slot is free for the camera's next frame
+        # Plain tuples across the process boundary; the aggregator builds the CameraResult.
+        results.put((camera, seq, captured_at, faces, time.monotonic() - captured_at, pid))
+
+
+# --- PIPELINE ---
+class MultiCameraPipeline:
+    """
+    Runs the capture process, the recognition pool and the aggregator thread.
+
+    cameras maps a camera name to a frame source setting (see frame_sources.open_source);
+    camera_settings are passed to every source (e.g. {'fps': 15} for replay sources).
+    Read merged results with stats() / latest(camera), or pass on_result to get every
+    CameraResult as it arrives (called on the aggregator thread).
+    """
+    def __init__(self, cameras, camera_settings=None, on_result=None, **settings):
+        self.cameras = dict(cameras)
+        self.camera_settings = dict(camera_settings or {})
+        self.settings = dict(pipeline_config, **settings)
+        self.on_result = on_result
+        self.workers = self.settings['workers'] or os.cpu_count() or 1
+        self._ctx = mp.get_context("spawn")
+        self._transport = None
+        self._results = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._counters = {name: self._ctx.Array("q", 2) for name in self.cameras}
+        self._stats = {name: CameraStats() for name in self.cameras}
+        self._lock = threading.Lock()
+        self._capture_procs = []
+        self._worker_procs = []
+        self._aggregator = None
+        self._running = False
+
+    def start(self):
+        # Build trainer.lbph once here so workers only ever open it read-only.
+        from lbph_engine import LBPHEngine
+        LBPHEngine.from_model_path(self.settings['model_path'])
+
+        s = self.settings
+        self._transport = create_transport(s['transport'], self._ctx, self.cameras, s['in_flight'], s['slot_bytes'])
+        for _ in range(self.workers):
+            proc = self._ctx.Process(target=_recognition_worker, daemon=True, args=(
+                self._transport, self._results, s['model_path'], s['cascade_path'], s['scale_factor'], s['min_neighbors']))
+            proc.start()
+            self._worker_procs.append(proc)
+        proc = self._ctx.Process(target=_capture_host, name="capture", daemon=True, args=(
+            self.cameras, self.camera_settings, self._transport, self._counters, self._stop))
+        proc.start()
+        self._capture_procs.append(proc)
+        self._running = True
+        self._aggregator = threading.Thread(target=self._aggregate, name="MultiCameraAggregator", daemon=True)
+        self._aggregator.start()
+        return self
+
+    def _aggregate(self):
+        threshold = self.settings['threshold']
+        while self._running or not self._results.empty():
+            try:
+                result = CameraResult(*self._results.get(timeout=0.2))
+            except queue.Empty:
+                continue
+            with self._lock:
+                stats = self._stats[result.camera]
+                stats.processed += 1
+                stats.faces += len(result.faces)
+                stats.latency_total += result.latency
+                now = time.monotonic()
+                stats.first = now if stats.first is None else stats.first
+                stats.last = now
+                if stats.latest is None or result.seq > stats.latest.seq:
+                    stats.latest = result
+                for _, person_id, distance in result.faces:
+                    if distance < threshold:
+                        stats.recognized += 1
+                        stats.seen[person_id] = result.captured_at
+            if self.on_result is not None:
+                self.on_result(result)
+
+    def latest(self, camera):
+        with self._lock:
+            return self._stats[camera].latest
+
+    def stats(self):
+        """{camera: dict of fps, processed, captured, dropped, faces, recognized, mean latency, people seen}."""
+        with self._lock:
+            report = {}
+            for name, stats in self._stats.items():
+                report[name] = {
+                    "fps": stats.fps(),
+                    "processed": stats.processed,
+                    "captured": self._counters[name][CAPTURED],
+                    "dropped": self._counters[name][DROPPED],
+                    "faces": stats.faces,
+                    "recognized": stats.recognized,
+                    "latency_ms": stats.latency_total / stats.processed * 1000 if stats.processed else 0.0,
+                    "people": sorted(int(p) for p in stats.seen),
+                }
+            return report
+
+    def stop(self):
+        self._stop.set()
+        for proc in self._capture_procs:
+            proc.join(timeout=2.0)
+        self._transport.close_consumers(len(self._worker_procs))
+        for proc in self._worker_procs:
+            proc.join(timeout=5.0)
+        self._running = False
+        if self._aggregator is not None:
+            self._aggregator.join(timeout=2.0)
+        for proc in self._capture_procs + self._worker_procs:
+            if proc.is_alive():
+                proc.terminate()
+        self._transport.close()
+
+    def process_ids(self):
+        return [proc.pid for proc in self._capture_procs + self._worker_procs if proc.pid]
+
+
+def proportional_memory_mb(pids):
+    """Sum of PSS (shared pages split between the processes using them) in MB; Linux only, else None."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            return None
+    return total / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="one frame source per camera (index, video, image dir, synthetic)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None, help="recognition processes (default: CPU cores)")
+    parser.add_argument("--fps", type=float, default=None, help="pace replayed/synthetic sources at this rate")
+    parser.add_argument("--transport", choices=("shm", "queue"), default=pipeline_config['transport'])
+    parser.add_argument("--model", default=pipeline_config['model_path'])
+    parser.add_argument("--cascade", default=pipeline_config['cascade_path'])
+    args = parser.parse_args(argv)
+
+    cameras = {f"cam{i}": (int(s) if s.isdigit() else s) for i, s in enumerate(args.sources)}
+    camera_settings = {"width": 640, "height": 480, "seed": 0}
+    if args.fps is not None:
+        camera_settings["fps"] = args.fps
+    pipeline = MultiCameraPipeline(cameras, camera_settings, workers=args.workers, transport=args.transport,
+                                   model_path=args.model, cascade_path=args.cascade).start()
+    try:
+        time.sleep(args.seconds)
+        memory = proportional_memory_mb(pipeline.process_ids())
+    finally:
+        pipeline.stop()
+
+    total = 0.0
+    print(f"{len(cameras)} cameras, {pipeline.workers} recognition workers, {args.transport} transport, {args.seconds:.0f} s")
+    print(f"{'camera':>8} {'fps':>7} {'processed':>10} {'captured':>9} {'dropped':>8} {'faces':>6} {'latency ms':>11}  people")
+    for name, row in pipeline.stats().items():
+        total += row["fps"]
+        print(f"{name:>8} {row['fps']:>7.1f} {row['processed']:>10} {row['captured']:>9} {row['dropped']:>8}"
+              f" {row['faces']:>6} {row['latency_ms']:>11.1f}  {row['people']}")
+    print(f"aggregate: {total:.1f} frames/s")
+    if memory is not None:
+        print(f"pipeline memory (PSS): {memory:.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,12 @@ import datetime
 import time
 import pyttsx3
 from glob import glob
+from training_loader import load_training_data, label_from_filename
+from lbph_engine import LBPHEngine
+from person_directory import PersonDirectory
+from frame_sources import open_source
+from perf_metrics import metrics
+from session_profiler import ProfileSession
 
 # --- Main Application Class ---
 class AttendanceApp:
@@ -30,6 +36,11 @@ class AttendanceApp:
         self.trainimage_path = "TrainingImage"
         self.studentdetail_path = "./StudentDetails/studentdetails.csv"
         self.attendance_path = "Attendance"
+        # Where frames come from: a camera index, video file, image directory or "synthetic"
+        # (see frame_sources.open_source).
+        self.camera_source = 0
+        # Stage timings are collected and exported when FACE_METRICS=1 (see perf_metrics).
+        metrics.configure()
         
         # Create necessary directories if they don't exist
         for path in [self.trainimage_path, "TrainingImageLabel", "StudentDetails", self.attendance_path]:
@@ -199,7 +210,7 @@ class AttendanceApp:
             return
 
         try:
-            cam = cv2.VideoCapture(0)
+            cam = open_source(self.camera_source)
             if not cam.isOpened():
                 notification_callback("Could not open camera.", is_error=True)
                 return
@@ -274,26 +285,11 @@ class AttendanceApp:
         """
         Gets face images and their corresponding IDs from the training folder.
         """
-        image_paths = []
-        for dir_name in os.listdir(path):
-            dir_path = os.path.join(path, dir_name)
-            if os.path.isdir(dir_path):
-                for file_name in os.listdir(dir_path):
-                    image_paths.append(os.path.join(dir_path, file_name))
-
-        faces = []
-        ids = []
-        for image_path in image_paths:
-            try:
-                pil_image = Image.open(image_path).convert("L")  # Convert to grayscale
-                image_np = np.array(pil_image, "uint8")
-                # Extract ID from filename: enrollment_name_id.jpg
-                file_id = int(os.path.split(image_path)[-1].split("_")[1])
-                faces.append(image_np)
-                ids.append(file_id)
-            except Exception as e:
-                print(f"Skipping corrupted file {image_path}: {e}")
-        return faces, ids
+        # Extract ID from filename: enrollment_name_id.jpg
+        data = load_training_data(path, label_parser=label_from_filename)
+        for image_path, reason in data.skipped:
+            print(f"Skipping corrupted file {image_path}: {reason}")
+        return data.faces, data.labels
 
     def open_attendance_subject_choice(self):
         """
@@ -343,56 +339,74 @@ class AttendanceApp:
         self.text_to_speech(f"Starting attendance for {subject}. Look at the camera.")
 
         try:
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
             if not os.path.exists(self.trainimagelabel_path):
                 messagebox.showerror("Error", "Model not found. Please train the model first.")
                 return
-            recognizer.read(self.trainimagelabel_path)
+            engine = LBPHEngine.from_model_path(self.trainimagelabel_path)
             
             face_cascade = cv2.CascadeClassifier(self.haarcasecade_path)
-            df = pd.read_csv(self.studentdetail_path)
+            students = PersonDirectory(self.studentdetail_path, key_field="Enrollment")
             
-            cam = cv2.VideoCapture(0)
+            cam = open_source(self.camera_source)
             font = cv2.FONT_HERSHEY_SIMPLEX
             
-            attendance = pd.DataFrame(columns=["Enrollment", "Name"])
+            # Enrollment -> Name of everyone recognised so far (insertion-ordered).
+            attendance = {}
             
-            # Capture for 20 seconds
-            start_time = time.time()
-            end_time = start_time + 20
-
-            while time.time() < end_time:
-                ret, im = cam.read()
-                gray = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.2, 5)
-
-                for (x, y, w, h) in faces:
-                    face_id, conf = recognizer.predict(gray[y:y+h, x:x+w])
-
-                    if conf < 70:  # Confidence threshold
-                        student_name = df.loc[df["Enrollment"] == face_id]["Name"].values[0]
-                        display_text = f"{student_name} ({face_id})"
+            # Capture for 20 seconds (profiled when FACE_PROFILE=1; see session_profiler).
+            # Even if recognition fails, the profiler is stopped and the camera released.
+            try:
+                with ProfileSession("attendance"):
+                    start_time = time.time()
+                    end_time = start_time + 20
+
+                    while time.time() < end_time:
+                        with metrics.stage("capture"):
+                            ret, im = cam.read()
+                        if not ret:
+                            break  # A recorded or replayed source ran out of frames
+                        metrics.count("frames")
+                        with metrics.stage("convert"):
+                            gray = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
+                        with metrics.stage("detect"):
+                            faces = face_cascade.detectMultiScale(gray, 1.2, 5)
+                        metrics.count("faces", len(faces))
+
+                        with metrics.stage("predict"):
+                            predictions = engine.predict_batch([gray[y:y+h, x:x+w] for (x, y, w, h) in faces])
+                        metrics.count("predictions", len(faces))
+                        for (x, y, w, h), matches in zip(faces, predictions):
+                            face_id, conf = matches[0] if matches else (-1, float("inf"))
+
+                            with metrics.stage("lookup"):
+                                student = students.get(face_id) if conf < 70 else None  # Confidence threshold
+                            metrics.count("recognized" if student is not None else "unknown")
+                            if student is not None:
+                                student_name = student.name
+                                display_text = f"{student_name} ({face_id})"
                         
-                        # Add to attendance if not already present
-                        if face_id not in attendance["Enrollment"].values:
-                            new_entry = pd.DataFrame([{"Enrollment": face_id, "Name": student_name}])
-                            attendance = pd.concat([attendance, new_entry], ignore_index=True)
-                            self.text_to_speech(f"Hello {student_name}")
-
-                        cv2.rectangle(im, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                        cv2.putText(im, display_text, (x, y - 10), font, 0.75, (0, 255, 0), 2)
-                    else:
-                        cv2.rectangle(im, (x, y), (x + w, y + h), (0, 0, 255), 2)
-                        cv2.putText(im, "Unknown", (x, y - 10), font, 0.75, (0, 0, 255), 2)
+                                # Add to attendance if not already present
+                                if face_id not in attendance:
+                                    attendance[face_id] = student_name
+                                    self.text_to_speech(f"Hello {student_name}")
+
+                                cv2.rectangle(im, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                                cv2.putText(im, display_text, (x, y - 10), font, 0.75, (0, 255, 0), 2)
+                            else:
+                                cv2.rectangle(im, (x, y), (x + w, y + h), (0, 0, 255), 2)
+                                cv2.putText(im, "Unknown", (x, y - 10), font, 0.75, (0, 0, 255), 2)
                 
-                cv2.imshow(f"Attendance for {subject}", im)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-
-            cam.release()
-            cv2.destroyAllWindows()
+                        with metrics.stage("render"):
+                            cv2.imshow(f"Attendance for {subject}", im)
+                            key = cv2.waitKey(1)
+                        if key & 0xFF == ord('q'):
+                            break
+            finally:
+                cam.release()
+                cv2.destroyAllWindows()
             
-            if not attendance.empty:
+            if attendance:
+                attendance = pd.DataFrame(list(attendance.items()), columns=["Enrollment", "Name"])
                 ts = time.time()
                 date = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
                 timestamp = datetime.datetime.fromtimestamp(ts).strftime("%H-%M-%S")
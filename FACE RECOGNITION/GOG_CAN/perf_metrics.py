@@ -0,0 +1,203 @@
+"""
+Hot-path instrumentation: per-stage timers with rolling percentiles, counters and gauges,
+shared by the recognition loop, the capture thread, training and attendance.
+
+    from perf_metrics import metrics
+    with metrics.stage("detect"):
+        faces = cascade.detectMultiScale(gray, 1.3, 5)
+    metrics.count("faces", len(faces))
+
+Collection is off unless metrics_config['enabled'] is set, the FACE_METRICS environment
+variable is 1, or something calls metrics.enable() (the recognition window's overlay does).
+While off, stage() hands back one shared no-op context manager and count()/observe() return
+at once, so the instrumented code pays a method call and nothing else.
+
+While on, the metrics are written every `export_interval` seconds to `export_path` in the
+Prometheus text format, atomically, so a node exporter textfile collector can scrape it.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# --- METRICS CONFIGURATION ---
+metrics_config = {
+    'enabled': os.environ.get("FACE_METRICS", "") not in ("", "0"),
+    'window': 512,                  # Samples per stage kept for the rolling percentiles
+    'quantiles': (0.5, 0.95, 0.99),
+    'export_path': "./TrainingData/face_recog.prom",  # None disables the file export
+    'export_interval': 10.0,        # Seconds between exports
+    'prefix': "face_recog",         # Metric name prefix in the exported file
+}
+
+_NO_STAGE = nullcontext()
+
+
+class StageStats:
+    """Timings of one stage: lifetime count and total, plus the last `window` samples."""
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def percentiles(self, quantiles):
+        """{q: seconds} over the rolling window (nearest rank)."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+
+class _StageTimer:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, time.perf_counter() - self._start)
+
+
+class Metrics:
+    """Thread-safe registry of stages, counters and gauges. See the module docstring."""
+    def __init__(self, **settings):
+        self.settings = dict(metrics_config, **settings)
+        self.enabled = bool(self.settings['enabled'])
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._exporter_stop = None    # Each exporter thread gets its own stop event
+
+    def configure(self, **settings):
+        """Applies overrides (e.g. from the app's metrics_settings); enables collection if they say so."""
+        self.settings.update(settings)
+        if self.settings['enabled']:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        with self._lock:
+            running = self._exporter is not None and self._exporter.is_alive() and not self._exporter_stop.is_set()
+            if self.settings['export_path'] and not running:
+                # A thread told to stop may still be finishing; it exits on its own event.
+                self._exporter_stop = threading.Event()
+                self._exporter = threading.Thread(target=self._export_loop, args=(self._exporter_stop,),
+                                                  name="MetricsExporter", daemon=True)
+                self._exporter.start()
+
+    def disable(self):
+        self.enabled = False
+        with self._lock:
+            if self._exporter_stop is not None:
+                self._exporter_stop.set()
+
+    # --- RECORDING ---
+    def stage(self, name):
+        """Context manager timing one stage; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NO_STAGE
+        return _StageTimer(self, name)
+
+    def observe(self, name, seconds):
+        """Records a duration measured elsewhere."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(self.settings['window'])
+            stats.add(seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled or not amount:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        if not self.enabled:
+            return
+        self.gauges[name] = value
+
+    # --- READING ---
+    def snapshot(self):
+        """{'stages': {name: {count, total, p50, p95, ...}}, 'counters': {...}, 'gauges': {...}}."""
+        quantiles = self.settings['quantiles']
+        with self._lock:
+            stages = {}
+            for name, stats in self.stages.items():
+                row = {"count": stats.count, "total": stats.total}
+                for q, value in stats.percentiles(quantiles).items():
+                    row[f"p{int(q * 100)}"] = value
+                stages[name] = row
+            return {"stages": stages, "counters": dict(self.counters), "gauges": dict(self.gauges)}
+
+    def summary_lines(self):
+        """Compact per-stage lines for an on-screen overlay, slowest p95 first."""
+        snap = self.snapshot()
+        rows = sorted(snap["stages"].items(), key=lambda item: -item[1].get("p95", 0.0))
+        lines = [f"{name:<10} p50 {row['p50'] * 1000:6.1f}  p95 {row['p95'] * 1000:6.1f} ms" for name, row in rows]
+        counters = snap["counters"]
+        lines.append("  ".join(f"{name} {value}" for name, value in counters.items()))
+        if snap["gauges"]:
+            lines.append("  ".join(f"{name} {value:g}" for name, value in snap["gauges"].items()))
+        return lines
+
+    def to_prometheus(self):
+        """The current metrics in the Prometheus text exposition format."""
+        prefix = self.settings['prefix']
+        snap = self.snapshot()
+        out = []
+        if snap["stages"]:
+            name = f"{prefix}_stage_seconds"
+            out.append(f"# HELP {name} Time per stage; quantiles over the last {self.settings['window']} samples.")
+            out.append(f"# TYPE {name} summary")
+            for stage, row in snap["stages"].items():
+                for q in self.settings['quantiles']:
+                    out.append(f'{name}{{stage="{stage}",quantile="{q:g}"}} {row[f"p{int(q * 100)}"]:.6g}')
+                out.append(f'{name}_sum{{stage="{stage}"}} {row["total"]:.6g}')
+                out.append(f'{name}_count{{stage="{stage}"}} {row["count"]}')
+        for counter, value in snap["counters"].items():
+            out.append(f"# TYPE {prefix}_{counter}_total counter")
+            out.append(f"{prefix}_{counter}_total {value}")
+        for gauge, value in snap["gauges"].items():
+            out.append(f"# TYPE {prefix}_{gauge} gauge")
+            out.append(f"{prefix}_{gauge} {value:g}")
+        out.append(f"# TYPE {prefix}_start_time_seconds gauge")
+        out.append(f"{prefix}_start_time_seconds {self.started:.0f}")
+        return "\n".join(out) + "\n"
+
+    def export(self, path=None):
+        """Writes to_prometheus() atomically (temp file + rename, as textfile collectors expect)."""
+        path = path or self.settings['export_path']
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def _export_loop(self, stop):
+        while not stop.wait(self.settings['export_interval']):
+            try:
+                self.export()
+            except OSError as e:
+                print(f"Could not write metrics to {self.settings['export_path']}: {e}")
+
+
+# The one registry the whole app records into.
+metrics = Metrics()
@@ -0,0 +1,79 @@
+import csv
+import os
+import time
+
+
+class PersonRecord:
+    """One row of the person details CSV with its display strings prepared up front."""
+    def __init__(self, person_id, fields):
+        self.id = person_id
+        self.fields = fields                      # Raw column -> value strings
+        self.name = fields.get("Name", "")
+        # What the info panel shows for each column; "---" for blanks like the empty panel.
+        self.display = {column: (value.strip() or "---") for column, value in fields.items()}
+
+    def __getitem__(self, column):
+        return self.fields[column]
+
+
+class PersonDirectory:
+    """
+    In-memory lookup table over a person details CSV (TrainingData/person_details.csv or
+    StudentDetails/studentdetails.csv), keyed by the integer ID column.
+
+    Lookups are dict hits, so nothing in the per-frame path touches pandas. The CSV is
+    reloaded when its modification time changes, checked at most every `check_interval`
+    seconds, so people registered while a window is open show up without reopening it.
+    """
+    def __init__(self, csv_path, key_field="ID", check_interval=1.0):
+        self.csv_path = csv_path
+        self.key_field = key_field
+        self.check_interval = check_interval
+        self._records = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self.reload()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, person_id):
+        return person_id in self._records
+
+    def reload(self):
+        """Re-reads the CSV. Rows without a numeric ID are ignored."""
+        records = {}
+        try:
+            mtime = os.path.getmtime(self.csv_path)
+            with open(self.csv_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        person_id = int(str(row.get(self.key_field, "")).strip())
+                    except ValueError:
+                        continue
+                    fields = {column: (value or "") for column, value in row.items() if column is not None}
+                    records[person_id] = PersonRecord(person_id, fields)
+        except FileNotFoundError:
+            mtime = None
+        self._records = records
+        self._mtime = mtime
+        self._last_check = time.monotonic()
+
+    def refresh(self):
+        """Reloads the CSV if it changed on disk. Cheap enough to call every frame."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.csv_path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def get(self, person_id):
+        """The PersonRecord for an ID, or None if the ID is not registered."""
+        return self._records.get(int(person_id))
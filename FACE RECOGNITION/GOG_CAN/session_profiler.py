@@ -0,0 +1,200 @@
+"""
+Profiling mode for recognition and training sessions.
+
+    python face_recog.py --profile          # or FACE_PROFILE=1, or profile_settings['enabled']
+
+A ProfileSession wraps one session (a recognition window, a training run) with cProfile
+and tracemalloc. While it runs, a tracemalloc snapshot is taken every `snapshot_interval`
+seconds and compared with the previous one. When it stops (or the process exits) it writes,
+under `output_dir`:
+
+    <name>-<time>.prof          cProfile data with the call graph (pstats, snakeviz, gprof2dot)
+    <name>-<time>-calls.txt     the hottest functions by cumulative time, with their callers
+    <name>-<time>-memory.txt    traced memory over time, the lines whose allocations grew
+                                most since the start, with tracebacks for the top sites,
+                                and the biggest growth in each interval
+
+cProfile only sees the thread that called start() (the Tk thread for a recognition window,
+the training thread for training); tracemalloc sees every thread. With profiling off,
+start() and stop() do nothing.
+"""
+import atexit
+import datetime
+import os
+import threading
+import time
+
+# --- PROFILING CONFIGURATION ---
+profile_config = {
+    'enabled': os.environ.get("FACE_PROFILE", "") not in ("", "0"),
+    'output_dir': "./TrainingData/profiles",
+    'snapshot_interval': 60.0,      # Seconds between tracemalloc snapshots
+    'traceback_frames': 10,         # Frames kept per allocation (more = slower, better tracebacks)
+    'top': 30,                      # Rows per section of the reports
+}
+
+# tracemalloc is process-wide; it is stopped when the last session that started it ends.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _acquire_tracemalloc(frames):
+    global _tracemalloc_users
+    import tracemalloc
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            return False  # Started by someone else (e.g. python -X tracemalloc); leave it to them
+        if _tracemalloc_users == 0:
+            tracemalloc.start(frames)
+        _tracemalloc_users += 1
+        return True
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    import tracemalloc
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+class ProfileSession:
+    """cProfile + periodic tracemalloc snapshots around one session; see the module docstring."""
+    def __init__(self, name, **settings):
+        self.name = name
+        self.settings = dict(profile_config, **settings)
+        self.enabled = bool(self.settings['enabled'])
+        self.paths = []               # Files written by stop()
+        self._profiler = None
+        self._profiler_error = None
+        self._owns_tracemalloc = False
+        self._baseline = None
+        self._previous = None
+        self._intervals = []          # (seconds since start, traced bytes, [top growth lines])
+        self._started = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if not self.enabled or self._started is not None:
+            return self
+        import cProfile
+        self._started = time.monotonic()
+        self._owns_tracemalloc = _acquire_tracemalloc(self.settings['traceback_frames'])
+        self._baseline = self._previous = self._snapshot()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"Profile-{self.name}", daemon=True)
+        self._sampler.start()
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError as e:      # Another profiler is active (Python 3.12+ allows only one)
+            self._profiler, self._profiler_error = None, str(e)
+        atexit.register(self.stop)
+        print(f"Profiling '{self.name}' session; reports go to {self.settings['output_dir']} when it ends.")
+        return self
+
+    def _snapshot(self):
+        import linecache
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return None
+        # Leave out the profiler's own bookkeeping.
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.settings['snapshot_interval']):
+            self._sample()
+
+    def _sample(self):
+        import tracemalloc
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return
+        with self._lock:
+            top = [str(stat) for stat in snapshot.compare_to(self._previous, "lineno")[:5] if stat.size_diff > 0]
+            self._intervals.append((time.monotonic() - self._started, tracemalloc.get_traced_memory()[0], top))
+            self._previous = snapshot
+
+    def stop(self):
+        """Stops profiling and writes the reports; returns their paths (also in self.paths)."""
+        if self._started is None:
+            return self.paths
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._stop.set()
+        self._sampler.join(timeout=5.0)
+        self._sample()
+        atexit.unregister(self.stop)
+        try:
+            self._write_reports()
+            print(f"Profile of '{self.name}' written to {', '.join(self.paths)}")
+        except OSError as e:
+            print(f"Could not write the profile of '{self.name}': {e}")
+        finally:
+            if self._owns_tracemalloc:
+                _release_tracemalloc()
+            self._started = None
+        return self.paths
+
+    def _write_reports(self):
+        import pstats
+        import tracemalloc
+        directory = self.settings['output_dir']
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(directory, f"{self.name}-{stamp}")
+        top = self.settings['top']
+        duration = time.monotonic() - self._started
+
+        if self._profiler is not None:
+            self._profiler.dump_stats(base + ".prof")
+            with open(base + "-calls.txt", "w", encoding="utf-8") as f:
+                f.write(f"Session '{self.name}', {duration:.0f} s\n\n")
+                stats = pstats.Stats(self._profiler, stream=f).strip_dirs().sort_stats("cumulative")
+                stats.print_stats(top)
+                stats.print_callers(top)
+            self.paths += [base + ".prof", base + "-calls.txt"]
+
+        with open(base + "-memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"Session '{self.name}', {duration:.0f} s, snapshots every {self.settings['snapshot_interval']:g} s\n")
+            if self._profiler_error:
+                f.write(f"cProfile was not available: {self._profiler_error}\n")
+            final = self._snapshot()
+            if self._baseline is None or final is None:
+                f.write("tracemalloc was not tracing; no memory report.\n")
+            else:
+                current, peak = tracemalloc.get_traced_memory()
+                start = sum(stat.size for stat in self._baseline.statistics("filename"))
+                f.write(f"Traced memory: {start / 1e6:.1f} MB at start, {current / 1e6:.1f} MB at end, "
+                        f"peak {peak / 1e6:.1f} MB\n")
+
+                f.write(f"\n== Biggest growth since the start (top {top}, by line) ==\n")
+                for stat in final.compare_to(self._baseline, "lineno")[:top]:
+                    f.write(f"{stat}\n")
+
+                f.write("\n== Tracebacks of the top 5 growth sites ==\n")
+                for stat in final.compare_to(self._baseline, "traceback")[:5]:
+                    f.write(f"\n{stat.size_diff / 1024:+.1f} KiB in {stat.count_diff:+d} blocks\n")
+                    f.write("\n".join(stat.traceback.format()) + "\n")
+
+                f.write("\n== Growth per interval ==\n")
+                for offset, traced, lines in self._intervals:
+                    f.write(f"\n+{offset:.0f} s: {traced / 1e6:.1f} MB traced\n")
+                    for line in lines:
+                        f.write(f"  {line}\n")
+        self.paths.append(base + "-memory.txt")
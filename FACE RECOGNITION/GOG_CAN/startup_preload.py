@@ -0,0 +1,113 @@
+import os
+import threading
+
+CASCADE_URL = "https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/haarcascade_frontalface_default.xml"
+
+
+def download_file(url, path):
+    """Fetches url into path, replacing it only once the download is complete."""
+    import requests
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    tmp_path = path + ".part"
+    with open(tmp_path, 'wb') as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+
+
+class StartupPreloader:
+    """
+    Warms up the recognition stack on a background thread once the main window is showing:
+    imports OpenCV and the matcher modules, downloads the Haar cascade if it is missing, and
+    loads the cascade and the trained model. open_recognition_window then finds them ready
+    instead of paying for them on the click.
+
+    The Tk thread reads the results; poll from an after() callback via `finished`/`error`
+    like a TrainingJob, or call wait() when the results are needed right away.
+    """
+    def __init__(self, cascade_path, model_path, cascade_url=CASCADE_URL):
+        self.cascade_path = cascade_path
+        self.model_path = model_path
+        self.cascade_url = cascade_url
+        self.cascade = None
+        self.finished = False
+        self.error = None
+        self._engine = None
+        self._engine_stamp = None
+        self._engine_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="StartupPreloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Blocks until preloading is done. Starts it first if it never was."""
+        self.start()
+        self._thread.join(timeout)
+        return self.finished
+
+    def _run(self):
+        try:
+            import cv2
+            if not os.path.exists(self.cascade_path):
+                print("Downloading required face detection model...")
+                download_file(self.cascade_url, self.cascade_path)
+                print("Download complete.")
+            self.cascade = cv2.CascadeClassifier(self.cascade_path)
+
+            # Pull in the rest of the recognition window's imports while nobody is waiting.
+            import frame_capture, face_tracking, identity_cache, display_stage  # noqa: F401
+
+            if os.path.exists(self.model_path):
+                self.engine()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def _model_stamp(self):
+        try:
+            stat = os.stat(self.model_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def engine(self):
+        """
+        The LBPHEngine for model_path, loaded at most once per version of the model file;
+        a retrained model is picked up on the next call.
+        """
+        with self._engine_lock:
+            stamp = self._model_stamp()
+            if self._engine is None or stamp != self._engine_stamp:
+                from lbph_engine import LBPHEngine
+                # Unmap the old trainer.lbph first: from_model_path may have to rewrite it.
+                self._engine = None
+                self._engine = LBPHEngine.from_model_path(self.model_path)
+                self._engine_stamp = stamp
+            return self._engine
+
+    def release(self):
+        """
+        Drops the cached engine and with it the memory map of trainer.lbph. Windows refuses to
+        replace a mapped file, so call this before training rewrites the model.
+        """
+        with self._engine_lock:
+            self._engine = None
+            self._engine_stamp = None
+
+    def reload_engine(self):
+        """Loads a freshly trained model in the background so the next window opens instantly."""
+        threading.Thread(target=self._reload_quietly, name="EngineReload", daemon=True).start()
+
+    def _reload_quietly(self):
+        try:
+            self.engine()
+        except Exception as e:
+            print(f"Could not preload the trained model: {e}")
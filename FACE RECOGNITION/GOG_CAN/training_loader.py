@@ -0,0 +1,190 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# cv2 can only decode at these reduced scales; anything else is resized after decoding.
+_REDUCED_FLAGS = [(8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+                  (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                  (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)]
+
+
+class TrainingCancelled(Exception):
+    """Raised when a load or training run is cancelled through its cancel event."""
+
+
+# --- LABEL PARSERS ---
+def label_from_directory(image_path):
+    """ID from the person's folder name, e.g. TrainingData/Images/101_DHRITIMAN DAS/x.jpg -> 101."""
+    return int(os.path.basename(os.path.dirname(image_path)).split("_")[0])
+
+
+def label_from_filename(image_path):
+    """ID from the file name, e.g. TrainingImage/1_Name/Name_1_7.jpg -> 1 (AttendanceApp layout)."""
+    return int(os.path.basename(image_path).split("_")[1])
+
+
+class TrainingData:
+    """
+    Decoded training set. `faces` are 2-D uint8 views into a handful of contiguous buffers
+    (one per worker chunk) and `labels` is an int32 array with one entry per face.
+    """
+    def __init__(self):
+        self.faces = []
+        self.labels = np.empty(0, dtype=np.int32)
+        self.paths = []
+        self.skipped = []   # (path, reason) for every file that could not be used
+
+    def __len__(self):
+        return len(self.faces)
+
+
+def list_training_images(root):
+    """Every file inside the per-person sub-directories of `root`."""
+    image_paths = []
+    for dir_name in sorted(os.listdir(root)):
+        dir_path = os.path.join(root, dir_name)
+        if os.path.isdir(dir_path):
+            for file_name in sorted(os.listdir(dir_path)):
+                image_paths.append(os.path.join(dir_path, file_name))
+    return image_paths
+
+
+def decode_grayscale(image_path, max_side=None):
+    """
+    Decodes one image straight to grayscale. If `max_side` is given, large images are decoded
+    at a reduced scale (JPEG DCT scaling) and then shrunk so that neither side exceeds it.
+    Returns None if the file is not a readable image.
+    """
+    # np.fromfile + imdecode copes with non-ASCII paths on Windows where cv2.imread does not.
+    raw = np.fromfile(image_path, dtype=np.uint8)
+    if raw.size == 0:
+        return None
+    flag = cv2.IMREAD_GRAYSCALE
+    if max_side:
+        try:
+            # PIL only parses the header here, so this is cheap even for huge files.
+            with Image.open(image_path) as header:
+                longest = max(header.size)
+        except Exception:
+            longest = 0
+        for factor, reduced_flag in _REDUCED_FLAGS:
+            if longest // factor >= max_side:
+                flag = reduced_flag
+                break
+    img = cv2.imdecode(raw, flag)
+    if img is None:
+        # Formats cv2 cannot decode (e.g. GIF) go through PIL like the original loader did.
+        try:
+            with Image.open(image_path) as pil_img:
+                img = np.array(pil_img.convert("L"), dtype=np.uint8)
+        except Exception:
+            return None
+    if max_side and max(img.shape) > max_side:
+        ratio = max_side / float(max(img.shape))
+        img = cv2.resize(img, (max(1, int(img.shape[1] * ratio)), max(1, int(img.shape[0] * ratio))),
+                         interpolation=cv2.INTER_AREA)
+    return img
+
+
+def _decode_chunk(image_paths, max_side):
+    """
+    Worker: decodes a chunk of files and packs them into one contiguous buffer so only a
+    single array (plus shapes) has to be pickled back to the parent process.
+    """
+    pixels, shapes, ok, skipped = [], [], [], []
+    for i, image_path in enumerate(image_paths):
+        try:
+            img = decode_grayscale(image_path, max_side)
+        except Exception as e:
+            skipped.append((image_path, str(e)))
+            continue
+        if img is None:
+            skipped.append((image_path, "not a readable image"))
+            continue
+        pixels.append(img.reshape(-1))
+        shapes.append(img.shape)
+        ok.append(i)
+    buffer = np.concatenate(pixels) if pixels else np.empty(0, dtype=np.uint8)
+    return buffer, np.array(shapes, dtype=np.int32).reshape(-1, 2), ok, skipped
+
+
+def load_training_data(root, label_parser=label_from_directory, workers=None, max_side=None,
+                       chunk_size=64, progress_callback=None, image_paths=None, cancel_event=None):
+    """
+    Loads every training image under `root` using a process pool.
+
+    label_parser      -- maps an image path to its integer ID (files it rejects are skipped)
+    workers           -- pool size; None uses every core, 0 or 1 decodes in this process
+    max_side          -- optional cap on the longest image side (reduced-resolution decode)
+    progress_callback -- called as progress_callback(done, total, skipped, identities) after each chunk
+    image_paths       -- explicit file list to load instead of scanning `root`
+    cancel_event      -- threading.Event; when set, pending chunks are dropped and
+                         TrainingCancelled is raised
+    """
+    data = TrainingData()
+    if image_paths is None:
+        image_paths = list_training_images(root)
+
+    # Parse the IDs up front (cheap) so workers only ever see files worth decoding.
+    paths, labels = [], []
+    for image_path in image_paths:
+        try:
+            labels.append(label_parser(image_path))
+            paths.append(image_path)
+        except (ValueError, IndexError):
+            data.skipped.append((image_path, "no numeric ID in path"))
+
+    total = len(image_paths)
+    done = total - len(paths)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    results = [None] * len(chunks)
+    identities = set()
+
+    def report(index):
+        identities.update(labels[index * chunk_size:index * chunk_size + len(chunks[index])])
+        if progress_callback is not None:
+            progress_callback(done, total, len(data.skipped), len(identities))
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelled()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(chunks) <= 1:
+        for index, chunk in enumerate(chunks):
+            check_cancelled()
+            results[index] = _decode_chunk(chunk, max_side)
+            data.skipped.extend(results[index][3])
+            done += len(chunk)
+            report(index)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        try:
+            futures = {pool.submit(_decode_chunk, chunk, max_side): index for index, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                check_cancelled()
+                index = futures[future]
+                results[index] = future.result()
+                data.skipped.extend(results[index][3])
+                done += len(chunks[index])
+                report(index)
+        finally:
+            # On cancellation (or a worker crash) drop whatever has not started yet.
+            pool.shutdown(wait=False, cancel_futures=True)
+    check_cancelled()
+
+    # Rebuild per-face views over the chunk buffers, keeping the original file order.
+    kept_labels = []
+    for index, (buffer, shapes, ok, _) in enumerate(results):
+        offset = 0
+        for (h, w), i in zip(shapes, ok):
+            data.faces.append(buffer[offset:offset + h * w].reshape(h, w))
+            offset += h * w
+            data.paths.append(chunks[index][i])
+            kept_labels.append(labels[index * chunk_size + i])
+    data.labels = np.array(kept_labels, dtype=np.int32)
+    return data
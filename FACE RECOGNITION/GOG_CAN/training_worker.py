@@ -0,0 +1,97 @@
+import queue
+import threading
+import time
+
+from model_training import train_model, TrainingCancelled
+from session_profiler import ProfileSession
+from training_loader import label_from_directory
+
+
+class TrainingProgress:
+    """One progress event from a TrainingJob."""
+    def __init__(self, phase, files_done=0, files_total=0, skipped=0, identities=0, eta=None):
+        self.phase = phase              # 'loading', 'training', 'saving'
+        self.files_done = files_done
+        self.files_total = files_total
+        self.skipped = skipped
+        self.identities = identities
+        self.eta = eta                  # Seconds left in the loading phase, or None if unknown
+
+    def describe(self):
+        """Short human-readable status line for the notification label."""
+        if self.phase == "loading":
+            text = f"Loading images {self.files_done}/{self.files_total} ({self.identities} people)"
+            if self.eta is not None and self.files_done < self.files_total:
+                text += f" - about {int(self.eta) + 1}s left"
+            return text + "..."
+        if self.phase == "training":
+            return f"Training on {self.files_done} images of {self.identities} people..."
+        return "Saving model..."
+
+
+class TrainingJob:
+    """
+    Runs model_training.train_model on a background thread.
+
+    The Tk thread must never touch the job's internals directly: it calls poll() from an
+    after() callback to collect progress events, and checks `finished` / `result` / `error`.
+    """
+    def __init__(self, image_root, model_path, full_rebuild=False, label_parser=label_from_directory,
+                 profile_settings=None):
+        self.image_root = image_root
+        self.model_path = model_path
+        self.full_rebuild = full_rebuild
+        self.label_parser = label_parser
+        self.profile_settings = dict(profile_settings or {})  # Overrides for session_profiler.profile_config
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.finished = False
+        self._events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="TrainingJob", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Asks the job to stop at its next checkpoint. The current model is left untouched."""
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll(self):
+        """Returns every progress event queued since the last call (never blocks)."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _on_progress(self, phase, done, total, skipped, identities):
+        eta = None
+        if phase == "loading" and done and total:
+            elapsed = time.monotonic() - self._started_at
+            eta = elapsed / done * (total - done)
+        self._events.put(TrainingProgress(phase, done, total, skipped, identities, eta))
+
+    def _run(self):
+        # Started on this thread so cProfile sees the training work.
+        profiler = ProfileSession("training", **self.profile_settings).start()
+        try:
+            self.result = train_model(self.image_root, self.model_path, full_rebuild=self.full_rebuild,
+                                      label_parser=self.label_parser, progress_callback=self._on_progress,
+                                      cancel_event=self._cancel)
+        except TrainingCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            profiler.stop()
+            self.finished = True